@@ -1,5 +1,7 @@
 # agent.py - Updated with Indian-accented voice for better pronunciation of names like "Swayam"
 import logging
+import sys
+from pathlib import Path
 
 from dotenv import load_dotenv
 from livekit.agents import (
@@ -14,8 +16,13 @@ from livekit.agents import (
     metrics,
     tokenize,
 )
-from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
-from livekit.plugins.turn_detector.multilingual import MultilingualModel
+from livekit.plugins import murf, google, deepgram
+
+# Shared runtime helpers (voice_runtime/) live at the repository root
+sys.path.append(str(Path(__file__).resolve().parents[4]))
+from voice_runtime.instrumentation import instrument_tools
+from voice_runtime.latency import track_latency
+from voice_runtime.models import prewarm_pipeline, turn_detector
 
 # Import coffee barista components
 from prompt import SYSTEM_PROMPT
@@ -52,7 +59,7 @@ class CoffeeBaristaAgent(Agent):
 
 
 def prewarm(proc: JobProcess):
-    proc.userdata["vad"] = silero.VAD.load()
+    prewarm_pipeline(proc)
 
 
 async def entrypoint(ctx: JobContext):
@@ -83,7 +90,7 @@ async def entrypoint(ctx: JobContext):
             ),
         # VAD and turn detection are used to determine when the user is speaking and when the agent should respond
         # See more at https://docs.livekit.io/agents/build/turns
-        turn_detection=MultilingualModel(),
+        turn_detection=turn_detector(ctx.proc),
         vad=ctx.proc.userdata["vad"],
         # allow the LLM to generate a response while waiting for the end of turn
         # See more at https://docs.livekit.io/agents/build/audio/#preemptive-generation
@@ -115,6 +122,8 @@ async def entrypoint(ctx: JobContext):
 
     ctx.add_shutdown_callback(log_usage)
 
+    track_latency(ctx, session, agent="coffee-shop-barista")
+
     # # Add a virtual avatar to the session, if desired
     # # For other providers, see https://docs.livekit.io/agents/models/avatar/
     # avatar = hedra.AvatarSession(
@@ -127,12 +136,15 @@ async def entrypoint(ctx: JobContext):
     userdata = Userdata()
     
     # Start the session with our coffee barista agent
+    agent = CoffeeBaristaAgent(userdata=userdata)
+    await instrument_tools(ctx, agent, name="coffee-shop-barista")
+
     await session.start(
-        agent=CoffeeBaristaAgent(userdata=userdata),
+        agent=agent,
         room=ctx.room,
         room_input_options=RoomInputOptions(
             # For telephony applications, use `BVCTelephony` for best results
-            noise_cancellation=noise_cancellation.BVC(),
+            noise_cancellation=ctx.proc.userdata["noise_cancellation"],
         ),
     )
     
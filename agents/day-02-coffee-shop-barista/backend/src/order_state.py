@@ -2,7 +2,6 @@
 Order State Management for Kruti Coffee Barista
 """
 
-import json
 import uuid
 from datetime import datetime
 from dataclasses import dataclass, field
@@ -120,30 +119,18 @@ class OrderState:
         except Exception as e:
             return f"Order for {self.name}: Total ₹{self.total_price}"
     
-    def save_to_file(self, directory: str = "orders") -> str:
-        """Save the order to a JSON file"""
-        import os
-        
-        # Create orders directory if it doesn't exist
-        os.makedirs(directory, exist_ok=True)
-        
+    async def save(self, store) -> str:
+        """Save the order as a record in the "orders" collection of a voice_runtime store"""
         # Update timestamp and price
         self.timestamp = datetime.now().isoformat()
         self.calculate_price()
         
-        # Create safe filename
+        # Create safe key (the JSON store writes orders/<key>.json)
         safe_name = self.name.replace(' ', '_') if self.name else "unknown"
-        filename = f"{directory}/order_{self.order_id}_{safe_name}.json"
+        key = f"order_{self.order_id}_{safe_name}"
         
-        # Save to file
-        try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
-            print(f"✓ Order saved successfully: {filename}")
-            return filename
-        except Exception as e:
-            print(f"❌ Error saving order: {e}")
-            raise
+        await store.put("orders", key, self.to_dict())
+        return key
 
 
 # Helper functions
@@ -3,6 +3,7 @@ Function Tools for Coffee Barista Agent
 """
 
 import logging
+from pathlib import Path
 from typing import Annotated, Literal
 from livekit.agents import function_tool, RunContext, ToolError
 from pydantic import Field
@@ -20,8 +21,13 @@ from order_state import (
     is_valid_location,
 )
 
+from voice_runtime.storage import open_store
+
 logger = logging.getLogger("coffee-tools")
 
+# Orders are stored under backend/orders/
+store = open_store(Path(__file__).resolve().parent.parent)
+
 
 class Userdata:
     """Container for conversation state"""
@@ -279,8 +285,8 @@ async def finalize_order(ctx: RunContext[Userdata]) -> str:
     # Save order
     try:
         logger.info(f"🔥 Attempting to save order for {order.name}")
-        filepath = order.save_to_file()
-        logger.info(f"✓ Order saved successfully: {filepath}")
+        key = await order.save(store)
+        logger.info(f"✓ Order saved successfully: {key}")
     except Exception as e:
         logger.error(f"❌ Error saving order file: {e}", exc_info=True)
         # Continue anyway - file save is not critical
@@ -1,4 +1,6 @@
 import logging
+import sys
+from pathlib import Path
 import json
 import os
 import requests
@@ -19,8 +21,15 @@ from livekit.agents import (
     function_tool,
     RunContext,
 )
-from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
-from livekit.plugins.turn_detector.multilingual import MultilingualModel
+from livekit.plugins import murf, google, deepgram
+
+# Shared runtime helpers (voice_runtime/) live at the repository root
+sys.path.append(str(Path(__file__).resolve().parents[4]))
+from voice_runtime.instrumentation import instrument_tools
+from voice_runtime.latency import track_latency
+from voice_runtime.models import prewarm_pipeline, turn_detector
+from voice_runtime.storage import open_store
+from voice_runtime.tool_output import page_tool_outputs
 
 from prompt import SYSTEM_PROMPT
 
@@ -28,6 +37,9 @@ logger = logging.getLogger("agent")
 
 load_dotenv(".env.local")
 
+# The wellness log is an append-only log in the backend dir (wellness_log.json with the JSON store)
+store = open_store(Path(__file__).resolve().parent.parent)
+
 # Notion configuration
 NOTION_TOKEN = os.getenv("NOTION_TOKEN")
 DATABASE_ID = os.getenv("NOTION_DATABASE_ID")
@@ -52,14 +64,13 @@ class Assistant(Agent):
         Use this at the start of a session to reference past moods/goals.
         
         Returns:
-            The full JSON content as a string, or 'No previous log found.' if file doesn't exist.
+            The log entries as JSON, newest first, or 'No previous log found.' if there are none.
         """
-        try:
-            with open('wellness_log.json', 'r') as f:
-                log = json.load(f)
-            return json.dumps(log, indent=2)
-        except FileNotFoundError:
+        log = await store.read("wellness_log")
+        if not log:
             return "No previous log found."
+        # Newest first, so the first page of a long log has the recent check-ins
+        return json.dumps(log[::-1], indent=2)
 
     @function_tool
     async def write_wellness_log(self, context: RunContext, mood: str = "unspecified", objectives: List[str] = None, summary: str = "Quick check-in completed.") -> str:
@@ -85,14 +96,7 @@ class Assistant(Agent):
         }
         logger.info(f"Saving wellness log entry: {entry}")
         try:
-            try:
-                with open('wellness_log.json', 'r') as f:
-                    log = json.load(f)
-            except FileNotFoundError:
-                log = []
-            log.append(entry)
-            with open('wellness_log.json', 'w') as f:
-                json.dump(log, f, indent=2)
+            await store.append("wellness_log", entry)
             logger.info("Wellness log saved successfully.")
             return "Log saved successfully."
         except Exception as e:
@@ -171,7 +175,7 @@ class Assistant(Agent):
 
 
 def prewarm(proc: JobProcess):
-    proc.userdata["vad"] = silero.VAD.load()
+    prewarm_pipeline(proc)
 
 
 async def entrypoint(ctx: JobContext):
@@ -200,7 +204,7 @@ async def entrypoint(ctx: JobContext):
             ),
         # VAD and turn detection are used to determine when the user is speaking and when the agent should respond
         # See more at https://docs.livekit.io/agents/build/turns
-        turn_detection=MultilingualModel(),
+        turn_detection=turn_detector(ctx.proc),
         vad=ctx.proc.userdata["vad"],
         # allow the LLM to generate a response while waiting for the end of turn
         # See more at https://docs.livekit.io/agents/build/audio/#preemptive-generation
@@ -222,13 +226,19 @@ async def entrypoint(ctx: JobContext):
 
     ctx.add_shutdown_callback(log_usage)
 
+    track_latency(ctx, session, agent="health-companion")
+
     # Start the session, which initializes the voice pipeline and warms up the models
+    agent = Assistant()
+    await instrument_tools(ctx, agent, name="health-companion")
+    await page_tool_outputs(agent)
+
     await session.start(
-        agent=Assistant(),
+        agent=agent,
         room=ctx.room,
         room_input_options=RoomInputOptions(
             # For telephony applications, use `BVCTelephony` for best results
-            noise_cancellation=noise_cancellation.BVC(),
+            noise_cancellation=ctx.proc.userdata["noise_cancellation"],
         ),
     )
 
@@ -1,4 +1,6 @@
 import logging
+import sys
+from pathlib import Path
 import json
 import os
 from typing import Annotated, Literal, Optional
@@ -17,8 +19,15 @@ from livekit.agents import (
     function_tool,
     RunContext,
 )
-from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
-from livekit.plugins.turn_detector.multilingual import MultilingualModel
+from livekit.plugins import murf, google, deepgram
+
+# Shared runtime helpers (voice_runtime/) live at the repository root
+sys.path.append(str(Path(__file__).resolve().parents[4]))
+from voice_runtime.context import attach_compactor
+from voice_runtime.instrumentation import instrument_tools
+from voice_runtime.latency import track_latency
+from voice_runtime.models import prewarm_pipeline, turn_detector
+from voice_runtime.tool_output import page_tool_outputs
 
 logger = logging.getLogger("agent")
 load_dotenv(".env.local")
@@ -149,57 +158,19 @@ async def evaluate_teaching(
     
     logger.info(f"Evaluating explanation for topic: {state.current_topic_id}")
     
-    evaluation_prompt = f"""
-    You are Ken, and you've just listened carefully to your student teach you about {state.current_topic_data['title']}.
-    Now it's time to give them thoughtful, constructive feedback that helps them grow.
-    
-    Reference Material (The Complete Truth): {state.current_topic_data['summary']}
-    What They Taught You: {user_explanation}
-    
-    EVALUATION FRAMEWORK:
-    
-    1. OVERALL IMPRESSION (Start here - be human!)
-       - What was your immediate reaction as a learner?
-       - Did their explanation make you genuinely understand the concept?
-       - What was the most memorable part of their teaching?
-    
-    2. SCORING (Be specific with examples):
-       - Accuracy Score (0-10): How factually correct was their explanation?
-         * Note any misconceptions or errors
-         * Highlight what they got exactly right
-       
-       - Clarity Score (0-10): Could a beginner follow their explanation?
-         * Comment on their structure and flow
-         * Point out any confusing moments
-       
-       - Completeness Score (0-10): Did they cover the essential elements?
-         * List what they included
-         * Mention important omissions
-    
-    3. STRENGTHS (Be specific and genuine):
-       - What teaching techniques did they use well?
-       - Which parts of their explanation were particularly effective?
-       - What would you steal from their approach if you were teaching this?
-    
-    4. GROWTH OPPORTUNITIES (Frame as next-level challenges):
-       - What one thing would make their explanation even more powerful?
-       - Are there any misconceptions to gently correct?
-       - What examples or analogies could enhance understanding?
-    
-    5. ENCOURAGING CLOSE:
-       - Acknowledge the courage it takes to teach
-       - Remind them that teaching reveals gaps we didn't know we had
-       - Suggest what to study next or how to deepen this understanding
-    
-    TONE GUIDELINES:
-    - Be genuinely impressed by good explanations
-    - Frame criticism as "here's how to level up" not "here's what you did wrong"
-    - Use phrases like "I noticed..." "One thing that could make this even better..."
-    - Remember: You're Ken - curious, supportive, and invested in their growth
-    - Balance rigor with warmth; precision with encouragement
-    
-    Deliver your feedback as if you're having a one-on-one conversation with someone you genuinely want to see succeed.
-    """
+    # Kept compact: this whole string goes back into the LLM context on every later turn
+    evaluation_prompt = f"""You are Ken. Your student just taught you {state.current_topic_data['title']}. Give warm, specific feedback.
+
+Reference: {state.current_topic_data['summary']}
+Their explanation: {user_explanation}
+
+1. Overall impression: your honest reaction as a learner and the most memorable part.
+2. Scores out of 10, each with an example: Accuracy (errors or misconceptions), Clarity (could a beginner follow it?), Completeness (what they covered or missed).
+3. Strengths: the teaching techniques that worked.
+4. Growth: the one change that would help most, any misconception to correct gently, an example or analogy to add.
+5. Close: thank them for teaching and suggest what to study next.
+
+Be encouraging and precise, frame criticism as leveling up ("One thing that could make this even better..."), and speak as in a one-on-one conversation."""
     
     return evaluation_prompt
 
@@ -291,7 +262,7 @@ Your ultimate goal: Create magical moments where complex concepts suddenly click
         )
 
 def prewarm(proc: JobProcess):
-    proc.userdata["vad"] = silero.VAD.load()
+    prewarm_pipeline(proc)
 
 async def entrypoint(ctx: JobContext):
     ctx.log_context_fields = {"room": ctx.room.name}
@@ -309,18 +280,27 @@ async def entrypoint(ctx: JobContext):
             style="Promo",
             text_pacing=True,
         ),
-        turn_detection=MultilingualModel(),
+        turn_detection=turn_detector(ctx.proc),
         vad=ctx.proc.userdata["vad"],
         userdata=userdata,
     )
     
     userdata.agent_session = session
     
+    track_latency(ctx, session, agent="teach-the-tutor")
+
+    # Long tutoring sessions: summarize older turns, keep the current topic and mode
+    attach_compactor(session, keep_tools=("select_topic", "set_learning_mode"))
+
+    agent = TutorAgent()
+    await instrument_tools(ctx, agent, name="teach-the-tutor")
+    await page_tool_outputs(agent)
+
     await session.start(
-        agent=TutorAgent(),
+        agent=agent,
         room=ctx.room,
         room_input_options=RoomInputOptions(
-            noise_cancellation=noise_cancellation.BVC()
+            noise_cancellation=ctx.proc.userdata["noise_cancellation"]
         ),
     )
     
@@ -1,4 +1,5 @@
 import logging
+import sys
 import json
 import random
 from pathlib import Path
@@ -19,12 +20,21 @@ from livekit.agents import (
     tokenize,
     function_tool,
 )
-from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
-from livekit.plugins.turn_detector.multilingual import MultilingualModel
+from livekit.plugins import murf, google, deepgram
+
+# Shared runtime helpers (voice_runtime/) live at the repository root
+sys.path.append(str(Path(__file__).resolve().parents[4]))
+from voice_runtime.instrumentation import instrument_tools
+from voice_runtime.latency import track_latency
+from voice_runtime.models import prewarm_pipeline, turn_detector
+from voice_runtime.storage import open_store
 
 logger = logging.getLogger("agent")
 load_dotenv(".env.local")
 
+# Leads and meetings are saved under the backend directory
+store = open_store(Path(__file__).resolve().parent.parent)
+
 
 # Global variable to store lead data across function calls
 lead_storage = {
@@ -195,13 +205,8 @@ async def book_meeting_slot(
     booked_meetings.append(meeting_record)
     lead_storage["meeting_booked"] = meeting_record
     
-    # Save to file immediately
-    meetings_dir = Path("meetings")
-    meetings_dir.mkdir(exist_ok=True)
-    
-    meeting_file = meetings_dir / f"{meeting_record['meeting_id']}.json"
-    with open(meeting_file, "w", encoding="utf-8") as f:
-        json.dump(meeting_record, f, indent=2)
+    # Save immediately
+    await store.put("meetings", meeting_record["meeting_id"], meeting_record)
     
     logger.info(f"Meeting booked: {meeting_record}")
     
@@ -223,23 +228,18 @@ async def end_conversation_summary():
     """Generate a summary when the user indicates they want to end the conversation. Call this when user says goodbye, thanks, done, that's all, etc."""
     global lead_storage, company_data_global, booked_meetings
     
-    # Save lead data to JSON file
-    output_dir = Path("leads")
-    output_dir.mkdir(exist_ok=True)
-    
+    # Save lead data
     timestamp = random.randint(1000, 9999)
-    filename = f"lead_{lead_storage.get('name', 'unknown').replace(' ', '_')}_{timestamp}.json"
-    filepath = output_dir / filename
+    lead_key = f"lead_{lead_storage.get('name', 'unknown').replace(' ', '_')}_{timestamp}"
     
     # Add metadata
     lead_export = lead_storage.copy()
     lead_export["company_contacted"] = "XpressBees"
     lead_export["conversation_ended_at"] = datetime.now().isoformat()
     
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(lead_export, f, indent=2)
+    await store.put("leads", lead_key, lead_export)
     
-    logger.info(f"Lead data saved to {filepath}")
+    logger.info(f"Lead data saved as {lead_key}")
     logger.info(f"Lead summary: {json.dumps(lead_storage, indent=2)}")
     
     # Generate verbal summary
@@ -378,8 +378,8 @@ Be genuinely curious about their business and challenges. Speak naturally like a
 
 
 def prewarm(proc: JobProcess):
-    """Prewarm VAD and load company data"""
-    proc.userdata["vad"] = silero.VAD.load()
+    """Prewarm the voice pipeline and load company data"""
+    prewarm_pipeline(proc)
     
     # Load company data using absolute path
     current_dir = Path(__file__).parent
@@ -394,7 +394,7 @@ def prewarm(proc: JobProcess):
     with open(details_path, "r", encoding="utf-8") as f:
         proc.userdata["company_data"] = json.load(f)
     
-    logger.info("Company data loaded and VAD prewarmed successfully")
+    logger.info("Company data loaded and pipeline prewarmed successfully")
 
 
 async def entrypoint(ctx: JobContext):
@@ -417,7 +417,7 @@ async def entrypoint(ctx: JobContext):
             tokenizer=tokenize.basic.SentenceTokenizer(min_sentence_len=2),
             text_pacing=True,
         ),
-        turn_detection=MultilingualModel(),
+        turn_detection=turn_detector(ctx.proc),
         vad=ctx.proc.userdata["vad"],
         preemptive_generation=True,
     )
@@ -435,14 +435,18 @@ async def entrypoint(ctx: JobContext):
 
     ctx.add_shutdown_callback(log_usage)
 
+    track_latency(ctx, session, agent="sdr-agent")
+
     # Create SDR agent with company data
     sdr_agent = XpressBeesSDR(company_data)
 
+    await instrument_tools(ctx, sdr_agent, name="sdr-agent")
+
     await session.start(
         agent=sdr_agent,
         room=ctx.room,
         room_input_options=RoomInputOptions(
-            noise_cancellation=noise_cancellation.BVC(),
+            noise_cancellation=ctx.proc.userdata["noise_cancellation"],
         ),
     )
 
@@ -1,4 +1,6 @@
 import logging
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
 from livekit.agents import (
     Agent,
@@ -14,8 +16,14 @@ from livekit.agents import (
     function_tool,
     RunContext
 )
-from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
-from livekit.plugins.turn_detector.multilingual import MultilingualModel
+from livekit.plugins import murf, google, deepgram
+
+# Shared runtime helpers (voice_runtime/) live at the repository root
+sys.path.append(str(Path(__file__).resolve().parents[4]))
+from voice_runtime.instrumentation import instrument_tools
+from voice_runtime.latency import track_latency
+from voice_runtime.models import prewarm_pipeline, turn_detector
+from voice_runtime.tts_cache import CachedTTS, say_cached
 from database import FraudDatabase
 
 logger = logging.getLogger("agent")
@@ -24,6 +32,9 @@ load_dotenv(".env.local")
 # Initialize database
 fraud_db = FraudDatabase()
 
+# Spoken as soon as the call connects; identical on every call, so it comes from the TTS cache
+GREETING = "Namaste! This is Rajesh Kumar from Bharat Secure Bank Fraud Prevention Department. We have detected a suspicious transaction on your account which requires immediate verification. This call is being recorded for quality and security purposes."
+
 class BharatFraudAlertAssistant(Agent):
     def __init__(self) -> None:
         # Store conversation state
@@ -38,7 +49,8 @@ class BharatFraudAlertAssistant(Agent):
 Your mission is to investigate suspicious transactions and protect customers. Follow this EXACT flow:
 
 **STAGE 1 - GREETING:**
-Say: "Namaste! This is Rajesh Kumar from Bharat Secure Bank Fraud Prevention Department. We have detected a suspicious transaction on your account which requires immediate verification. This call is being recorded for quality and security purposes."
+This greeting is played automatically when the call connects, do not repeat it:
+"Namaste! This is Rajesh Kumar from Bharat Secure Bank Fraud Prevention Department. We have detected a suspicious transaction on your account which requires immediate verification. This call is being recorded for quality and security purposes."
 
 **STAGE 2 - USERNAME COLLECTION:**
 Ask: "May I please have your full name as registered with the bank?"
@@ -86,6 +98,9 @@ Say: "Thank you for your time and cooperation sir. Have a great day ahead!"
 - Maintain professional but friendly tone throughout""",
         )
     
+    async def on_enter(self) -> None:
+        await say_cached(self.session, GREETING)
+
     @function_tool
     async def get_fraud_case(self, context: RunContext, username: str):
         """Retrieve a fraud case from the database by customer name.
@@ -245,9 +260,9 @@ Proceed to verification stage."""
 
 
 def prewarm(proc: JobProcess):
-    """Prewarm the VAD model for faster startup"""
-    proc.userdata["vad"] = silero.VAD.load()
-    logger.info("VAD model prewarmed")
+    """Prewarm the voice pipeline models for faster startup"""
+    prewarm_pipeline(proc)
+    logger.info("Voice pipeline prewarmed")
 
 
 async def entrypoint(ctx: JobContext):
@@ -289,17 +304,17 @@ async def entrypoint(ctx: JobContext):
         ),
         
         # Text-to-speech with professional voice
-        tts=murf.TTS(
+        tts=CachedTTS(murf.TTS(
             voice="Ronnie",
             style="Conversation",
             tokenizer=tokenize.basic.SentenceTokenizer(min_sentence_len=2),
             text_pacing=True,
             # Phone calls benefit from slightly slower, clearer speech
             speed=0.95 if is_phone_call else 1.0,
-        ),
+        )),
         
         # Turn detection for natural conversation flow
-        turn_detection=MultilingualModel(),
+        turn_detection=turn_detector(ctx.proc),
         vad=ctx.proc.userdata["vad"],
         
         # Enable preemptive generation for faster responses
@@ -319,6 +334,8 @@ async def entrypoint(ctx: JobContext):
         logger.info(f"Session Usage Summary: {summary}")
     
     ctx.add_shutdown_callback(log_usage)
+
+    track_latency(ctx, session, agent="fraud-alert-agent")
     
     # Start the agent session
     logger.info("Initializing voice pipeline...")
@@ -356,12 +373,14 @@ async def entrypoint(ctx: JobContext):
     
     ctx.add_shutdown_callback(cleanup_on_disconnect)
     
+    await instrument_tools(ctx, fraud_agent, name="fraud-alert-agent")
+
     await session.start(
         agent=fraud_agent,
         room=ctx.room,
         room_input_options=RoomInputOptions(
             # Noise cancellation for clear audio (important for phone calls)
-            noise_cancellation=noise_cancellation.BVC(),
+            noise_cancellation=ctx.proc.userdata["noise_cancellation"],
         ),
     )
     
@@ -1,10 +1,13 @@
 import sqlite3
 import json
 from datetime import datetime
+from pathlib import Path
 from typing import Optional, Dict
 
+DEFAULT_DB_PATH = str(Path(__file__).resolve().parent.parent / "fraud_cases.db")
+
 class FraudDatabase:
-    def __init__(self, db_path: str = "fraud_cases.db"):
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
         self.db_path = db_path
         self.init_database()
     
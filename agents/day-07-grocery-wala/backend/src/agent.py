@@ -1,7 +1,12 @@
+import asyncio
 import logging
+from pathlib import Path
 import json
 import os
+from typing import Dict, List, Optional, Set
 from dotenv import load_dotenv
+from pydantic import BaseModel, Field
+from livekit import rtc
 from livekit.agents import (
     Agent,
     AgentSession,
@@ -16,21 +21,40 @@ from livekit.agents import (
     function_tool,
     RunContext
 )
-from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
-from livekit.plugins.turn_detector.multilingual import MultilingualModel
+from livekit.plugins import murf, google, deepgram
 
 # Import our utility classes
 import sys
 sys.path.append('.')
+# Shared runtime helpers (voice_runtime/) live at the repository root
+sys.path.append(str(Path(__file__).resolve().parents[4]))
+from voice_runtime.instrumentation import instrument_tools
+from voice_runtime.latency import track_latency
+from voice_runtime.models import prewarm_pipeline, turn_detector
+from voice_runtime.storage import open_store
+from voice_runtime.tool_output import page_tool_outputs
 from utils.cart_manager import CartManager
+from utils.catalog import SharedCatalog, open_catalog
 from utils.order_manager import OrderManager
 
 logger = logging.getLogger("agent")
 load_dotenv(".env.local")
 
+# Data channel topic the frontend's cart panel listens on
+CART_TOPIC = "grocery-cart"
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CATALOG_PATH = os.path.join(BASE_DIR, 'catalog.json')
+
+
+class CartEntry(BaseModel):
+    """One item of a multi-item request"""
+    item_name: str = Field(description='Name of the grocery item, e.g. "milk" or "onions"')
+    quantity: int = Field(default=1, description="How many units to add")
+
 
 class GroceryWalaAssistant(Agent):
-    def __init__(self) -> None:
+    def __init__(self, cart_id: Optional[str] = None, room: Optional[rtc.Room] = None, catalog: Optional[SharedCatalog] = None) -> None:
         super().__init__(
             instructions="""You are Priya, a friendly and helpful voice assistant for GroceryWala - India's favorite online grocery store. 
             
@@ -90,27 +114,57 @@ Remember: You're having a natural voice conversation, so keep it flowing and con
         # Initialize cart and order managers
         self.cart_manager = None
         self.order_manager = None
-        self.recipes = None
+        # Catalog, recipes and indexes, shared by every session in the process
+        self.catalog = catalog
+        
+        # The cart belongs to this session; changes are pushed to the room
+        self.cart_id = cart_id
+        self.room = room
+        self._publish_tasks: Set[asyncio.Task] = set()
     
     def _ensure_initialized(self):
         """Lazy initialization of managers"""
         if self.cart_manager is None:
-            # Get the directory where agent.py is located
-            base_dir = os.path.dirname(os.path.abspath(__file__))
-            
-            self.cart_manager = CartManager(os.path.join(base_dir, 'catalog.json'))
-            self.order_manager = OrderManager(os.path.join(base_dir, 'orders'))
+            # Nothing is parsed or indexed here: prewarm loaded the catalog for the process
+            if self.catalog is None:
+                self.catalog = open_catalog(CATALOG_PATH)
             
-            # Load recipes
-            recipes_path = os.path.join(base_dir, 'recipes.json')
-            with open(recipes_path, 'r', encoding='utf-8') as f:
-                self.recipes = json.load(f)['recipes']
+            self.cart_manager = CartManager(self.catalog, cart_id=self.cart_id)
+            if self.room is not None:
+                self.cart_manager.listeners.append(self._publish_cart_delta)
+            self.order_manager = OrderManager(open_store(BASE_DIR))
+    
+    def _publish_cart_delta(self, delta: Dict):
+        """Send a cart delta to the frontend over the data channel"""
+        if not self.room.isconnected():
+            return
+        
+        async def publish():
+            try:
+                payload = json.dumps(delta, ensure_ascii=False)
+                await self.room.local_participant.publish_data(payload, reliable=True, topic=CART_TOPIC)
+            except Exception as e:
+                # The frontend recovers from a missed delta by refetching the snapshot
+                logger.warning(f"Could not publish cart delta {delta['version']}: {e}")
+        
+        task = asyncio.create_task(publish())
+        self._publish_tasks.add(task)
+        task.add_done_callback(self._publish_tasks.discard)
+    
+    async def on_exit(self) -> None:
+        # Don't leave a debounced cart change unsent, then drop the session's snapshot
+        # once the export thread has written it, so it isn't recreated afterwards
+        if self.cart_manager is not None:
+            self.cart_manager.flush()
+            await self.cart_manager.exported()
+            self.cart_manager.discard_export()
     
     @function_tool
     async def add_item_to_cart(self, context: RunContext, item_name: str, quantity: int = 1):
         """Add a specific grocery item to the cart.
         
         Use this when customer asks to add a specific item like "add milk" or "I need 2 packets of atta".
+        If they name several items at once, use add_items_to_cart instead.
         
         Args:
             item_name: Name of the grocery item to add (e.g., "milk", "basmati rice", "paneer")
@@ -128,6 +182,29 @@ Remember: You're having a natural voice conversation, so keep it flowing and con
         else:
             return result['message']
     
+    @function_tool
+    async def add_items_to_cart(self, context: RunContext, items: List[CartEntry]):
+        """Add several grocery items to the cart at once.
+        
+        Use this whenever the customer names more than one item in a sentence, like
+        "add two milk, one atta, a kilo of onions and paneer" - one call for all of them.
+        
+        Args:
+            items: Every item the customer asked for, each with its quantity
+        """
+        self._ensure_initialized()
+        logger.info(f"Adding {len(items)} items to cart")
+        
+        result = self.cart_manager.add_items([(entry.item_name, entry.quantity) for entry in items])
+        
+        parts = []
+        if result['added']:
+            added = ", ".join(f"{r['quantity_added']} {r['item']['name']} ({r['item']['unit']})" for r in result['added'])
+            parts.append(f"Added to your cart: {added}. Cart total now ₹{result['total']} for {result['item_count']} items.")
+        for failure in result['failed']:
+            parts.append(failure['message'])
+        return " ".join(parts)
+    
     @function_tool
     async def add_recipe_ingredients(self, context: RunContext, recipe_name: str):
         """Add all ingredients needed for a specific dish or recipe.
@@ -141,26 +218,7 @@ Remember: You're having a natural voice conversation, so keep it flowing and con
         self._ensure_initialized()
         logger.info(f"Adding ingredients for: {recipe_name}")
         
-        # Normalize recipe name for fuzzy matching
-        def normalize_recipe(name: str) -> str:
-            normalized = name.lower().strip()
-            # Common variations
-            normalized = normalized.replace('chhese', 'cheese').replace('chees', 'cheese')
-            normalized = normalized.replace('on', 'corn').replace('con', 'corn')
-            normalized = normalized.replace('panner', 'paneer').replace('panir', 'paneer')
-            normalized = normalized.replace('daal', 'dal').replace('chwal', 'chawal')
-            normalized = normalized.replace('aloo', 'alu').replace('alu', 'aloo')
-            return normalized
-        
-        # Find matching recipe with fuzzy matching
-        recipe_name_normalized = normalize_recipe(recipe_name)
-        matching_recipe = None
-        
-        for recipe in self.recipes:
-            recipe_normalized = normalize_recipe(recipe['name'])
-            if recipe_name_normalized in recipe_normalized or recipe_normalized in recipe_name_normalized:
-                matching_recipe = recipe
-                break
+        matching_recipe = self.catalog.current.find_recipe(recipe_name)
         
         if not matching_recipe:
             return f"Sorry, I don't have a recipe for {recipe_name} in my system. You can tell me specific items you need and I'll add them."
@@ -169,12 +227,14 @@ Remember: You're having a natural voice conversation, so keep it flowing and con
         added_items = []
         failed_items = []
         
-        for item_id in matching_recipe['items']:
-            result = self.cart_manager.add_item(item_id, 1)
-            if result['success']:
-                added_items.append(result['item']['name'])
-            else:
-                failed_items.append(item_id)
+        # One cart export for the whole recipe, not one per ingredient
+        with self.cart_manager.batch():
+            for item_id in matching_recipe['items']:
+                result = self.cart_manager.add_item(item_id, 1)
+                if result['success']:
+                    added_items.append(result['item']['name'])
+                else:
+                    failed_items.append(item_id)
         
         response = f"Perfect! For {matching_recipe['name']}, I've added "
         response += ", ".join(added_items)
@@ -269,7 +329,7 @@ Remember: You're having a natural voice conversation, so keep it flowing and con
         }
         
         # Create order with payment method
-        order = self.order_manager.create_order(cart_data, customer_info, payment_method)
+        order = await self.order_manager.create_order(cart_data, customer_info, payment_method)
         
         # Clear cart after order
         self.cart_manager.clear_cart()
@@ -291,6 +351,25 @@ Remember: You're having a natural voice conversation, so keep it flowing and con
         
         return response
     
+    @function_tool
+    async def get_last_order(self, context: RunContext, phone: str = None, customer_name: str = None):
+        """Look up the customer's most recent order.
+        
+        Use when customer asks "what did I order last time?" or wants to repeat a previous order.
+        Ask for their phone number if you don't have it; fall back to their name.
+        
+        Args:
+            phone: Customer's phone number
+            customer_name: Customer's name, if no phone number is given
+        """
+        self._ensure_initialized()
+        logger.info(f"Looking up last order for phone={phone} name={customer_name}")
+        
+        orders = await self.order_manager.customer_orders(phone=phone, name=customer_name, limit=1)
+        if not orders:
+            return "I couldn't find any previous orders for you."
+        return self.order_manager.get_order_summary(orders[0])
+    
     @function_tool
     async def search_items(self, context: RunContext, search_query: str):
         """Search for items in the catalog by name or category.
@@ -303,33 +382,25 @@ Remember: You're having a natural voice conversation, so keep it flowing and con
         self._ensure_initialized()
         logger.info(f"Searching for: {search_query}")
         
-        search_lower = search_query.lower()
-        found_items = []
-        
-        # Search through all categories and items
-        for category_key, category_data in self.cart_manager.catalog['categories'].items():
-            # Check if searching for category
-            if search_lower in category_data['name'].lower() or search_lower in category_key:
-                # Return all items in this category
-                for item in category_data['items']:
-                    found_items.append(f"{item['name']} ({item['brand']}, {item['unit']}) - ₹{item['price']}")
-            else:
-                # Search individual items
-                for item in category_data['items']:
-                    if search_lower in item['name'].lower() or search_lower in item.get('tags', []):
-                        found_items.append(f"{item['name']} ({item['brand']}, {item['unit']}) - ₹{item['price']}")
-        
-        if found_items:
-            response = f"Here's what I found: {', '.join(found_items[:5])}"
-            if len(found_items) > 5:
-                response += f" and {len(found_items) - 5} more items"
+        # Ranked lookup in the catalog index; only the items read out are formatted
+        top_items, match_count = self.cart_manager.search_index.search(search_query, limit=5)
+        
+        if top_items:
+            found_items = [f"{item['name']} ({item['brand']}, {item['unit']}) - ₹{item['price']}" for item in top_items]
+            response = f"Here's what I found: {', '.join(found_items)}"
+            if match_count > len(top_items):
+                response += f" and {match_count - len(top_items)} more items"
             return response
         else:
             return f"Sorry, I couldn't find anything matching '{search_query}' in our catalog."
 
 
 def prewarm(proc: JobProcess):
-    proc.userdata["vad"] = silero.VAD.load()
+    prewarm_pipeline(proc)
+    # Parse and index the catalog once per process, and pick up edits to catalog.json
+    catalog = open_catalog(CATALOG_PATH)
+    catalog.watch()
+    proc.userdata["grocery_catalog"] = catalog
 
 
 async def entrypoint(ctx: JobContext):
@@ -348,7 +419,7 @@ async def entrypoint(ctx: JobContext):
             tokenizer=tokenize.basic.SentenceTokenizer(min_sentence_len=2),
             text_pacing=True
         ),
-        turn_detection=MultilingualModel(),
+        turn_detection=turn_detector(ctx.proc),
         vad=ctx.proc.userdata["vad"],
         preemptive_generation=True,
     )
@@ -367,12 +438,19 @@ async def entrypoint(ctx: JobContext):
 
     ctx.add_shutdown_callback(log_usage)
 
+    track_latency(ctx, session, agent="grocery-wala")
+
     # Start the session
+    # One cart per room, kept in sync with the frontend over the data channel
+    agent = GroceryWalaAssistant(cart_id=ctx.room.name, room=ctx.room, catalog=ctx.proc.userdata.get("grocery_catalog"))
+    await instrument_tools(ctx, agent, name="grocery-wala")
+    await page_tool_outputs(agent)
+
     await session.start(
-        agent=GroceryWalaAssistant(),
+        agent=agent,
         room=ctx.room,
         room_input_options=RoomInputOptions(
-            noise_cancellation=noise_cancellation.BVC(),
+            noise_cancellation=ctx.proc.userdata["noise_cancellation"],
         ),
     )
 
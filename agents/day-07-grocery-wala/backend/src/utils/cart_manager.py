@@ -1,101 +1,182 @@
-import json
+import asyncio
+import logging
 import os
-from typing import Dict, List, Optional
+import re
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from voice_runtime.storage import write_json_atomic
+from utils.catalog import SharedCatalog, open_catalog
+from utils.catalog_search import CatalogSearch
+from utils.product_matcher import MIN_SUGGESTION, Match, ProductMatcher
+from utils.text_normalizer import TextNormalizer
+
+logger = logging.getLogger("agent")
+
+# Cart exports for the UI are coalesced: at most one write per interval
+EXPORT_DEBOUNCE_S = 0.25
+
+# With an event loop running, exports are written on this one thread, in the
+# order they were made, so the loop never waits on the temp file, fsync and rename
+_export_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cart-export")
+
+class CartLine:
+    """One cart line: the catalog item, its quantity and the line's total price"""
+    __slots__ = ('item', 'quantity', 'line_total')
+    
+    def __init__(self, item: Dict, quantity: int):
+        # The catalog's own item dict, shared rather than copied per line
+        self.item = item
+        self.quantity = quantity
+        self.line_total = item['price'] * quantity
+    
+    def to_dict(self) -> Dict:
+        return {**self.item, 'quantity': self.quantity}
 
 class CartManager:
-    def __init__(self, catalog_path: str = "catalog.json"):
-        with open(catalog_path, 'r', encoding='utf-8') as f:
-            self.catalog = json.load(f)
-        self.cart: Dict[str, Dict] = {}
-        self._build_item_index()
-        
-        # Ensure current_cart.json exists
-        self._ensure_cart_file_exists()
-    
-    def _build_item_index(self):
-        """Build a quick lookup index for items by ID and name"""
-        self.item_index = {}
-        for category_key, category_data in self.catalog['categories'].items():
-            for item in category_data['items']:
-                self.item_index[item['id']] = {
-                    **item,
-                    'category': category_key
-                }
-                # Also index by lowercase name for flexible matching
-                self.item_index[item['name'].lower()] = {
-                    **item,
-                    'category': category_key
-                }
-    
-    def _normalize_text(self, text: str) -> str:
-        """Normalize text for fuzzy matching - remove common variations"""
-        normalized = text.lower().strip()
-        # Remove common filler words and variations
-        normalized = normalized.replace('on', 'corn').replace('con', 'corn')
-        # Normalize double letters
-        normalized = normalized.replace('chhese', 'cheese').replace('chees', 'cheese')
-        normalized = normalized.replace('panner', 'paneer').replace('panir', 'paneer').replace('paner', 'paneer')
-        normalized = normalized.replace('daal', 'dal').replace('chwal', 'chawal').replace('chawl', 'chawal')
-        normalized = normalized.replace('basmatti', 'basmati').replace('basmti', 'basmati').replace('rise', 'rice')
-        normalized = normalized.replace('aata', 'atta').replace('ata', 'atta')
-        return normalized
+    def __init__(self, catalog: Union[str, SharedCatalog] = "catalog.json", cart_id: Optional[str] = None):
+        # The catalog and its indexes are shared by every session in the
+        # process (see utils/catalog.py); only the cart belongs to this one
+        self.shared_catalog = catalog if isinstance(catalog, SharedCatalog) else open_catalog(catalog)
+        self.cart: Dict[str, CartLine] = {}
+        # Kept up to date by every change, so reading them never walks the cart
+        self.total = 0
+        self.item_count = 0
+        
+        # Each session's cart is exported to orders/carts/<cart_id>.json;
+        # without a cart_id it is the single orders/current_cart.json
+        self.cart_id = cart_id
+        
+        # Write-behind state for the cart export
+        self.export_debounce = EXPORT_DEBOUNCE_S
+        self._dirty = False
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._batch_depth = 0
+        # The last export handed to the writer thread
+        self._pending_export: Optional[asyncio.Future] = None
+        
+        # Changes since the last flush, sent to listeners as one delta
+        self.listeners: List[Callable[[Dict], None]] = []
+        self.version = 0
+        self._changes: List[Dict] = []
+        # Versions restart at 0 with every CartManager, e.g. when the agent
+        # restarts in the same room; the epoch tells the frontend they did
+        self.epoch = uuid.uuid4().hex[:12]
+        
+        # A new cart starts empty, replacing any earlier session's export for this room
+        self._export()
+    
+    # Read-only views of the current catalog, which may be hot-reloaded between calls
+    @property
+    def catalog(self) -> Dict:
+        return self.shared_catalog.current.data
+    
+    @property
+    def normalizer(self) -> TextNormalizer:
+        return self.shared_catalog.current.normalizer
+    
+    @property
+    def matcher(self) -> ProductMatcher:
+        return self.shared_catalog.current.matcher
+    
+    @property
+    def search_index(self) -> CatalogSearch:
+        return self.shared_catalog.current.search_index
     
     def find_item(self, query: str) -> Optional[Dict]:
         """Find item by ID or name with fuzzy matching for pronunciation variations"""
-        # Try exact ID match first
-        if query in self.item_index:
-            return self.item_index[query]
-        
-        # Try lowercase name match
-        if query.lower() in self.item_index:
-            return self.item_index[query.lower()]
-        
-        # Try normalized fuzzy matching
-        query_normalized = self._normalize_text(query)
-        for key, item in self.item_index.items():
-            if isinstance(key, str):
-                key_normalized = self._normalize_text(key)
-                if query_normalized == key_normalized or query_normalized in key_normalized:
-                    return item
-        
-        # Try partial matching on original query
-        query_lower = query.lower()
-        for key, item in self.item_index.items():
-            if isinstance(key, str) and query_lower in key.lower():
-                return item
-        
-        return None
+        return self.shared_catalog.current.find_item(query)
     
-    def add_item(self, item_identifier: str, quantity: int = 1) -> Dict:
-        """Add item to cart. Returns dict with success status and message"""
+    def find_candidates(self, query: str, limit: int = 3, min_confidence: float = MIN_SUGGESTION) -> List[Match]:
+        """Ranked candidate items for a query, with confidence scores"""
+        return self.shared_catalog.current.find_candidates(query, limit, min_confidence)
+    
+    def _not_found_message(self, item_identifier: str, message: str) -> str:
+        """Add close candidates to a not-found message so the customer can pick one"""
+        candidates = self.find_candidates(item_identifier)
+        if candidates:
+            names = " or ".join(match.item['name'] for match in candidates)
+            message += f". Did you mean {names}?"
+        return message
+    
+    def _resolve(self, item_identifier: str, quantity: int) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """The catalog item to add, or a failure result saying why it can't be added"""
         item = self.find_item(item_identifier)
         
         if not item:
-            return {
+            return None, {
+                "success": False,
+                "message": self._not_found_message(item_identifier, f"Sorry, I couldn't find '{item_identifier}' in our catalog")
+            }
+        
+        if quantity <= 0:
+            return None, {
                 "success": False,
-                "message": f"Sorry, I couldn't find '{item_identifier}' in our catalog"
+                "message": f"Quantity for {item['name']} must be at least 1"
             }
         
+        return item, None
+    
+    def add_item(self, item_identifier: str, quantity: int = 1) -> Dict:
+        """Add item to cart. Returns dict with success status and message"""
+        item, failure = self._resolve(item_identifier, quantity)
+        if failure:
+            return failure
+        return self._add(item, quantity)
+    
+    def add_items(self, entries: List[Tuple[str, int]]) -> Dict:
+        """Add several items in one go. Returns the added and the failed items.
+        
+        Every entry is resolved before the cart is touched, then the ones that
+        resolved are added as a single change: one export and one delta. An
+        entry that doesn't resolve is reported in 'failed' without holding up
+        the others.
+        """
+        resolved = []
+        failed = []
+        for item_identifier, quantity in entries:
+            item, failure = self._resolve(item_identifier, quantity)
+            if failure:
+                failed.append({"item": item_identifier, **failure})
+            else:
+                resolved.append((item, quantity))
+        
+        with self.batch():
+            added = [self._add(item, quantity) for item, quantity in resolved]
+        
+        return {
+            "success": bool(added),
+            "added": added,
+            "failed": failed,
+            "total": self.total,
+            "item_count": self.item_count
+        }
+    
+    def _add(self, item: Dict, quantity: int) -> Dict:
         item_id = item['id']
         
         if item_id in self.cart:
-            self.cart[item_id]['quantity'] += quantity
+            self._set_quantity(item_id, self.cart[item_id].quantity + quantity)
             action = "updated"
+            self._changes.append({"op": "qty", "id": item_id, "quantity": self.cart[item_id].quantity})
         else:
-            self.cart[item_id] = {
-                **item,
-                'quantity': quantity
-            }
+            self.cart[item_id] = CartLine(item, 0)
+            self._set_quantity(item_id, quantity)
             action = "added"
+            self._changes.append({"op": "add", "item": self.cart[item_id].to_dict()})
         
-        # Export cart to JSON for UI
-        self.export_to_json()
+        # Export cart to JSON for UI, coalesced with other changes
+        self._mark_dirty()
         
         return {
             "success": True,
             "action": action,
             "item": item,
-            "quantity": self.cart[item_id]['quantity'],
+            "quantity": self.cart[item_id].quantity,
+            "quantity_added": quantity,
             "message": f"{action.capitalize()} {quantity} {item['name']} to cart"
         }
     
@@ -106,7 +187,7 @@ class CartManager:
         if not item:
             return {
                 "success": False,
-                "message": f"Item '{item_identifier}' not found"
+                "message": self._not_found_message(item_identifier, f"Item '{item_identifier}' not found")
             }
         
         item_id = item['id']
@@ -117,14 +198,15 @@ class CartManager:
                 "message": f"{item['name']} is not in your cart"
             }
         
-        removed_item = self.cart.pop(item_id)
+        self._set_quantity(item_id, 0)
+        self._changes.append({"op": "remove", "id": item_id})
         
-        # Export cart to JSON for UI
-        self.export_to_json()
+        # Export cart to JSON for UI, coalesced with other changes
+        self._mark_dirty()
         
         return {
             "success": True,
-            "message": f"Removed {removed_item['name']} from cart"
+            "message": f"Removed {item['name']} from cart"
         }
     
     def update_quantity(self, item_identifier: str, quantity: int) -> Dict:
@@ -137,7 +219,7 @@ class CartManager:
         if not item:
             return {
                 "success": False,
-                "message": f"Item '{item_identifier}' not found"
+                "message": self._not_found_message(item_identifier, f"Item '{item_identifier}' not found")
             }
         
         item_id = item['id']
@@ -145,52 +227,67 @@ class CartManager:
         if item_id not in self.cart:
             return self.add_item(item_identifier, quantity)
         
-        self.cart[item_id]['quantity'] = quantity
+        self._set_quantity(item_id, quantity)
+        self._changes.append({"op": "qty", "id": item_id, "quantity": quantity})
         
-        # Export cart to JSON for UI
-        self.export_to_json()
+        # Export cart to JSON for UI, coalesced with other changes
+        self._mark_dirty()
         
         return {
             "success": True,
             "message": f"Updated {item['name']} quantity to {quantity}"
         }
     
+    def _set_quantity(self, item_id: str, quantity: int):
+        """Set a line's quantity (0 removes the line) and adjust the cart totals by the difference"""
+        line = self.cart[item_id]
+        self.total -= line.line_total
+        self.item_count -= line.quantity
+        if quantity <= 0:
+            del self.cart[item_id]
+            return
+        line.quantity = quantity
+        line.line_total = line.item['price'] * quantity
+        self.total += line.line_total
+        self.item_count += quantity
+    
     def get_cart_summary(self) -> str:
         """Get a formatted string of cart contents"""
         if not self.cart:
             return "Your cart is empty"
         
         summary_lines = ["Your cart:"]
-        total = 0
         
-        for item_id, cart_item in self.cart.items():
-            item_total = cart_item['price'] * cart_item['quantity']
-            total += item_total
+        for line in self.cart.values():
             summary_lines.append(
-                f"- {cart_item['quantity']}x {cart_item['name']} ({cart_item['unit']}) - ₹{item_total}"
+                f"- {line.quantity}x {line.item['name']} ({line.item['unit']}) - ₹{line.line_total}"
             )
         
-        summary_lines.append(f"\nTotal: ₹{total}")
+        summary_lines.append(f"\nTotal: ₹{self.total}")
         return "\n".join(summary_lines)
     
     def get_cart_data(self) -> Dict:
         """Get cart data as a dictionary"""
         return {
-            "items": list(self.cart.values()),
-            "total": self.calculate_total(),
-            "item_count": sum(item['quantity'] for item in self.cart.values())
+            "items": [line.to_dict() for line in self.cart.values()],
+            "total": self.total,
+            "item_count": self.item_count
         }
     
     def calculate_total(self) -> float:
         """Calculate total cart value"""
-        return sum(item['price'] * item['quantity'] for item in self.cart.values())
+        return self.total
     
     def clear_cart(self):
         """Empty the cart"""
         self.cart = {}
+        self.total = 0
+        self.item_count = 0
+        # Earlier changes are moot once the cart is emptied
+        self._changes = [{"op": "clear"}]
         
-        # Export empty cart to JSON for UI
-        self.export_to_json()
+        # Export cart to JSON for UI, coalesced with other changes
+        self._mark_dirty()
     
     def is_empty(self) -> bool:
         """Check if cart is empty"""
@@ -198,32 +295,116 @@ class CartManager:
     
     def get_item_count(self) -> int:
         """Get total number of items in cart"""
-        return sum(item['quantity'] for item in self.cart.values())
+        return self.item_count
+    
+    def _mark_dirty(self):
+        """Schedule a coalesced export of the cart for the UI"""
+        self._dirty = True
+        if self._batch_depth:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (scripts): write straight away
+            self.flush()
+            return
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.export_debounce, self.flush)
     
-    def _ensure_cart_file_exists(self):
-        """Ensure current_cart.json exists with empty cart data"""
+    @contextmanager
+    def batch(self):
+        """Apply several cart changes with a single export at the end"""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.flush()
+    
+    def flush(self):
+        """Export the cart now and send its delta if it changed since the last flush.
+
+        With an event loop running the file is written on the export thread;
+        await exported() to wait for it.
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._dirty:
+            return
+        self._dirty = False
+        self.version += 1
+        changes, self._changes = self._changes, []
+        self._export()
+        
+        delta = {
+            "type": "cart_delta",
+            "cart_id": self.cart_id,
+            "epoch": self.epoch,
+            "version": self.version,
+            "changes": changes,
+            "total": self.total,
+            "item_count": self.item_count
+        }
+        for listener in self.listeners:
+            listener(delta)
+    
+    def _default_export_path(self) -> str:
         orders_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'orders')
-        os.makedirs(orders_dir, exist_ok=True)
-        filepath = os.path.join(orders_dir, 'current_cart.json')
-        
-        if not os.path.exists(filepath):
-            # Create empty cart file
-            empty_cart = {
-                "items": [],
-                "total": 0,
-                "item_count": 0
-            }
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(empty_cart, f, indent=2, ensure_ascii=False)
+        if self.cart_id is None:
+            return os.path.join(orders_dir, 'current_cart.json')
+        # Same file name rule as the frontend's /api/cart/current route
+        safe_id = re.sub(r'[^A-Za-z0-9_.-]', '_', self.cart_id)
+        return os.path.join(orders_dir, 'carts', f'{safe_id}.json')
+    
+    def discard_export(self):
+        """Delete this session's cart export once the session is over"""
+        if self.cart_id is None:
+            return
+        try:
+            os.remove(self._default_export_path())
+        except FileNotFoundError:
+            pass
+    
+    def _export_data(self) -> Dict:
+        return {**self.get_cart_data(), "epoch": self.epoch, "version": self.version}
+    
+    def _export(self):
+        """Export the cart to its default path, off the event loop if one is running"""
+        path = Path(self._default_export_path())
+        # Taken now, on the caller's thread, so the writer never reads a cart being changed
+        data = self._export_data()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            write_json_atomic(path, data)
+            return
+        self._pending_export = loop.run_in_executor(_export_writer, write_json_atomic, path, data)
+        self._pending_export.add_done_callback(self._export_done)
+    
+    @staticmethod
+    def _export_done(future: asyncio.Future):
+        if not future.cancelled() and future.exception() is not None:
+            # The frontend keeps the last snapshot and still gets the deltas
+            logger.warning(f"Could not export the cart: {future.exception()}")
+    
+    async def exported(self):
+        """Wait until every export handed to the writer thread is on disk"""
+        if self._pending_export is not None:
+            # The writer runs exports in order, so the last one finishing means all have;
+            # a failed one was already logged
+            await asyncio.wait([self._pending_export])
     
     def export_to_json(self, filepath: str = None):
-        """Export current cart to JSON file for UI to read"""
+        """Export current cart to JSON file for UI to read.
+        
+        The file is replaced atomically, so the frontend's /api/cart/current
+        never reads a half-written cart. Its epoch and version are those of the
+        last delta it includes, so a late joiner knows which deltas to apply on top.
+        """
         if filepath is None:
             # Default to orders directory
-            orders_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'orders')
-            os.makedirs(orders_dir, exist_ok=True)
-            filepath = os.path.join(orders_dir, 'current_cart.json')
+            filepath = self._default_export_path()
         
-        cart_data = self.get_cart_data()
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(cart_data, f, indent=2, ensure_ascii=False)
\ No newline at end of file
+        write_json_atomic(Path(filepath), self._export_data())
@@ -0,0 +1,160 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from utils.catalog_search import CatalogSearch
+from utils.product_matcher import MIN_SUGGESTION, Match, ProductMatcher
+from utils.text_normalizer import TextNormalizer
+
+logger = logging.getLogger("agent")
+
+# How often the watcher checks catalog.json, recipes.json and spelling_variants.json for changes
+RELOAD_INTERVAL_S = 2.0
+
+
+class Catalog:
+    """The catalog, recipes and their lookup indexes.
+
+    Built in one go and never modified afterwards, so every session in a
+    process can read the same instance without locks. recipes.json and
+    spelling_variants.json are read from the catalog's directory unless
+    given explicitly.
+    """
+
+    def __init__(self, catalog_path: str, recipes_path: Optional[str] = None, variants_path: Optional[str] = None):
+        base_dir = os.path.dirname(os.path.abspath(catalog_path))
+        with open(catalog_path, 'r', encoding='utf-8') as f:
+            self.data = json.load(f)
+        with open(recipes_path or os.path.join(base_dir, 'recipes.json'), 'r', encoding='utf-8') as f:
+            self.recipes: List[Dict] = json.load(f)['recipes']
+        # Spelling and pronunciation variants live next to the catalog
+        self.normalizer = TextNormalizer.from_file(variants_path or os.path.join(base_dir, 'spelling_variants.json'))
+        self._build_item_index()
+        # Recipe names are normalized once here rather than on every lookup
+        self.recipe_index = [(self.normalizer.normalize(recipe['name']), recipe) for recipe in self.recipes]
+
+    def _build_item_index(self):
+        """Build a quick lookup index for items by ID and name, and the fuzzy matcher"""
+        self.item_index = {}
+        items = []
+        for category_key, category_data in self.data['categories'].items():
+            for item in category_data['items']:
+                self.item_index[item['id']] = {
+                    **item,
+                    'category': category_key
+                }
+                # Also index by lowercase name for flexible matching
+                self.item_index[item['name'].lower()] = {
+                    **item,
+                    'category': category_key
+                }
+                items.append(self.item_index[item['id']])
+        # Normalized keys, phonetic keys and trigrams are computed once here, not per query
+        self.matcher = ProductMatcher(items, normalize=self.normalizer.normalize)
+        # Category, brand, tag and name postings for search_items
+        self.search_index = CatalogSearch(self.data, normalize=self.normalizer.normalize)
+
+    def find_item(self, query: str) -> Optional[Dict]:
+        """Find item by ID or name with fuzzy matching for pronunciation variations"""
+        # Try exact ID match first
+        if query in self.item_index:
+            return self.item_index[query]
+
+        # Try lowercase name match
+        if query.lower() in self.item_index:
+            return self.item_index[query.lower()]
+
+        # Ranked fuzzy match: shared words, sound-alike words, then spelling slips
+        return self.matcher.best(query)
+
+    def find_candidates(self, query: str, limit: int = 3, min_confidence: float = MIN_SUGGESTION) -> List[Match]:
+        """Ranked candidate items for a query, with confidence scores"""
+        return [m for m in self.matcher.match(query, limit=limit) if m.score >= min_confidence]
+
+    def find_recipe(self, name: str) -> Optional[Dict]:
+        """Find a recipe whose name contains, or is contained in, the requested dish"""
+        # Recipe names go through the same spelling variants as item names
+        normalized = self.normalizer.normalize(name)
+        for recipe_normalized, recipe in self.recipe_index:
+            if normalized in recipe_normalized or recipe_normalized in normalized:
+                return recipe
+        return None
+
+
+class SharedCatalog:
+    """The current Catalog of a process, swapped for a new one when its files change.
+
+    Readers take ``current`` once per operation. A reload builds the new
+    Catalog completely before one reference assignment swaps it in, so a
+    session sees either the old catalog or the new one, never a mix. A
+    catalog file that fails to load is logged and the old catalog kept.
+    """
+
+    def __init__(self, catalog_path: str, recipes_path: Optional[str] = None, variants_path: Optional[str] = None):
+        base_dir = os.path.dirname(os.path.abspath(catalog_path))
+        self.paths = (
+            os.path.abspath(catalog_path),
+            recipes_path or os.path.join(base_dir, 'recipes.json'),
+            variants_path or os.path.join(base_dir, 'spelling_variants.json'),
+        )
+        self._mtimes = self._read_mtimes()
+        self.current = Catalog(*self.paths)
+        self._watcher: Optional[threading.Thread] = None
+
+    def _read_mtimes(self) -> Tuple[int, ...]:
+        mtimes = []
+        for path in self.paths:
+            try:
+                mtimes.append(os.stat(path).st_mtime_ns)
+            except FileNotFoundError:
+                mtimes.append(0)
+        return tuple(mtimes)
+
+    def reload_if_changed(self) -> bool:
+        """Rebuild and swap in the catalog if any of its files changed since the last load"""
+        mtimes = self._read_mtimes()
+        if mtimes == self._mtimes:
+            return False
+        # Don't retry the same broken file every interval; the next save changes its mtime
+        self._mtimes = mtimes
+        try:
+            catalog = Catalog(*self.paths)
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Could not reload the grocery catalog, keeping the previous one: {e}")
+            return False
+        self.current = catalog
+        logger.info(f"Reloaded grocery catalog: {len(catalog.matcher.keys)} item keys, {len(catalog.recipes)} recipes")
+        return True
+
+    def watch(self, interval: float = RELOAD_INTERVAL_S):
+        """Check for catalog changes every interval seconds on a daemon thread"""
+        if self._watcher is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.reload_if_changed()
+                except Exception:
+                    logger.exception("Grocery catalog watcher failed")
+
+        self._watcher = threading.Thread(target=run, name="grocery-catalog-watcher", daemon=True)
+        self._watcher.start()
+
+
+_catalogs: Dict[str, SharedCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def open_catalog(catalog_path: str) -> SharedCatalog:
+    """Return the process-wide SharedCatalog for a catalog file, loading it on first use"""
+    catalog_path = os.path.abspath(catalog_path)
+    with _catalogs_lock:
+        shared = _catalogs.get(catalog_path)
+        if shared is None:
+            shared = _catalogs[catalog_path] = SharedCatalog(catalog_path)
+        return shared
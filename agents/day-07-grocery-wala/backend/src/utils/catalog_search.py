@@ -0,0 +1,85 @@
+import bisect
+import heapq
+import re
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.product_matcher import stem
+
+# Question words around a search ("what vegetables do you have")
+STOPWORDS = {
+    "a", "an", "the", "of", "in", "for", "and", "or", "with", "any", "some", "all",
+    "what", "which", "do", "does", "you", "your", "have", "got", "is", "are", "there",
+    "show", "me", "list", "tell", "i", "want", "need", "please",
+    "item", "product", "thing", "stuff", "option",
+}
+
+# How much a query word counts for, by where it appears on an item
+WEIGHTS = {"name": 3.0, "category": 2.5, "tag": 2.0, "brand": 1.0}
+
+
+class CatalogSearch:
+    """Inverted index over the catalog for search_items.
+
+    Name words, brands, tags and category names are posted to the items
+    they describe when the catalog loads. A search only visits the postings
+    for its own words and ranks the hits by how many query words they match,
+    then by where they matched (name, category, tag, brand).
+    """
+
+    def __init__(self, catalog: Dict, normalize: Optional[Callable[[str], str]] = None):
+        self.normalize = normalize or (lambda text: text.lower())
+        self.items: List[Dict] = []
+        self.postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        for category_key, category_data in catalog['categories'].items():
+            for item in category_data['items']:
+                index = len(self.items)
+                self.items.append({**item, 'category': category_key})
+                fields = [
+                    ("name", item['name']),
+                    ("brand", item.get('brand', '')),
+                    ("category", f"{category_key} {category_data['name']}"),
+                    *(("tag", tag) for tag in item.get('tags', [])),
+                ]
+                for field, text in fields:
+                    for token in self._tokens(text):
+                        posting = self.postings[token]
+                        posting[index] = max(posting.get(index, 0.0), WEIGHTS[field])
+        # Sorted vocabulary, for prefix matches on partial words ("pan" -> "paneer")
+        self.vocabulary = sorted(self.postings)
+
+    def _tokens(self, text: str) -> List[str]:
+        words = re.findall(r"[a-z0-9]+", self.normalize(text))
+        tokens = [stem(w) for w in words if w not in STOPWORDS]
+        return [t for t in tokens if t not in STOPWORDS]
+
+    def _expand(self, token: str) -> List[str]:
+        if token in self.postings:
+            return [token]
+        if len(token) < 3:
+            return []
+        start = bisect.bisect_left(self.vocabulary, token)
+        end = bisect.bisect_left(self.vocabulary, token + "\uffff")
+        return self.vocabulary[start:end]
+
+    def search(self, query: str, limit: int = 5) -> Tuple[List[Dict], int]:
+        """The top items for a query, best first, and how many items matched in all"""
+        hits: Dict[int, List[float]] = defaultdict(lambda: [0, 0.0])
+        for token in set(self._tokens(query)):
+            weights: Dict[int, float] = {}
+            for term in self._expand(token):
+                for index, weight in self.postings[term].items():
+                    weights[index] = max(weights.get(index, 0.0), weight)
+            for index, weight in weights.items():
+                hit = hits[index]
+                hit[0] += 1
+                hit[1] += weight
+
+        if not hits:
+            return [], 0
+        # Items matching every query word if there are any, else the ones matching the most
+        coverage = max(hit[0] for hit in hits.values())
+        matched = [i for i, hit in hits.items() if hit[0] == coverage]
+        # Best places matched first, then catalog order; only the top ones are sorted
+        top = heapq.nsmallest(limit, matched, key=lambda i: (-hits[i][1], i))
+        return [self.items[i] for i in top], len(matched)
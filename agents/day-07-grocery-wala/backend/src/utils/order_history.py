@@ -0,0 +1,162 @@
+import asyncio
+import functools
+import json
+import re
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    order_id TEXT PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    customer_phone TEXT,
+    customer_name TEXT,
+    status TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS orders_timestamp ON orders (timestamp);
+CREATE INDEX IF NOT EXISTS orders_phone ON orders (customer_phone, timestamp);
+CREATE INDEX IF NOT EXISTS orders_name ON orders (customer_name, timestamp);
+CREATE INDEX IF NOT EXISTS orders_status ON orders (status, timestamp);
+"""
+
+
+def phone_key(phone: Optional[str]) -> Optional[str]:
+    """Last ten digits, so "+91 98765 43210" and "9876543210" are one customer"""
+    digits = re.sub(r"\D", "", phone or "")
+    return digits[-10:] or None
+
+
+def name_key(name: Optional[str]) -> Optional[str]:
+    key = " ".join((name or "").lower().split())
+    return key if key and key != "guest customer" else None
+
+
+class OrderHistory:
+    """Grocery orders in SQLite, indexed by time, customer and status.
+
+    recent(), by_customer() and by_status() are index lookups that read only
+    the rows they return, however many orders there are. All queries run on
+    one worker thread, off the event loop, and WAL mode lets worker
+    processes share the file.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="order-history")
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # Created lazily so it belongs to the worker thread
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args))
+
+    def _put(self, order: Dict) -> None:
+        customer = order.get("customer_info") or {}
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO orders (order_id, timestamp, customer_phone, customer_name, status, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    order["order_id"],
+                    order["timestamp"],
+                    phone_key(customer.get("phone")),
+                    name_key(customer.get("name")),
+                    order["status"],
+                    json.dumps(order, ensure_ascii=False),
+                ),
+            )
+
+    def _query(self, where: str, args: Tuple, limit: int) -> List[Dict]:
+        rows = self.conn.execute(
+            f"SELECT data FROM orders {where} ORDER BY timestamp DESC LIMIT ?", (*args, limit)
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def _count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+
+    def _update_status(self, order_id: str, status: str, updated_at: str) -> Optional[Dict]:
+        with self.conn:
+            row = self.conn.execute("SELECT data FROM orders WHERE order_id = ?", (order_id,)).fetchone()
+            if row is None:
+                return None
+            order = json.loads(row[0])
+            order["status"] = status
+            order["status_updated_at"] = updated_at
+            self.conn.execute(
+                "UPDATE orders SET status = ?, data = ? WHERE order_id = ?",
+                (status, json.dumps(order, ensure_ascii=False), order_id),
+            )
+        return order
+
+    def _page(self, after: int, size: int) -> List[Tuple[int, str]]:
+        return self.conn.execute(
+            "SELECT rowid, data FROM orders WHERE rowid > ? ORDER BY rowid LIMIT ?", (after, size)
+        ).fetchall()
+
+    async def add(self, order: Dict) -> None:
+        await self._run(self._put, order)
+
+    async def get(self, order_id: str) -> Optional[Dict]:
+        orders = await self._run(self._query, "WHERE order_id = ?", (order_id,), 1)
+        return orders[0] if orders else None
+
+    async def update_status(self, order_id: str, status: str, updated_at: str) -> Optional[Dict]:
+        """Set an order's status; returns the updated order, or None if there is no such order"""
+        return await self._run(self._update_status, order_id, status, updated_at)
+
+    async def count(self) -> int:
+        return await self._run(self._count)
+
+    async def recent(self, n: int = 5) -> List[Dict]:
+        """The n most recent orders, newest first"""
+        return await self._run(self._query, "", (), n)
+
+    async def by_customer(self, phone: Optional[str] = None, name: Optional[str] = None, limit: int = 5) -> List[Dict]:
+        """A customer's orders, newest first, by phone number or else by name"""
+        if phone_key(phone):
+            return await self._run(self._query, "WHERE customer_phone = ?", (phone_key(phone),), limit)
+        if name_key(name):
+            return await self._run(self._query, "WHERE customer_name = ?", (name_key(name),), limit)
+        return []
+
+    async def by_status(self, status: str, limit: int = 50) -> List[Dict]:
+        return await self._run(self._query, "WHERE status = ?", (status,), limit)
+
+    async def iter_orders(self, batch_size: int = 500) -> AsyncIterator[Dict]:
+        """Every order in insertion order, read a batch at a time, for exports"""
+        after = 0
+        while True:
+            rows = await self._run(self._page, after, batch_size)
+            if not rows:
+                return
+            for _, data in rows:
+                yield json.loads(data)
+            after = rows[-1][0]
+
+
+_histories: Dict[str, OrderHistory] = {}
+_histories_lock = threading.Lock()
+
+
+def open_order_history(path: Union[str, Path]) -> OrderHistory:
+    """Return the process-wide OrderHistory for a database file"""
+    path = Path(path).resolve()
+    with _histories_lock:
+        history = _histories.get(str(path))
+        if history is None:
+            history = _histories[str(path)] = OrderHistory(path)
+        return history
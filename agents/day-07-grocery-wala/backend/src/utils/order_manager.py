@@ -1,40 +1,61 @@
-import json
+import asyncio
 import os
 from datetime import datetime
-from typing import Dict, Optional
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from utils.order_history import OrderHistory, open_order_history
+
+COUNTER_KEY = "_counter"
+
+# Order numbers leased from the shared counter at a time. Above 1, a busy
+# process takes the counter's lock once per block instead of once per order;
+# numbers left in a block when the process exits are skipped.
+ORDER_ID_BLOCK = int(os.getenv("ORDER_ID_BLOCK", "1"))
+
 
 class OrderManager:
-    def __init__(self, orders_dir: str = "orders"):
-        self.orders_dir = orders_dir
-        # Create orders directory if it doesn't exist
-        os.makedirs(orders_dir, exist_ok=True)
-        self.order_counter_file = os.path.join(orders_dir, "_counter.json")
-        self._init_counter()
+    def __init__(self, store, history: Optional[OrderHistory] = None, collection: str = "orders", id_block: int = ORDER_ID_BLOCK):
+        # The order counter is a record in a voice_runtime store. Orders
+        # themselves live in an indexed OrderHistory, by default
+        # <root>/orders/history.sqlite3 next to the counter
+        self.store = store
+        self.collection = collection
+        self.history = history or open_order_history(Path(store.backend.root) / collection / "history.sqlite3")
+        self._legacy_checked = False
+        self.id_block = max(1, id_block)
+        # Leased order numbers not yet handed out: next_id .. lease_end
+        self._next_id = 1
+        self._lease_end = 0
+        self._counter_lock = asyncio.Lock()
     
-    def _init_counter(self):
-        """Initialize or load the order counter"""
-        if os.path.exists(self.order_counter_file):
-            with open(self.order_counter_file, 'r') as f:
-                data = json.load(f)
-                self.counter = data.get('last_order_id', 0)
-        else:
-            self.counter = 0
-            self._save_counter()
+    async def _generate_order_id(self) -> str:
+        """Generate a new order ID, unique across sessions and processes"""
+        async with self._counter_lock:
+            if self._next_id > self._lease_end:
+                # The store increments atomically, so processes never lease overlapping blocks
+                self._lease_end = await self.store.increment(self.collection, COUNTER_KEY, 'last_order_id', self.id_block)
+                self._next_id = self._lease_end - self.id_block + 1
+            order_number = self._next_id
+            self._next_id += 1
+            return f"GW{order_number:06d}"
     
-    def _save_counter(self):
-        """Save the current counter value"""
-        with open(self.order_counter_file, 'w') as f:
-            json.dump({'last_order_id': self.counter}, f)
+    async def _import_legacy_orders(self):
+        """Copy orders saved as store records (order_<id>.json) into an empty history"""
+        if self._legacy_checked:
+            return
+        self._legacy_checked = True
+        if await self.history.count():
+            return
+        for key in await self.store.keys(self.collection):
+            if key.startswith('order_'):
+                order = await self.store.get(self.collection, key)
+                if order is not None:
+                    await self.history.add(order)
     
-    def _generate_order_id(self) -> str:
-        """Generate a new order ID"""
-        self.counter += 1
-        self._save_counter()
-        return f"GW{self.counter:06d}"
-    
-    def create_order(self, cart_data: Dict, customer_info: Optional[Dict] = None, payment_method: str = "COD") -> Dict:
+    async def create_order(self, cart_data: Dict, customer_info: Optional[Dict] = None, payment_method: str = "COD") -> Dict:
         """Create and save a new order"""
-        order_id = self._generate_order_id()
+        order_id = await self._generate_order_id()
         timestamp = datetime.now().isoformat()
         
         order = {
@@ -56,38 +77,21 @@ class OrderManager:
             "delivery_instructions": None
         }
         
-        # Save order to file
-        order_filename = os.path.join(self.orders_dir, f"order_{order_id}.json")
-        with open(order_filename, 'w', encoding='utf-8') as f:
-            json.dump(order, f, indent=2, ensure_ascii=False)
+        await self._import_legacy_orders()
+        await self.history.add(order)
         
         return order
     
-    def get_order(self, order_id: str) -> Optional[Dict]:
+    async def get_order(self, order_id: str) -> Optional[Dict]:
         """Retrieve an order by ID"""
-        order_filename = os.path.join(self.orders_dir, f"order_{order_id}.json")
-        
-        if not os.path.exists(order_filename):
-            return None
-        
-        with open(order_filename, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        await self._import_legacy_orders()
+        return await self.history.get(order_id)
     
-    def update_order_status(self, order_id: str, new_status: str) -> bool:
+    async def update_order_status(self, order_id: str, new_status: str) -> bool:
         """Update order status"""
-        order = self.get_order(order_id)
-        
-        if not order:
-            return False
-        
-        order['status'] = new_status
-        order['status_updated_at'] = datetime.now().isoformat()
-        
-        order_filename = os.path.join(self.orders_dir, f"order_{order_id}.json")
-        with open(order_filename, 'w', encoding='utf-8') as f:
-            json.dump(order, f, indent=2, ensure_ascii=False)
-        
-        return True
+        await self._import_legacy_orders()
+        order = await self.history.update_status(order_id, new_status, datetime.now().isoformat())
+        return order is not None
     
     def get_order_summary(self, order: Dict) -> str:
         """Get a formatted summary of an order"""
@@ -108,15 +112,12 @@ class OrderManager:
         
         return "\n".join(summary_lines)
     
-    def list_recent_orders(self, limit: int = 5) -> list:
-        """Get list of recent orders"""
-        order_files = [f for f in os.listdir(self.orders_dir) if f.startswith('order_')]
-        order_files.sort(reverse=True)  # Most recent first
-        
-        orders = []
-        for order_file in order_files[:limit]:
-            order_path = os.path.join(self.orders_dir, order_file)
-            with open(order_path, 'r', encoding='utf-8') as f:
-                orders.append(json.load(f))
-        
-        return orders
\ No newline at end of file
+    async def list_recent_orders(self, limit: int = 5) -> List[Dict]:
+        """Get list of recent orders, newest first"""
+        await self._import_legacy_orders()
+        return await self.history.recent(limit)
+    
+    async def customer_orders(self, phone: Optional[str] = None, name: Optional[str] = None, limit: int = 5) -> List[Dict]:
+        """Get a customer's orders, newest first, by phone number or else by name"""
+        await self._import_legacy_orders()
+        return await self.history.by_customer(phone=phone, name=name, limit=limit)
@@ -0,0 +1,177 @@
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+# Words customers say around an item name that never identify it
+STOPWORDS = {"a", "an", "the", "of", "some", "and", "please"}
+
+# Minimum confidence for find_item to act on a match without asking
+MIN_CONFIDENCE = 0.6
+# Minimum confidence to offer a match as a "did you mean" suggestion
+MIN_SUGGESTION = 0.45
+
+
+@dataclass
+class Match:
+    item: Dict
+    score: float
+    matched_name: str
+
+
+def _basic_normalize(text: str) -> str:
+    return text.lower().strip()
+
+
+def stem(token: str) -> str:
+    """Fold simple plurals so "onions" and "onion" share a key"""
+    if len(token) > 4 and token.endswith("oes"):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def phonetic_key(token: str) -> str:
+    """Sound-alike key for STT misspellings of Indian grocery names.
+
+    Drops aspiration ("chh", "dh"), doubled letters and inner vowels, so
+    "paneer", "panir" and "panner" all become "pnr".
+    """
+    if not token:
+        return ""
+    key = token[0] + token[1:].replace("h", "")
+    key = re.sub(r"c(?=[eiy])", "s", key).replace("w", "v").replace("z", "j").replace("q", "k")
+    key = re.sub(r"(.)\1+", r"\1", key)
+    return key[0] + re.sub(r"[aeiouy]", "", key[1:])
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class ProductMatcher:
+    """Ranked product lookup, indexed once when the catalog loads.
+
+    Every item is indexed under its name, the parts of the name inside and
+    outside parentheses ("Atta", "Whole Wheat Flour") and its id. A query is
+    scored against the keys that share a word, a sound-alike word or a
+    trigram with it, so a lookup only touches the postings for its own
+    tokens and not the whole catalog.
+    """
+
+    def __init__(self, items: Iterable[Dict], normalize: Optional[Callable[[str], str]] = None):
+        self.normalize = normalize or _basic_normalize
+        self.keys: List[str] = []
+        self.key_items: List[Dict] = []
+        self.exact: Dict[str, int] = {}
+        self.token_postings: Dict[str, Set[int]] = defaultdict(set)
+        self.phonetic_postings: Dict[str, Set[int]] = defaultdict(set)
+        self.trigram_postings: Dict[str, Set[int]] = defaultdict(set)
+        self.key_token_counts: List[int] = []
+        self.key_trigram_counts: List[int] = []
+        for item in items:
+            for name in self._names(item):
+                self._add_key(name, item)
+
+    @staticmethod
+    def _names(item: Dict) -> List[str]:
+        name = item["name"]
+        names = [name, item["id"].replace("_", " ")]
+        outside = re.sub(r"\(.*?\)", " ", name)
+        if outside.strip() != name:
+            names.append(outside)
+        names.extend(part for inner in re.findall(r"\((.*?)\)", name) for part in inner.split("/"))
+        return names
+
+    def _tokens(self, text: str) -> List[str]:
+        words = re.findall(r"[a-z0-9]+", self.normalize(text))
+        return [stem(w) for w in words if w not in STOPWORDS]
+
+    def _add_key(self, name: str, item: Dict) -> None:
+        tokens = self._tokens(name)
+        if not tokens:
+            return
+        key = " ".join(tokens)
+        if key in self.exact and self.key_items[self.exact[key]]["id"] == item["id"]:
+            return
+
+        index = len(self.keys)
+        self.keys.append(key)
+        self.key_items.append(item)
+        self.exact.setdefault(key, index)
+        for token in set(tokens):
+            self.token_postings[token].add(index)
+            self.phonetic_postings[phonetic_key(token)].add(index)
+        grams = _trigrams(key)
+        for gram in grams:
+            self.trigram_postings[gram].add(index)
+        self.key_token_counts.append(len(set(tokens)))
+        self.key_trigram_counts.append(len(grams))
+
+    @staticmethod
+    def _intersect(postings: List[Set[int]]) -> Set[int]:
+        if not postings:
+            return set()
+        postings = sorted(postings, key=len)
+        result = set(postings[0])
+        for posting in postings[1:]:
+            result &= posting
+            if not result:
+                break
+        return result
+
+    def match(self, query: str, limit: int = 5) -> List[Match]:
+        """Candidate items for a query, best first, with confidence scores in (0, 1]"""
+        tokens = self._tokens(query)
+        if not tokens:
+            return []
+        key = " ".join(tokens)
+        unique = set(tokens)
+        scores: Dict[int, float] = {}
+
+        def offer(index: int, score: float) -> None:
+            if score > scores.get(index, 0.0):
+                scores[index] = score
+
+        if key in self.exact:
+            offer(self.exact[key], 1.0)
+
+        # Every query word appears in the name: "milk" -> "Full Cream Milk"
+        missing = [t for t in unique if t not in self.token_postings]
+        if not missing:
+            for index in self._intersect([self.token_postings[t] for t in unique]):
+                offer(index, 0.75 + 0.2 * len(unique) / self.key_token_counts[index])
+
+        # Every query word sounds like a word in the name: "panir" -> "Paneer"
+        codes = {phonetic_key(t) for t in unique}
+        if all(code in self.phonetic_postings for code in codes):
+            for index in self._intersect([self.phonetic_postings[c] for c in codes]):
+                offer(index, 0.65 + 0.2 * len(unique) / self.key_token_counts[index])
+
+        # Spelling slips: Dice similarity over shared trigrams
+        grams = _trigrams(key)
+        shared: Dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for index in self.trigram_postings.get(gram, ()):
+                shared[index] += 1
+        for index, count in shared.items():
+            dice = 2 * count / (len(grams) + self.key_trigram_counts[index])
+            if dice >= 0.4:
+                offer(index, 0.9 * dice)
+
+        best: Dict[str, Match] = {}
+        for index, score in scores.items():
+            item = self.key_items[index]
+            current = best.get(item["id"])
+            if current is None or score > current.score:
+                best[item["id"]] = Match(item, round(score, 3), self.keys[index])
+        return sorted(best.values(), key=lambda m: m.score, reverse=True)[:limit]
+
+    def best(self, query: str, min_confidence: float = MIN_CONFIDENCE) -> Optional[Dict]:
+        """The top item for a query, if it is confident enough to act on"""
+        matches = self.match(query, limit=1)
+        if matches and matches[0].score >= min_confidence:
+            return matches[0].item
+        return None
@@ -0,0 +1,40 @@
+import json
+import re
+from typing import Dict, List
+
+
+class TextNormalizer:
+    """Rewrites spelling and pronunciation variants to their catalog spelling.
+
+    The variants are compiled once into a single regex that only matches
+    whole words, longest phrase first. "cheese on" becomes "cheese corn", but
+    "onion" is left alone. Each query is rewritten in one pass.
+    """
+
+    def __init__(self, variants: Dict[str, List[str]]):
+        self.replacements: Dict[str, str] = {}
+        for canonical, spellings in variants.items():
+            for spelling in spellings:
+                self.replacements[self._squash(spelling)] = self._squash(canonical)
+
+        alternatives = sorted(self.replacements, key=len, reverse=True)
+        if alternatives:
+            self.pattern = re.compile(r"\b(?:" + "|".join(re.escape(a) for a in alternatives) + r")\b")
+        else:
+            self.pattern = None
+
+    @classmethod
+    def from_file(cls, path: str) -> "TextNormalizer":
+        """Load variants from a JSON file of {"variants": {canonical: [spellings]}}"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f)['variants'])
+
+    @staticmethod
+    def _squash(text: str) -> str:
+        return " ".join(text.lower().split())
+
+    def normalize(self, text: str) -> str:
+        normalized = self._squash(text)
+        if self.pattern is None:
+            return normalized
+        return self.pattern.sub(lambda m: self.replacements[m.group(0)], normalized)
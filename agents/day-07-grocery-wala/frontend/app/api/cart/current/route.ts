@@ -2,42 +2,30 @@ import { NextRequest, NextResponse } from 'next/server';
 import fs from 'fs';
 import path from 'path';
 
+const EMPTY_CART = { items: [], total: 0, item_count: 0, epoch: null, version: 0 };
+
+// Snapshot of a session's cart, for when the cart panel first opens or misses an update.
+// Live changes arrive as deltas over the LiveKit data channel.
 export async function GET(req: NextRequest) {
   try {
-    // Path to current_cart.json in backend orders directory
-    const cartPath = path.join(process.cwd(), '..', 'backend', 'src', 'orders', 'current_cart.json');
-    
-    console.log('Cart API - Looking for cart at:', cartPath);
-    console.log('Cart API - File exists:', fs.existsSync(cartPath));
-    
-    // Check if cart file exists
+    const ordersDir = path.join(process.cwd(), '..', 'backend', 'src', 'orders');
+    const room = req.nextUrl.searchParams.get('room');
+
+    // Each room's cart is written by the agent to orders/carts/<room>.json
+    // (same file name rule as CartManager); without a room, the shared current_cart.json
+    const cartPath = room
+      ? path.join(ordersDir, 'carts', `${room.replace(/[^A-Za-z0-9_.-]/g, '_')}.json`)
+      : path.join(ordersDir, 'current_cart.json');
+
     if (!fs.existsSync(cartPath)) {
-      console.log('Cart API - File not found, returning empty cart');
-      const emptyCart = { items: [], total: 0, item_count: 0 };
-      
-      // Try to create the file
-      try {
-        const ordersDir = path.join(process.cwd(), '..', 'backend', 'src', 'orders');
-        if (!fs.existsSync(ordersDir)) {
-          fs.mkdirSync(ordersDir, { recursive: true });
-        }
-        fs.writeFileSync(cartPath, JSON.stringify(emptyCart, null, 2));
-        console.log('Cart API - Created empty cart file');
-      } catch (createError) {
-        console.error('Cart API - Could not create cart file:', createError);
-      }
-      
-      return NextResponse.json(emptyCart);
+      return NextResponse.json(EMPTY_CART);
     }
 
-    // Read the current cart
-    const cartData = JSON.parse(fs.readFileSync(cartPath, 'utf-8'));
-    console.log('Cart API - Returning cart data:', cartData);
-
-    // Return cart data
+    // The agent replaces the file atomically, so this never sees a partial write
+    const cartData = JSON.parse(await fs.promises.readFile(cartPath, 'utf-8'));
     return NextResponse.json(cartData);
   } catch (error) {
     console.error('Cart API error:', error);
-    return NextResponse.json({ items: [], total: 0, item_count: 0 });
+    return NextResponse.json(EMPTY_CART);
   }
 }
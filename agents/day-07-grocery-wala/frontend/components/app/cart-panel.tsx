@@ -1,8 +1,13 @@
 'use client';
 
-import { useState, useEffect } from 'react';
+import { useCallback, useEffect, useRef, useState } from 'react';
+import { RoomEvent } from 'livekit-client';
+import { useRoomContext } from '@livekit/components-react';
 import './cart-panel.css';
 
+// Data channel topic the grocery agent publishes cart deltas on
+const CART_TOPIC = 'grocery-cart';
+
 interface CartItem {
   id: string;
   name: string;
@@ -12,67 +17,132 @@ interface CartItem {
   quantity: number;
 }
 
+type CartChange =
+  | { op: 'add'; item: CartItem }
+  | { op: 'qty'; id: string; quantity: number }
+  | { op: 'remove'; id: string }
+  | { op: 'clear' };
+
+interface CartDelta {
+  type: 'cart_delta';
+  // Changes with each agent restart, when versions start over from 0
+  epoch: string;
+  version: number;
+  changes: CartChange[];
+  total: number;
+  item_count: number;
+}
+
+function applyChanges(items: CartItem[], changes: CartChange[]): CartItem[] {
+  let next = items;
+  for (const change of changes) {
+    switch (change.op) {
+      case 'add':
+        next = [...next.filter((item) => item.id !== change.item.id), change.item];
+        break;
+      case 'qty':
+        next = next.map((item) =>
+          item.id === change.id ? { ...item, quantity: change.quantity } : item
+        );
+        break;
+      case 'remove':
+        next = next.filter((item) => item.id !== change.id);
+        break;
+      case 'clear':
+        next = [];
+        break;
+    }
+  }
+  return next;
+}
+
 interface CartPanelProps {
   isOpen: boolean;
   onClose: () => void;
 }
 
 export function CartPanel({ isOpen, onClose }: CartPanelProps) {
+  const room = useRoomContext();
   const [cartItems, setCartItems] = useState<CartItem[]>([]);
   const [totalAmount, setTotalAmount] = useState(0);
   const [itemCount, setItemCount] = useState(0);
   const [lastUpdate, setLastUpdate] = useState<string>('');
+  const epochRef = useRef<string | null>(null);
+  const versionRef = useRef(0);
 
-  // Fetch cart immediately when panel opens and poll continuously
+  // Snapshot of this room's cart, used on mount and whenever a delta was missed
+  const fetchSnapshot = useCallback(async () => {
+    try {
+      const response = await fetch(
+        `/api/cart/current?room=${encodeURIComponent(room.name)}&t=${Date.now()}`,
+        { cache: 'no-store' }
+      );
+      if (!response.ok) {
+        console.error('Cart API error:', response.statusText);
+        return;
+      }
+      const data = await response.json();
+      // A delta may have arrived while the snapshot was in flight
+      const epoch = data.epoch ?? null;
+      if (epoch === epochRef.current && (data.version || 0) < versionRef.current) {
+        return;
+      }
+      epochRef.current = epoch;
+      versionRef.current = data.version || 0;
+      setCartItems(data.items || []);
+      setTotalAmount(data.total || 0);
+      setItemCount(data.item_count || 0);
+      setLastUpdate(new Date().toLocaleTimeString());
+    } catch (error) {
+      console.error('Cart fetch error:', error);
+    }
+  }, [room]);
+
+  // Live updates: the agent pushes each batch of cart changes over the data channel
   useEffect(() => {
-    const fetchCart = async () => {
-      try {
-        const timestamp = new Date().toLocaleTimeString();
-        console.log(`[${timestamp}] Fetching cart data...`);
-        
-        const response = await fetch('/api/cart/current?t=' + Date.now(), {
-          cache: 'no-store',
-          headers: {
-            'Cache-Control': 'no-cache',
-            'Pragma': 'no-cache',
-          },
-        });
-        
-        console.log(`[${timestamp}] Cart API response status:`, response.status);
-        
-        if (response.ok) {
-          const data = await response.json();
-          console.log(`[${timestamp}] Cart data received:`, data);
-          setCartItems(data.items || []);
-          setTotalAmount(data.total || 0);
-          setItemCount(data.item_count || 0);
-          setLastUpdate(timestamp);
-        } else {
-          console.error(`[${timestamp}] Cart API error:`, response.statusText);
-          setCartItems([]);
-          setTotalAmount(0);
-          setItemCount(0);
-        }
-      } catch (error) {
-        console.error('Cart fetch error:', error);
+    const onDataReceived = (
+      payload: Uint8Array,
+      _participant?: unknown,
+      _kind?: unknown,
+      topic?: string
+    ) => {
+      if (topic !== CART_TOPIC) {
+        return;
+      }
+      const delta: CartDelta = JSON.parse(new TextDecoder().decode(payload));
+      if (delta.epoch !== epochRef.current) {
+        // The agent restarted with a new, empty cart
+        epochRef.current = delta.epoch;
+        versionRef.current = 0;
         setCartItems([]);
-        setTotalAmount(0);
-        setItemCount(0);
       }
+      if (delta.version <= versionRef.current) {
+        return;
+      }
+      if (delta.version !== versionRef.current + 1) {
+        // Missed an update: resync from the snapshot
+        fetchSnapshot();
+        return;
+      }
+      versionRef.current = delta.version;
+      setCartItems((items) => applyChanges(items, delta.changes));
+      setTotalAmount(delta.total);
+      setItemCount(delta.item_count);
+      setLastUpdate(new Date().toLocaleTimeString());
+    };
+
+    room.on(RoomEvent.DataReceived, onDataReceived);
+    return () => {
+      room.off(RoomEvent.DataReceived, onDataReceived);
     };
+  }, [room, fetchSnapshot]);
 
-    // Always fetch cart data when panel opens
+  // Catch up when the panel opens, in case the session started before it mounted
+  useEffect(() => {
     if (isOpen) {
-      console.log('Cart panel opened - starting polling...');
-      fetchCart(); // Immediate fetch
-      // Poll every 1 second while panel is open for real-time updates
-      const interval = setInterval(fetchCart, 1000);
-      return () => {
-        console.log('Cart panel closed - stopping polling');
-        clearInterval(interval);
-      };
+      fetchSnapshot();
     }
-  }, [isOpen]);
+  }, [isOpen, fetchSnapshot]);
 
   return (
     <>
@@ -143,7 +213,7 @@ export function CartPanel({ isOpen, onClose }: CartPanelProps) {
           </div>
         )}
 
-        {/* Polling indicator */}
+        {/* Last update indicator */}
         {lastUpdate && (
           <div style={{ 
             fontSize: '10px', 
@@ -1,4 +1,6 @@
 import logging
+import sys
+from pathlib import Path
 
 from dotenv import load_dotenv
 from livekit.agents import (
@@ -13,8 +15,15 @@ from livekit.agents import (
     metrics,
     tokenize,
 )
-from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
-from livekit.plugins.turn_detector.multilingual import MultilingualModel
+from livekit.plugins import murf, google, deepgram
+
+# Shared runtime helpers (voice_runtime/) live at the repository root
+sys.path.append(str(Path(__file__).resolve().parents[4]))
+from voice_runtime.context import attach_compactor
+from voice_runtime.instrumentation import instrument_tools
+from voice_runtime.latency import track_latency
+from voice_runtime.models import prewarm_pipeline, turn_detector
+from voice_runtime.tts_cache import CachedTTS, say_cached
 
 logger = logging.getLogger("game-master")
 
@@ -218,21 +227,24 @@ VOICE DELIVERY:
 जय बजरंग बली! जय श्री राम! 🚩""",
         )
 
-    async def on_connected(self, ctx: AgentSession) -> None:
+    async def on_enter(self) -> None:
         """Greet the player immediately when they connect with engaging Ramayan introduction"""
-        await ctx.assistant.say(
+        # Same two lines every session, so they are played from the TTS cache
+        await say_cached(
+            self.session,
             "नमस्कार! स्वागत है रामायण की दुनिया में - भारत की सबसे महान गाथा। हज़ारों साल पुरानी ये कहानी है प्रेम, भक्ति और धर्म की। आज आप खेलेंगे रामायण के सबसे रोमांचक अध्याय - सुंदरकांड। ये है हनुमान जी की लंका यात्रा की कथा। तो चलिए, ये रोमांचक सफर शुरू करते हैं!",
             allow_interruptions=False,
         )
         # Brief pause, then start the story
-        await ctx.assistant.say(
+        await say_cached(
+            self.session,
             "आप हैं हनुमान - पवनपुत्र, बजरंगबली। आपने अभी-अभी असंभव काम किया है - 800 मील चौड़े समुद्र को एक छलांग में पार किया! अब आपके सामने है लंका - रावण की सोने की नगरी। विशाल दरवाज़े, राक्षस पहरेदार, और कहीं इन दीवारों के पीछे है सीता माता। राम जी की अंगूठी आपकी छाती से लगी है। दरवाज़े पर खड़ी है लंकिनी - भयानक राक्षसी। 'कोई नहीं घुसेगा लंका में!' वो गरजती है। आपके पास 3 विकल्प हैं: 1-युद्ध, लंकिनी से सीधे लड़ें। 2-चुपके से, छोटे बनकर अंदर घुसें। 3-बातचीत, उसे समझाने की कोशिश करें। अब आप क्या करेंगे, हनुमान? बताइए - एक, दो, या तीन?",
             allow_interruptions=True,
         )
 
 
 def prewarm(proc: JobProcess):
-    proc.userdata["vad"] = silero.VAD.load()
+    prewarm_pipeline(proc)
 
 
 async def entrypoint(ctx: JobContext):
@@ -256,8 +268,8 @@ async def entrypoint(ctx: JobContext):
             temperature=0.85,  # Balanced creativity
         ),
         
-        # Murf Hindi voice
-        tts=murf.TTS(
+        # Murf Hindi voice, with scripted lines cached on disk
+        tts=CachedTTS(murf.TTS(
             voice="hi-IN-aman",
             style="Conversational",
             model="Falcon",
@@ -265,10 +277,10 @@ async def entrypoint(ctx: JobContext):
                 min_sentence_len=1  # Shorter sentences for faster delivery
             ),
             text_pacing=True,
-        ),
+        )),
         
         # Turn detection
-        turn_detection=MultilingualModel(),
+        turn_detection=turn_detector(ctx.proc),
         vad=ctx.proc.userdata["vad"],
         
         # Fast responses
@@ -289,12 +301,20 @@ async def entrypoint(ctx: JobContext):
 
     ctx.add_shutdown_callback(log_usage)
 
+    track_latency(ctx, session, agent="ramayan-voice-gm")
+
+    # Game sessions run for dozens of turns: keep older story beats as a rolling summary
+    attach_compactor(session)
+
     # Start the game
+    agent = RamayanGameMaster()
+    await instrument_tools(ctx, agent, name="ramayan-voice-gm")
+
     await session.start(
-        agent=RamayanGameMaster(),
+        agent=agent,
         room=ctx.room,
         room_input_options=RoomInputOptions(
-            noise_cancellation=noise_cancellation.BVC(),
+            noise_cancellation=ctx.proc.userdata["noise_cancellation"],
         ),
     )
 
@@ -2,6 +2,9 @@
 
 import json
 import logging
+import re
+import sys
+from pathlib import Path
 import os
 import asyncio
 import uuid
@@ -23,8 +26,16 @@ from livekit.agents import (
     RunContext,
 )
 
-from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
-from livekit.plugins.turn_detector.multilingual import MultilingualModel
+from livekit.plugins import murf, google, deepgram
+
+# Shared runtime helpers (voice_runtime/) live at the repository root
+sys.path.append(str(Path(__file__).resolve().parents[4]))
+from voice_runtime.instrumentation import instrument_tools
+from voice_runtime.latency import track_latency
+from voice_runtime.models import prewarm_pipeline, turn_detector
+from voice_runtime.storage import open_store
+from voice_runtime.tool_output import page_tool_outputs
+from catalog_index import STOPWORDS, CatalogIndex, load_search_terms
 
 # -------------------------
 # Logging
@@ -53,13 +64,74 @@ def load_catalog():
         return []
 
 CATALOG = load_catalog()
+# Synonyms and category aliases customers use, mapped to the catalog's own words
+SEARCH_TERMS_FILE = os.path.join(os.path.dirname(__file__), "search_terms.json")
+SYNONYMS, CATEGORY_ALIASES = load_search_terms(SEARCH_TERMS_FILE)
+# Id, category, color, size, price and word lookups, so browsing never scans the catalog
+CATALOG_INDEX = CatalogIndex(CATALOG, SYNONYMS, CATEGORY_ALIASES)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Order history is an append-only orders.jsonl in the backend directory; an older
+# orders.json array is imported the first time it is used. The backend is pinned
+# rather than read from VOICE_STORE_BACKEND: the json backend rewrites the whole
+# log on every order, and switching would strand the orders already in orders.jsonl
+store = open_store(BACKEND_DIR, backend="jsonl")
+
+# Per-customer index: customers/<key>.json holds that customer's recent orders,
+# so last_order reads one small file however long the order log grows
+customer_index = open_store(BACKEND_DIR, backend="json")
+RECENT_ORDERS_PER_CUSTOMER = 5
+
+# -------------------------
+# Session cart
+# -------------------------
+class CartLine:
+    """One cart line: product, quantity, attributes and the line's total price."""
+    __slots__ = ("product", "quantity", "attrs", "line_total")
+
+    def __init__(self, product: Dict, quantity: int, attrs: Dict):
+        self.product = product  # the catalog's dict, shared rather than copied
+        self.quantity = quantity
+        self.attrs = attrs
+        self.line_total = product["price"] * quantity
+
+
+class Cart:
+    """Cart lines keyed by (product id, size), with the total and item count kept
+    up to date on every change so show_cart and place_order never re-sum or
+    look products up again.
+    """
 
-ORDERS_FILE = "orders.json"
+    def __init__(self):
+        self.lines: Dict[tuple, CartLine] = {}
+        self.total = 0
+        self.item_count = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.lines)
+
+    def __iter__(self):
+        return iter(self.lines.values())
+
+    def add(self, product: Dict, quantity: int = 1, attrs: Optional[Dict] = None) -> CartLine:
+        """Add a product; the same product in the same size adds to its existing line."""
+        attrs = attrs or {}
+        key = (product["id"], attrs.get("size"))
+        line = self.lines.get(key)
+        if line is None:
+            line = self.lines[key] = CartLine(product, 0, attrs)
+        line.quantity += quantity
+        line.line_total += product["price"] * quantity
+        self.total += product["price"] * quantity
+        self.item_count += quantity
+        return line
+
+    def clear(self):
+        self.lines = {}
+        self.total = 0
+        self.item_count = 0
 
-# ensure orders file exists
-if not os.path.exists(ORDERS_FILE):
-    with open(ORDERS_FILE, "w") as f:
-        json.dump([], f)
 
 # -------------------------
 # Per-session Userdata (shopping-centric)
@@ -67,250 +139,198 @@ if not os.path.exists(ORDERS_FILE):
 @dataclass
 class Userdata:
     player_name: Optional[str] = None  # retained name field (player -> customer)
+    customer_id: Optional[str] = None  # participant identity, set once they join the room
     session_id: str = field(default_factory=lambda: str(uuid.uuid4())[:8])
     started_at: str = field(default_factory=lambda: datetime.utcnow().isoformat() + "Z")
-    cart: List[Dict] = field(default_factory=list)  # list of {product_id, quantity, attrs}
+    cart: Cart = field(default_factory=Cart)
     orders: List[Dict] = field(default_factory=list)  # orders placed in this session
     history: List[Dict] = field(default_factory=list)  # conversational actions for trace
+    last_results: List[Dict] = field(default_factory=list)  # the page show_catalog last read out
+    last_product: Optional[Dict] = None  # the product 'that one' refers to
 
 # -------------------------
 # Merchant-layer helpers (ACP-inspired mini layer)
 # -------------------------
 
-def _load_all_orders() -> List[Dict]:
+async def _load_recent_orders(n: int) -> List[Dict]:
+    """The n most recent orders, oldest first, read from the end of the log."""
     try:
-        with open(ORDERS_FILE, "r") as f:
-            return json.load(f)
+        return await store.tail("orders", n)
     except Exception:
         return []
 
 
-def _save_order(order: Dict):
-    orders = _load_all_orders()
-    orders.append(order)
-    with open(ORDERS_FILE, "w") as f:
-        json.dump(orders, f, indent=2)
+async def _save_order(order: Dict):
+    await store.append("orders", order)
 
 
-def list_products(filters: Optional[Dict] = None) -> List[Dict]:
-    """Naive filtering by category, max_price, color, size substring, or query words.
+def customer_keys(userdata: "Userdata") -> List[str]:
+    """Index keys for the customer: their name if they gave it, and their participant identity."""
+    keys = []
+    if userdata.player_name:
+        keys.append("name-" + "-".join(userdata.player_name.lower().split()))
+    if userdata.customer_id:
+        keys.append(f"id-{userdata.customer_id}")
+    return keys
 
-    Improvements:
-    - Accepts category synonyms (e.g., 'phone', 'mobile', 'phones' -> 'mobile').
-    - Supports a flexible max_price and min_price (if provided in filters).
-    - Matches category by substring if exact match fails.
-    """
-    filters = filters or {}
-    results = []
-    query = filters.get("q")
-    category = filters.get("category")
-    max_price = filters.get("max_price") or filters.get("to") or filters.get("max")
-    min_price = filters.get("min_price") or filters.get("from") or filters.get("min")
-    color = filters.get("color")
-    size = filters.get("size")
-
-    # normalize category synonyms
-    if category:
-        cat = category.lower()
-        if cat in ("phone", "phones", "mobile", "mobile phone", "mobiles"):
-            category = "mobile"
-        elif cat in ("tshirt", "t-shirts", "tees", "tee"):
-            category = "tshirt"
-        else:
-            category = cat
-
-    for p in CATALOG:
-        ok = True
-        # category matching: allow substring matches if direct equality fails
-        if category:
-            pcat = p.get("category", "").lower()
-            if pcat != category and category not in pcat and pcat not in category:
-                ok = False
-        if max_price:
-            try:
-                if p.get("price", 0) > int(max_price):
-                    ok = False
-            except Exception:
-                pass
-        if min_price:
-            try:
-                if p.get("price", 0) < int(min_price):
-                    ok = False
-            except Exception:
-                pass
-        if color and p.get("color") and p.get("color") != color:
-            ok = False
-        if size and (not p.get("sizes") or size not in p.get("sizes")):
-            ok = False
-        if query:
-            q = query.lower()
-            # if query mentions 'phone' or 'mobile', accept mobile category too
-            if "phone" in q or "mobile" in q:
-                if p.get("category") != "mobile":
-                    ok = False
-            else:
-                if q not in p.get("name", "").lower() and q not in p.get("description", "").lower():
-                    ok = False
-        if ok:
-            results.append(p)
-    return results
-
-
-def find_product_by_ref(ref_text: str, candidates: Optional[List[Dict]] = None) -> Optional[Dict]:
-    """Resolve references like 'second hoodie' or 'black hoodie' to a product dict.
-    Heuristics improved:
-    - Handle ordinals like 'first/second/third' within a filtered candidate list.
-    - If ref mentions 'phone' or 'mobile' prefer mobile category products.
-    - Match by id, color+category, name substring, or numeric index.
+
+def identify_customer(userdata: "Userdata", participant) -> None:
+    """Index the customer's orders under their participant identity.
+
+    The participant's display name isn't used: the token route gives everyone
+    the same one, so orders are only indexed by a name once the customer
+    confirms it through set_customer_name.
     """
-    ref = (ref_text or "").lower().strip()
-    cand = candidates if candidates is not None else CATALOG
-
-    # prefer mobiles if user explicitly mentions phone/mobile
-    wants_mobile = any(w in ref for w in ("phone", "phones", "mobile", "mobiles"))
-    filtered = cand
-    if wants_mobile:
-        filtered = [p for p in cand if p.get("category") == "mobile"]
-        if not filtered:
-            filtered = cand
-
-    # ordinal handling
-    ordinals = {"first": 0, "second": 1, "third": 2, "fourth": 3}
-    for word, idx in ordinals.items():
-        if word in ref:
-            if idx < len(filtered):
-                return filtered[idx]
+    userdata.customer_id = participant.identity
 
-    # direct id match
-    for p in cand:
-        if p["id"].lower() == ref:
-            return p
-
-    # color + category matching
-    for p in cand:
-        if p.get("color") and p["color"] in ref and p.get("category") and p["category"] in ref:
-            return p
-
-    # name substring or keywords
-    for p in filtered:
-        name = p["name"].lower()
-        if all(tok in name for tok in ref.split() if len(tok) > 2):
-            return p
-    for p in cand:
-        for tok in ref.split():
-            if len(tok) > 2 and tok in p["name"].lower():
-                return p
-
-    # numeric index like '2' -> second
-    for token in ref.split():
-        if token.isdigit():
-            idx = int(token) - 1
-            if 0 <= idx < len(filtered):
-                return filtered[idx]
-
-    # fallback: if user said 'second phone' but we couldn't match earlier, try overall cand ordinals
-    for word, idx in ordinals.items():
-        if word in ref and idx < len(cand):
-            return cand[idx]
 
-    return None
+def _add_recent_order(order: Dict):
+    def add(record: Optional[Dict]) -> Dict:
+        record = record or {"orders": []}
+        record["orders"] = (record["orders"] + [order])[-RECENT_ORDERS_PER_CUSTOMER:]
+        return record
 
+    return add
 
-@function_tool
-async def show_catalog(
-    ctx: RunContext[Userdata],
-    q: Annotated[Optional[str], Field(description="Search query (optional)", default=None)] = None,
-    category: Annotated[Optional[str], Field(description="Category (optional)", default=None)] = None,
-    max_price: Annotated[Optional[int], Field(description="Maximum price (optional)", default=None)] = None,
-    color: Annotated[Optional[str], Field(description="Color (optional)", default=None)] = None,
-) -> str:
-    """Return a short spoken summary of matching products (name, price, id).
-    Improvements:
-    - Recognize category synonyms like 'phones' and 'tees'.
-    - Return up to 8 items and explicitly call out mobiles if present.
-    """
-    userdata = ctx.userdata
-    # try to normalize category input
-    if category:
-        cat = category.lower()
-        if cat in ("phone", "phones", "mobile", "mobile phone", "mobiles"):
-            category = "mobile"
-        elif cat in ("tshirt", "t-shirts", "tees", "tee"):
-            category = "tshirt"
-        else:
-            category = cat
-    # If query mentions phones, prefer category mobile
-    if not category and q:
-        if any(w in q.lower() for w in ("phone", "phones", "mobile", "mobiles")):
-            category = "mobile"
-        if any(w in q.lower() for w in ("tee", "tshirt", "t-shirts", "tees")):
-            category = "tshirt"
 
-    filters = {"q": q, "category": category, "max_price": max_price, "color": color}
-    prods = list_products({k: v for k, v in filters.items() if v is not None})
-    if not prods:
-        return "Sorry — I couldn't find any items that match. Would you like to try another search?"
-    # Summarize top 8
-    lines = [f"Here are the top {min(8, len(prods))} items I found at Sahoo Babu Shop:"]
-    for idx, p in enumerate(prods[:8], start=1):
-        size_info = f" (sizes: {', '.join(p['sizes'])})" if p.get('sizes') else ""
-        lines.append(f"{idx}. {p['name']} — {p['price']} {p['currency']} (id: {p['id']}){size_info}")
-    lines.append("You can say: 'I want the second item in size M' or 'add mug-001 to my cart, quantity 2'.")
-    # If mobiles were in results, add a short phrasing hint
-    if any(p.get('category') == 'mobile' for p in prods):
-        lines.append("To buy a phone say: 'Add phone-002 to my cart' or 'I want the second phone, quantity 1'.")
-    return "\n".join(lines)
+async def _index_customer_order(keys: List[str], order: Dict):
+    # Locked read-modify-write, so two sessions ordering at once don't drop each other's order
+    for key in keys:
+        await customer_index.update("customers", key, _add_recent_order(order))
+
+
+async def get_customer_last_order(keys: List[str]) -> Optional[Dict]:
+    """The customer's most recent order under any of their keys, without reading the order log."""
+    latest = None
+    for key in keys:
+        record = await customer_index.get("customers", key)
+        if record and record["orders"]:
+            order = record["orders"][-1]
+            if latest is None or order["created_at"] > latest["created_at"]:
+                latest = order
+    return latest
+
+
+def _price_filter(value) -> Optional[int]:
+    try:
+        return int(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
 
+def list_products(filters: Optional[Dict] = None, limit: Optional[int] = None) -> List[Dict]:
+    """Filter by category, max_price, color, size or query words using CATALOG_INDEX.
 
-def find_product_by_ref(ref_text: str, candidates: Optional[List[Dict]] = None) -> Optional[Dict]:
-    """Resolve references like 'second hoodie' or 'black hoodie' to a product dict.
-    Very simple heuristic: look for ordinal words, color or exact id/name matching.
+    - Category names go through the alias table in search_terms.json ('tees' -> 'clothing'),
+      and match by substring if no category has that exact name.
+    - Supports a flexible max_price and min_price (if provided in filters).
+    - A query ranks the results by relevance (BM25); without one they are in catalog order.
+    - With a limit only that many results are ranked and returned.
     """
-    ref = (ref_text or "").lower().strip()
-    cand = candidates if candidates is not None else CATALOG
+    filters = filters or {}
+    return CATALOG_INDEX.filter(
+        category=filters.get("category"),
+        color=filters.get("color"),
+        size=filters.get("size"),
+        min_price=_price_filter(filters.get("min_price") or filters.get("from") or filters.get("min")),
+        max_price=_price_filter(filters.get("max_price") or filters.get("to") or filters.get("max")),
+        q=filters.get("q"),
+        limit=limit,
+    )
 
-    # ordinal handling
-    ordinals = {"first": 0, "second": 1, "third": 2}
-    for word, idx in ordinals.items():
-        if word in ref:
-            if idx < len(cand):
-                return cand[idx]
 
-    # direct id match
-    for p in cand:
-        if p["id"].lower() == ref:
-            return p
-
-    # color + category matching
-    for p in cand:
-        if p.get("color") and p["color"] in ref and p.get("category") and p["category"] in ref:
-            return p
-
-    # name substring
-    for p in cand:
-        if p["name"].lower() in ref or any(w in p["name"].lower() for w in ref.split()):
-            return p
-
-    # fallback: if a number present, try to parse as '2nd of last list'
-    for token in ref.split():
-        if token.isdigit():
-            idx = int(token) - 1
-            if 0 <= idx < len(cand):
-                return cand[idx]
+# Words that point into the list the customer just heard
+ORDINALS = {"first": 0, "1st": 0, "second": 1, "2nd": 1, "third": 2, "3rd": 2, "fourth": 3, "4th": 3, "last": -1}
+CHEAPER_WORDS = {"cheaper", "cheapest", "cheap", "affordable"}
+PRICIER_WORDS = {"pricier", "priciest", "expensive", "premium", "costlier"}
+THAT_ONE_WORDS = {"that", "this", "it", "same"}
+REFERENCE_WORDS = set(ORDINALS) | CHEAPER_WORDS | PRICIER_WORDS | THAT_ONE_WORDS | {
+    "one", "item", "more", "less", "least", "most", "number", "option", "want", "like", "take", "get",
+}
+# Said around a reference ("I want the second item in size M, please") but never describing a product
+FILLER_WORDS = {
+    "i", "my", "please", "size", "sizes", "add", "cart", "to", "can", "you", "would", "need", "buy", "order",
+    "quantity", "qty", "give", "put",
+}
+SIZE_WORDS = {size.lower() for size in CATALOG_INDEX.by_size}
+
+
+def find_product_by_ref(
+    ref_text: str,
+    last_results: Optional[List[Dict]] = None,
+    last_product: Optional[Dict] = None,
+) -> Optional[Dict]:
+    """Resolve references like 'the second one', 'that one', 'the cheaper one' or 'black hoodie'.
+
+    Ordinals and comparisons are read against last_results, the page show_catalog
+    last read out, and 'that one' is last_product, the last product talked about.
+    Ids and descriptions that don't point into that page are looked up in CATALOG_INDEX.
+    """
+    ref = (ref_text or "").lower().strip()
+    page = last_results or []
 
+    # direct id match
+    prod = CATALOG_INDEX.get(ref)
+    if prod:
+        return prod
+
+    tokens = re.findall(r"[a-z0-9]+", ref)
+    # What's left once reference and filler words are gone, keeping only words the catalog knows
+    words = [
+        t for t in tokens
+        if t not in REFERENCE_WORDS and t not in FILLER_WORDS and t not in SIZE_WORDS and t not in STOPWORDS
+        and not t.isdigit() and CATALOG_INDEX.expand(t)
+    ]
+    idx = None
+    for t in tokens:
+        if t in ORDINALS:
+            idx = ORDINALS[t]
+        elif t.isdigit() and idx is None:
+            idx = int(t) - 1
+
+    # "the second hoodie": count among the listed hoodies. A description that
+    # fits nothing listed ("the second mug" after a page of tees) is looked up
+    # in the catalog instead.
+    cands = [p for p in page if CATALOG_INDEX.describes(p, " ".join(words))] if words else page
+    if cands:
+        if idx is not None and -len(cands) <= idx < len(cands):
+            return cands[idx]
+        if idx is None and CHEAPER_WORDS.intersection(tokens):
+            return min(cands, key=lambda p: p.get("price", 0))
+        if idx is None and PRICIER_WORDS.intersection(tokens):
+            return max(cands, key=lambda p: p.get("price", 0))
+        if idx is None and words:
+            return cands[0]
+
+    if THAT_ONE_WORDS.intersection(tokens) and not words:
+        if last_product:
+            return last_product
+        if len(page) == 1:
+            return page[0]
+
+    if words:
+        # Ranked as show_catalog would list them: 'second hoodie' is the second one it would read out
+        matches = CATALOG_INDEX.filter(q=" ".join(words))
+        if idx is not None and -len(matches) <= idx < len(matches):
+            return matches[idx]
+        if matches:
+            return matches[0]
+    # Nothing described matched, but an ordinal still points into the page
+    if idx is not None and -len(page) <= idx < len(page):
+        return page[idx]
     return None
 
 
-def create_order_object(line_items: List[Dict], currency: str = "INR") -> Dict:
+async def create_order_object(line_items: List[Dict], currency: str = "INR", customer: Optional[Dict] = None) -> Dict:
     """line_items: [{product_id, quantity, attrs}]
-    Returns an order dict (id, items, total, currency, created_at)
+    Returns an order dict (id, items, total, currency, created_at, customer)
     """
     items = []
     total = 0
     for li in line_items:
         pid = li.get("product_id")
         qty = int(li.get("quantity", 1))
-        prod = next((p for p in CATALOG if p["id"] == pid), None)
+        prod = CATALOG_INDEX.get(pid)
         if not prod:
             raise ValueError(f"Product {pid} not found")
         line_total = prod["price"] * qty
@@ -329,17 +349,18 @@ def create_order_object(line_items: List[Dict], currency: str = "INR") -> Dict:
         "total": total,
         "currency": currency,
         "created_at": datetime.utcnow().isoformat() + "Z",
+        "customer": customer or {},
     }
     # persist
-    _save_order(order)
+    await _save_order(order)
     return order
 
 
-def get_most_recent_order() -> Optional[Dict]:
-    all_orders = _load_all_orders()
-    if not all_orders:
+async def get_most_recent_order() -> Optional[Dict]:
+    recent = await _load_recent_orders(1)
+    if not recent:
         return None
-    return all_orders[-1]
+    return recent[-1]
 
 # -------------------------
 # Agent Tools (function_tool) exposed to the LLM layer
@@ -356,12 +377,14 @@ async def show_catalog(
     """Return a short spoken summary of matching products (name, price, id)."""
     userdata = ctx.userdata
     filters = {"q": q, "category": category, "max_price": max_price, "color": color}
-    prods = list_products({k: v for k, v in filters.items() if v is not None})
+    # Only the four best matches are ranked and read out
+    prods = list_products({k: v for k, v in filters.items() if v is not None}, limit=4)
     if not prods:
         return "Sorry — I couldn't find any items that match. Would you like to try another search?"
-    # Summarize top 4
-    lines = [f"Here are the top {min(4, len(prods))} items I found at Sahoo Babu Shop:"]
-    for idx, p in enumerate(prods[:4], start=1):
+    # Summarize top 4; that page is what 'the second one' or 'the cheaper one' refers to next
+    userdata.last_results = prods
+    lines = [f"Here are the top {len(userdata.last_results)} items I found at Sahoo Babu Shop:"]
+    for idx, p in enumerate(userdata.last_results, start=1):
         lines.append(f"{idx}. {p['name']} — {p['price']} {p['currency']} (id: {p['id']})")
     lines.append("You can say: 'I want the second item in size M' or 'add mug-001 to my cart, quantity 2'.")
     return "\n".join(lines)
@@ -376,16 +399,14 @@ async def add_to_cart(
 ) -> str:
     """Resolve a product and add to the session cart."""
     userdata = ctx.userdata
-    # take recent catalog as candidates
-    candidates = CATALOG
-    prod = find_product_by_ref(product_ref, candidates)
+    # ordinals and 'that one' refer to what the customer last heard
+    prod = find_product_by_ref(product_ref, userdata.last_results, userdata.last_product)
     if not prod:
         return "I couldn't resolve which product you meant. Try using the item id or say 'show catalog' to hear options.'"
-    userdata.cart.append({
-        "product_id": prod["id"],
-        "quantity": int(quantity),
-        "attrs": {"size": size} if size else {},
-    })
+    if int(quantity) <= 0:
+        return "Please tell me how many you'd like — at least one."
+    userdata.cart.add(prod, int(quantity), {"size": size} if size else {})
+    userdata.last_product = prod
     userdata.history.append({
         "time": datetime.utcnow().isoformat() + "Z",
         "action": "add_to_cart",
@@ -403,17 +424,11 @@ async def show_cart(
     if not userdata.cart:
         return "Your cart is empty. You can say 'show catalog' to browse items.'"
     lines = ["Items in your cart:"]
-    total = 0
     for li in userdata.cart:
-        p = next((x for x in CATALOG if x["id"] == li["product_id"]), None)
-        if not p:
-            continue
-        line_total = p["price"] * li.get("quantity", 1)
-        total += line_total
-        sz = li.get("attrs", {}).get("size")
+        sz = li.attrs.get("size")
         sz_text = f", size {sz}" if sz else ""
-        lines.append(f"- {p['name']} x {li['quantity']}{sz_text}: {line_total} INR")
-    lines.append(f"Cart total: {total} INR")
+        lines.append(f"- {li.product['name']} x {li.quantity}{sz_text}: {li.line_total} INR")
+    lines.append(f"Cart total: {userdata.cart.total} INR")
     lines.append("Say 'place my order' to checkout or 'clear cart' to empty the cart.")
     return "\n".join(lines)
 
@@ -423,7 +438,7 @@ async def clear_cart(
     ctx: RunContext[Userdata],
 ) -> str:
     userdata = ctx.userdata
-    userdata.cart = []
+    userdata.cart.clear()
     userdata.history.append({"time": datetime.utcnow().isoformat() + "Z", "action": "clear_cart"})
     return "Your cart has been cleared. What would you like to do next?"
 
@@ -441,24 +456,47 @@ async def place_order(
     line_items = []
     for li in userdata.cart:
         line_items.append({
-            "product_id": li["product_id"],
-            "quantity": li.get("quantity", 1),
-            "attrs": li.get("attrs", {}),
+            "product_id": li.product["id"],
+            "quantity": li.quantity,
+            "attrs": li.attrs,
         })
-    order = create_order_object(line_items)
+    order = await create_order_object(
+        line_items, customer={"name": userdata.player_name, "identity": userdata.customer_id}
+    )
+    await _index_customer_order(customer_keys(userdata), order)
     userdata.orders.append(order)
     userdata.history.append({"time": datetime.utcnow().isoformat() + "Z", "action": "place_order", "order_id": order["id"]})
     # clear cart after order
-    userdata.cart = []
+    userdata.cart.clear()
     return f"Order placed. Order ID {order['id']}. Total {order['total']} {order['currency']}. What would you like to do next?"
 
 
+@function_tool
+async def set_customer_name(
+    ctx: RunContext[Userdata],
+    name: Annotated[str, Field(description="The customer's name")],
+) -> str:
+    """Remember the customer's name, so their past orders can be found in later visits."""
+    ctx.userdata.player_name = name.strip()
+    return f"Nice to meet you, {ctx.userdata.player_name}!"
+
+
+async def _last_order_for(userdata: Userdata) -> Optional[Dict]:
+    if userdata.orders:
+        return userdata.orders[-1]
+    return await get_customer_last_order(customer_keys(userdata))
+
+
 @function_tool
 async def last_order(
     ctx: RunContext[Userdata],
 ) -> str:
-    ord = get_most_recent_order()
+    """Tell the customer what they ordered last time."""
+    userdata = ctx.userdata
+    ord = await _last_order_for(userdata)
     if not ord:
+        if not userdata.player_name:
+            return "I couldn't find a past order for you. If you tell me your name, I can look again."
         return "You have no past orders yet."
     lines = [f"Most recent order: {ord['id']} — {ord['created_at']}"]
     for it in ord['items']:
@@ -466,6 +504,32 @@ async def last_order(
     lines.append(f"Total: {ord['total']} {ord['currency']}")
     return "\n".join(lines)
 
+
+@function_tool
+async def reorder_last_order(
+    ctx: RunContext[Userdata],
+) -> str:
+    """Put everything from the customer's last order back into their cart."""
+    userdata = ctx.userdata
+    ord = await _last_order_for(userdata)
+    if not ord:
+        return "I couldn't find a past order to repeat. If you tell me your name, I can look again."
+    added, missing = [], []
+    for it in ord["items"]:
+        prod = CATALOG_INDEX.get(it["product_id"])
+        if not prod:
+            missing.append(it["name"])
+            continue
+        userdata.cart.add(prod, it["quantity"], it.get("attrs") or {})
+        added.append(f"{it['quantity']} x {prod['name']}")
+    userdata.history.append({"time": datetime.utcnow().isoformat() + "Z", "action": "reorder", "order_id": ord["id"]})
+    if not added:
+        return "None of the items from your last order are available anymore."
+    reply = f"Added {', '.join(added)} to your cart. Cart total: {userdata.cart.total} INR."
+    if missing:
+        reply += f" No longer available: {', '.join(missing)}."
+    return reply
+
 class GameMasterAgent(Agent):
     def __init__(self):
         # System instructions now describe the shopkeeper persona and commerce role
@@ -482,7 +546,8 @@ class GameMasterAgent(Agent):
         - Remember what's in their cart and reference it naturally
         
         Interaction guidelines:
-        - Use tools: show_catalog, add_to_cart, show_cart, clear_cart, place_order, last_order
+        - Use tools: show_catalog, add_to_cart, show_cart, clear_cart, place_order, last_order, reorder_last_order, set_customer_name
+        - When the customer tells you their name, remember it with set_customer_name
         - When showing products, mention product ID and price naturally (e.g., 'audio-001 at 2499 rupees')
         - Keep sentences short and voice-friendly - people are speaking, not typing
         - If they're browsing, ask what catches their interest
@@ -493,18 +558,21 @@ class GameMasterAgent(Agent):
         """
         super().__init__(
             instructions=instructions,
-            tools=[show_catalog, add_to_cart, show_cart, clear_cart, place_order, last_order],
+            tools=[
+                show_catalog, add_to_cart, show_cart, clear_cart, place_order,
+                last_order, reorder_last_order, set_customer_name,
+            ],
         )
 
 # -------------------------
 # Entrypoint & Prewarm (keeps speech functionality untouched)
 # -------------------------
 def prewarm(proc: JobProcess):
-    # load VAD model and stash on process userdata, try/catch like original file
+    # load and warm the pipeline models into process userdata, try/catch like original file
     try:
-        proc.userdata["vad"] = silero.VAD.load()
+        prewarm_pipeline(proc)
     except Exception:
-        logger.warning("VAD prewarm failed; continuing without preloaded VAD.")
+        logger.warning("Pipeline prewarm failed; continuing without preloaded VAD.")
 
 
 async def entrypoint(ctx: JobContext):
@@ -521,20 +589,33 @@ async def entrypoint(ctx: JobContext):
             style="Conversational",
             text_pacing=True,
         ),
-        turn_detection=MultilingualModel(),
+        turn_detection=turn_detector(ctx.proc),
         vad=ctx.proc.userdata.get("vad"),
         userdata=userdata,
     )
 
+    track_latency(ctx, session, agent="e-commerce-agent")
+
     # Start the agent session with the GameMasterAgent (Ramu Kaka)
+    agent = GameMasterAgent()
+    await instrument_tools(ctx, agent, name="e-commerce-agent")
+    await page_tool_outputs(agent)
+
     await session.start(
-        agent=GameMasterAgent(),
+        agent=agent,
         room=ctx.room,
-        room_input_options=RoomInputOptions(noise_cancellation=noise_cancellation.BVC()),
+        room_input_options=RoomInputOptions(noise_cancellation=ctx.proc.userdata.get("noise_cancellation")),
     )
 
     await ctx.connect()
 
+    try:
+        participant = await asyncio.wait_for(ctx.wait_for_participant(), timeout=10)
+    except asyncio.TimeoutError:
+        logger.info("No participant joined yet; past orders will be looked up by name")
+        return
+    identify_customer(userdata, participant)
+
 
 if __name__ == "__main__":
     cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
\ No newline at end of file
@@ -0,0 +1,251 @@
+import bisect
+import heapq
+import json
+import math
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Words that never narrow a search ("show me a blue hoodie")
+STOPWORDS = {"a", "an", "the", "of", "for", "and", "with", "in", "me", "show", "some", "any"}
+
+# BM25 parameters, and how much a word counts for by where it appears
+BM25_K1 = 1.2
+BM25_B = 0.75
+FIELD_WEIGHTS = {"name": 2.0, "category": 1.0, "color": 1.0, "description": 1.0}
+# A synonym or plural, or a longer word the query word starts, scores a little below the word itself
+SYNONYM_WEIGHT = 0.9
+PREFIX_WEIGHT = 0.8
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in re.findall(r"[a-z0-9]+", (text or "").lower()) if t not in STOPWORDS]
+
+
+def load_search_terms(path: str) -> Tuple[Dict[str, List[str]], Dict[str, List[str]]]:
+    """Synonyms ({catalog word: [words customers use]}) and category aliases
+    ({category: [other names for it]}) from search_terms.json.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}, {}
+    return data.get("synonyms", {}), data.get("category_aliases", {})
+
+
+class CatalogIndex:
+    """Lookup structures over the product catalog, built once at load time.
+
+    Products are referred to by their position in the catalog. Each facet
+    (category, color, size, and every word of a product's name, description,
+    category and color) maps to the set of positions that have it, prices are
+    kept sorted for range queries, and a query intersects the sets of the
+    filters it uses, so browsing cost depends on the size of the result
+    rather than of the catalog.
+
+    Free-text queries are ranked with BM25 over the same words, after the
+    customer's words are mapped to the catalog's through the synonym and
+    category alias tables. Only the top results are ever sorted.
+    """
+
+    def __init__(
+        self,
+        products: List[Dict],
+        synonyms: Optional[Dict[str, List[str]]] = None,
+        category_aliases: Optional[Dict[str, List[str]]] = None,
+    ):
+        self.products = products
+        self.by_id: Dict[str, Dict] = {}
+        self.position_of: Dict[str, int] = {}
+        self.by_category: Dict[str, Set[int]] = defaultdict(set)
+        self.by_color: Dict[str, Set[int]] = defaultdict(set)
+        self.by_size: Dict[str, Set[int]] = defaultdict(set)
+        # word -> {position: term frequency, weighted by field}
+        self.postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self.doc_lengths: List[float] = []
+        # Products without a color pass any color filter
+        self.colorless: Set[int] = set()
+
+        for pos, p in enumerate(products):
+            self.by_id[p["id"].lower()] = p
+            self.position_of[p["id"].lower()] = pos
+            self.by_category[p.get("category", "").lower()].add(pos)
+            if p.get("color"):
+                self.by_color[p["color"].lower()].add(pos)
+            else:
+                self.colorless.add(pos)
+            for size in p.get("sizes") or []:
+                self.by_size[size.upper()].add(pos)
+            length = 0.0
+            for field, weight in FIELD_WEIGHTS.items():
+                for token in tokenize(p.get(field) or ""):
+                    self.postings[token][pos] = self.postings[token].get(pos, 0.0) + weight
+                    length += weight
+            self.doc_lengths.append(length)
+
+        # A color filter keeps the colorless products too, so they're added to every color's set
+        for positions in self.by_color.values():
+            positions |= self.colorless
+
+        # Parallel arrays sorted by price, for bisect range queries
+        order = sorted(range(len(products)), key=lambda pos: products[pos].get("price", 0))
+        self.price_keys = [products[pos].get("price", 0) for pos in order]
+        self.price_positions = order
+        # Sorted vocabulary, for prefix matches on partial words ("ear" -> "earbuds")
+        self.vocabulary = sorted(self.postings)
+        self.avg_length = sum(self.doc_lengths) / len(self.doc_lengths) if self.doc_lengths else 0.0
+
+        # What customers say -> the catalog's categories and words
+        self.category_aliases: Dict[str, str] = {}
+        self.synonyms: Dict[str, Set[str]] = defaultdict(set)
+        for category, aliases in (category_aliases or {}).items():
+            for alias in aliases:
+                self.category_aliases[" ".join(alias.lower().split())] = category
+                words = tokenize(alias)
+                if len(words) == 1:
+                    self.synonyms[words[0]].add(category)
+        for word, spoken in (synonyms or {}).items():
+            for alias in spoken:
+                for token in tokenize(alias):
+                    self.synonyms[token].add(word)
+
+    def get(self, product_id: str) -> Optional[Dict]:
+        return self.by_id.get((product_id or "").lower())
+
+    def canonical_category(self, category: str) -> str:
+        """The catalog's name for a category as the customer said it ('tees' -> 'clothing')"""
+        category = " ".join(category.lower().split())
+        return self.category_aliases.get(category, category)
+
+    def color_positions(self, color: str) -> Set[int]:
+        """Products in a color, or in the catalog's word for it ('gray' -> 'grey')"""
+        color = color.lower().strip()
+        if color in self.by_color:
+            return self.by_color[color]
+        for word in self.synonyms.get(color, ()):
+            if word in self.by_color:
+                return self.by_color[word]
+        return self.colorless
+
+    def category_positions(self, category: str) -> Set[int]:
+        """Products whose category equals, contains or is contained in the given one"""
+        category = self.canonical_category(category)
+        if category in self.by_category:
+            return self.by_category[category]
+        matched: Set[int] = set()
+        for name, positions in self.by_category.items():
+            if name and (category in name or name in category):
+                matched |= positions
+        return matched
+
+    def price_positions_between(self, min_price: Optional[float], max_price: Optional[float]) -> Set[int]:
+        lo = bisect.bisect_left(self.price_keys, min_price) if min_price is not None else 0
+        hi = bisect.bisect_right(self.price_keys, max_price) if max_price is not None else len(self.price_keys)
+        return set(self.price_positions[lo:hi])
+
+    def expand(self, token: str) -> Dict[str, float]:
+        """The catalog words a query word stands for, and how much each counts"""
+        terms: Dict[str, float] = {}
+        if token in self.postings:
+            terms[token] = 1.0
+        for word in self.synonyms.get(token, ()):
+            if word in self.postings:
+                terms.setdefault(word, SYNONYM_WEIGHT)
+        if token.endswith("s") and token[:-1] in self.postings:
+            terms.setdefault(token[:-1], SYNONYM_WEIGHT)
+        if len(token) >= 3:
+            start = bisect.bisect_left(self.vocabulary, token)
+            end = bisect.bisect_left(self.vocabulary, token + "\uffff")
+            for term in self.vocabulary[start:end]:
+                terms.setdefault(term, PREFIX_WEIGHT)
+        return terms
+
+    def describes(self, product: Dict, q: str) -> bool:
+        """Whether every word of q is one of the product's words, or a synonym, plural or start of one"""
+        pos = self.position_of.get(product["id"].lower())
+        if pos is None:
+            return False
+        return all(
+            any(pos in self.postings[term] for term in self.expand(token)) for token in set(tokenize(q))
+        )
+
+    def _bm25(self, term: str, pos: int, tf: float) -> float:
+        df = len(self.postings[term])
+        idf = math.log(1 + (len(self.products) - df + 0.5) / (df + 0.5))
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[pos] / (self.avg_length or 1.0))
+        return idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+    def search(self, q: str, within: Optional[Set[int]] = None, limit: Optional[int] = None) -> List[int]:
+        """Positions of the products matching q, best first.
+
+        Products matching the most query words come first, then the highest
+        BM25 scores, then catalog order. With a limit, only that many are sorted.
+        """
+        # position -> [query words matched, score]
+        hits: Dict[int, List[float]] = defaultdict(lambda: [0, 0.0])
+        for token in set(tokenize(q)):
+            # Each query word counts once per product, for its best-scoring catalog word
+            best: Dict[int, float] = {}
+            for term, weight in self.expand(token).items():
+                for pos, tf in self.postings[term].items():
+                    if within is not None and pos not in within:
+                        continue
+                    score = weight * self._bm25(term, pos, tf)
+                    if score > best.get(pos, 0.0):
+                        best[pos] = score
+            for pos, score in best.items():
+                hit = hits[pos]
+                hit[0] += 1
+                hit[1] += score
+        if not hits:
+            return []
+        # Products matching every query word if there are any, else the ones matching the most
+        coverage = max(hit[0] for hit in hits.values())
+        matched = [pos for pos, hit in hits.items() if hit[0] == coverage]
+
+        def rank(pos: int) -> Tuple[float, int]:
+            return -hits[pos][1], pos
+
+        if limit is None:
+            return sorted(matched, key=rank)
+        return heapq.nsmallest(limit, matched, key=rank)
+
+    def intersect(self, sets: Iterable[Set[int]]) -> Set[int]:
+        """Intersection of the sets, smallest first; every product if there are none"""
+        sets = sorted(sets, key=len)
+        if not sets:
+            return set(range(len(self.products)))
+        result = set(sets[0])
+        for s in sets[1:]:
+            if not result:
+                break
+            result &= s
+        return result
+
+    def filter(
+        self,
+        category: Optional[str] = None,
+        color: Optional[str] = None,
+        size: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        q: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict]:
+        """Products matching all the given filters: ranked by q if given, else in catalog order"""
+        sets = []
+        if category:
+            sets.append(self.category_positions(category))
+        if color:
+            sets.append(self.color_positions(color))
+        if size:
+            sets.append(self.by_size.get(size.upper(), set()))
+        if min_price is not None or max_price is not None:
+            sets.append(self.price_positions_between(min_price, max_price))
+        if q and tokenize(q):
+            positions = self.search(q, self.intersect(sets) if sets else None, limit)
+        else:
+            within = self.intersect(sets)
+            positions = sorted(within) if limit is None else heapq.nsmallest(limit, within)
+        return [self.products[pos] for pos in positions]
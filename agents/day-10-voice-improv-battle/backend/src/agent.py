@@ -1,4 +1,7 @@
+import asyncio
 import logging
+import sys
+from pathlib import Path
 import random
 from typing import Optional, Annotated
 from enum import Enum
@@ -17,10 +20,17 @@ from livekit.agents import (
     WorkerOptions,
     cli,
     function_tool,
+    get_job_context,
     RunContext,
 )
-from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
-from livekit.plugins.turn_detector.multilingual import MultilingualModel
+from livekit.plugins import murf, google, deepgram
+
+# Shared runtime helpers (voice_runtime/) live at the repository root
+sys.path.append(str(Path(__file__).resolve().parents[4]))
+from voice_runtime.instrumentation import instrument_tools
+from voice_runtime.latency import track_latency
+from voice_runtime.models import prewarm_pipeline, turn_detector
+from voice_runtime.tts_cache import CachedTTS, say_cached
 
 # -------------------------
 # Logging
@@ -292,15 +302,18 @@ Follow the 3-round sequence: explain_game_rules -> start_game -> present_scenari
         logger.info(f"User said (snippet): {user_text[:120]}")
 
 
-    async def on_session_start(self, session: AgentSession) -> None:
+    async def on_enter(self) -> None:
+        session = self.session
+        participants = []
         # Wait for at least one remote participant to appear, but proceed gracefully if none
         try:
-            await session.wait_for_user(timeout_seconds=6)
+            job_ctx = get_job_context()
+            await asyncio.wait_for(job_ctx.wait_for_participant(), timeout=6)
+            participants = list(job_ctx.room.remote_participants.values())
         except Exception:
             # proceed; we will ask for name if not available
-            logger.info("wait_for_user timed out or not available; continuing")
+            logger.info("wait_for_participant timed out or not available; continuing")
 
-        participants = list(session.room.remote_participants.values())
         player_name = None
 
         if participants:
@@ -314,6 +327,7 @@ Follow the 3-round sequence: explain_game_rules -> start_game -> present_scenari
         if player_name:
             state.player_name = player_name
             state.phase = GamePhase.INTRO
+            # Personalized, so synthesized fresh rather than cached
             await session.say(
                 f"Hey {player_name}! Welcome to Improv Battle - the voice improv game show! Want me to explain how it works?",
                 add_to_chat_ctx=True,
@@ -321,7 +335,9 @@ Follow the 3-round sequence: explain_game_rules -> start_game -> present_scenari
             logger.info(f"Session started with player: {player_name}")
         else:
             state.phase = GamePhase.INTRO
-            await session.say(
+            # The same welcome every time, so it plays from the TTS cache
+            await say_cached(
+                session,
                 "Hey there! Welcome to Improv Battle - the voice improv game show! What's your name?",
                 add_to_chat_ctx=True,
             )
@@ -333,10 +349,10 @@ Follow the 3-round sequence: explain_game_rules -> start_game -> present_scenari
 # -------------------------
 def prewarm(proc: JobProcess):
     try:
-        proc.userdata["vad"] = silero.VAD.load()
-        logger.info("VAD preloaded")
+        prewarm_pipeline(proc)
+        logger.info("Voice pipeline preloaded")
     except Exception:
-        logger.warning("VAD prewarm failed; continuing without preloaded VAD")
+        logger.warning("Pipeline prewarm failed; continuing without preloaded VAD")
         proc.userdata["vad"] = None
 
 
@@ -347,22 +363,26 @@ async def entrypoint(ctx: JobContext):
     session = AgentSession(
         stt=deepgram.STT(model="nova-3"),
         llm=google.LLM(model="gemini-2.5-flash"),
-        tts=murf.TTS(
+        tts=CachedTTS(murf.TTS(
             voice="Matthew",
             style="Conversational",
             text_pacing=True,
-        ),
-        turn_detection=MultilingualModel(),
+        )),
+        turn_detection=turn_detector(ctx.proc),
         vad=ctx.proc.userdata.get("vad"),
         preemptive_generation=True,
         userdata=userdata,
     )
 
     agent = ImprovHostAssistant()
+    track_latency(ctx, session, agent="voice-improv-battle")
+
+    await instrument_tools(ctx, agent, name="voice-improv-battle")
+
     await session.start(
         agent=agent,
         room=ctx.room,
-        room_input_options=RoomInputOptions(noise_cancellation=noise_cancellation.BVC()),
+        room_input_options=RoomInputOptions(noise_cancellation=ctx.proc.userdata.get("noise_cancellation")),
     )
 
     await ctx.connect()
@@ -0,0 +1,15 @@
+import pytest
+
+from voice_runtime.bench import SCENARIOS, run_scenario
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("scenario", SCENARIOS, ids=lambda s: s.name)
+async def test_scenario_runs_offline(scenario) -> None:
+    """Every scripted turn reaches its tools without errors, with no network"""
+    timings = await run_scenario(scenario)
+
+    assert len(timings) == len(scenario.turns)
+    for timing in timings:
+        assert timing.errors == []
+        assert 0 <= timing.tool_ms <= timing.total_ms
@@ -0,0 +1,54 @@
+import pytest
+from livekit.agents import Agent, AgentSession, function_tool
+
+from voice_runtime.context import SUMMARY_PREFIX, attach_compactor, history_tokens
+from voice_runtime.fakes import FakeLLM, ScriptedTurn
+
+
+class CaseAgent(Agent):
+    def __init__(self) -> None:
+        super().__init__(instructions="You are a fraud officer.")
+
+    @function_tool
+    async def get_fraud_case(self, username: str) -> str:
+        """Load the case for a customer"""
+        return f"Case for {username}: 89,999 rupees at Croma, card ending 4321"
+
+    @function_tool
+    async def lookup_branch(self, city: str) -> str:
+        """Find the nearest branch"""
+        return f"Branch in {city}: MG Road"
+
+
+@pytest.mark.asyncio
+async def test_history_is_summarized_and_case_kept() -> None:
+    fake_llm = FakeLLM()
+    summary_llm = FakeLLM()
+    summary_llm.turn = ScriptedTurn("", [], "Rahul was asked about a Croma purchase.")
+    turns = [
+        ScriptedTurn("This is Rahul Sharma", [("get_fraud_case", {"username": "Rahul Sharma"})], "Thanks Rahul. " * 20),
+        ScriptedTurn("Where is my branch?", [("lookup_branch", {"city": "Pune"})], "It is on MG Road. " * 20),
+    ] + [ScriptedTurn(f"Question {n}", [], "Let me explain that in detail. " * 20) for n in range(6)]
+
+    async with AgentSession(llm=fake_llm) as session:
+        compactor = attach_compactor(
+            session, max_tokens=300, keep_last_turns=2, keep_tools=("get_fraud_case",), summary_llm=summary_llm
+        )
+        agent = CaseAgent()
+        await session.start(agent)
+        for turn in turns:
+            fake_llm.turn = turn
+            await session.run(user_input=turn.user_input)
+            if compactor._task:
+                await compactor._task
+
+        items = agent.chat_ctx.items
+        assert compactor.compactions >= 1
+        assert items[0].role == "system"
+        summaries = [i for i in items if i.type == "message" and (i.text_content or "").startswith(SUMMARY_PREFIX)]
+        assert len(summaries) == 1
+        outputs = [i.name for i in items if i.type == "function_call_output"]
+        assert outputs == ["get_fraud_case"]
+        user_messages = [i.text_content for i in items if i.type == "message" and i.role == "user"]
+        assert user_messages[-2:] == ["Question 4", "Question 5"]
+        assert history_tokens(agent.chat_ctx) < 600
@@ -0,0 +1,150 @@
+from types import SimpleNamespace
+
+import pytest
+
+from voice_runtime.agents import AGENTS_BY_NAME, load_agent_module
+from voice_runtime.bench import isolated_backend
+
+
+@pytest.fixture
+def sandbox():
+    """A throwaway copy of the e-commerce backend, so tests never touch its orders.json"""
+    with isolated_backend(AGENTS_BY_NAME["e-commerce-agent"]) as spec:
+        yield spec
+
+
+@pytest.fixture
+def shop(sandbox):
+    return load_agent_module(sandbox)
+
+
+def test_cart_keeps_running_totals(shop) -> None:
+    cart = shop.Cart()
+    hoodie = next(p for p in shop.CATALOG if p.get("sizes"))
+    mug = next(p for p in shop.CATALOG if not p.get("sizes"))
+
+    cart.add(hoodie, 1, {"size": "M"})
+    cart.add(hoodie, 2, {"size": "M"})
+    cart.add(hoodie, 1, {"size": "L"})
+    cart.add(mug, 2)
+
+    # Same product and size share a line
+    assert [line.quantity for line in cart] == [3, 1, 2]
+    assert cart.item_count == 6
+    assert cart.total == 4 * hoodie["price"] + 2 * mug["price"]
+    assert sum(line.line_total for line in cart) == cart.total
+
+    cart.clear()
+    assert not cart and cart.total == 0 and cart.item_count == 0
+
+
+def test_list_products_intersects_facets(shop) -> None:
+    def ids(**filters):
+        return [p["id"] for p in shop.list_products(filters)]
+
+    assert ids(category="clothing", color="black", size="m") == ["tee-002", "hoodie-002"]
+    assert all(500 <= p["price"] <= 1000 for p in shop.list_products({"max_price": "1000", "min": 500}))
+    # Query words match name and description words, or their starts
+    assert ids(q="ear") == ["audio-001", "audio-002"]
+    assert ids(q="hoodie", color="navy") == []
+    # A bad price is ignored rather than failing the search
+    assert len(ids(max_price="abc")) == len(shop.CATALOG)
+    assert shop.CATALOG_INDEX.get("AUDIO-001")["name"] == "Wireless Earbuds Pro"
+
+
+@pytest.mark.asyncio
+async def test_orders_are_appended_to_a_log(shop, sandbox) -> None:
+    # The checked-in orders.json is imported into orders.jsonl on first use
+    imported = await shop.get_most_recent_order()
+    assert imported["id"] == "order-ae59773e"
+
+    order = await shop.create_order_object([{"product_id": "home-002", "quantity": 2}])
+    assert await shop.get_most_recent_order() == order
+    lines = (sandbox.backend_dir / "orders.jsonl").read_text().splitlines()
+    assert len(lines) == 2
+
+
+def test_order_log_ignores_store_backend_setting(sandbox, monkeypatch) -> None:
+    monkeypatch.setenv("VOICE_STORE_BACKEND", "json")
+    assert type(load_agent_module(sandbox).store.backend).__name__ == "JsonlBackend"
+
+
+@pytest.mark.asyncio
+async def test_last_order_is_per_customer(shop, sandbox) -> None:
+    asha = shop.Userdata(player_name="Asha  Rao", customer_id="identity-1")
+    ravi = shop.Userdata(customer_id="identity-2")
+
+    for userdata, product in [(asha, "tee-001"), (ravi, "home-002"), (asha, "acc-001")]:
+        order = await shop.create_order_object([{"product_id": product, "quantity": 1}])
+        await shop._index_customer_order(shop.customer_keys(userdata), order)
+
+    # Ravi's order is the newest overall, but Asha gets her own
+    last = await shop.get_customer_last_order(shop.customer_keys(asha))
+    assert [it["product_id"] for it in last["items"]] == ["acc-001"]
+    # A later visit under another identity finds her by name
+    returning = shop.Userdata(player_name="asha rao", customer_id="identity-3")
+    assert await shop.get_customer_last_order(shop.customer_keys(returning)) == last
+    assert await shop.get_customer_last_order(shop.customer_keys(shop.Userdata())) is None
+    assert (sandbox.backend_dir / "customers" / "name-asha-rao.json").exists()
+
+
+@pytest.mark.asyncio
+async def test_shared_participant_names_do_not_share_orders(shop, sandbox) -> None:
+    # The token route names every participant 'user', with a random identity
+    first, second = shop.Userdata(), shop.Userdata()
+    shop.identify_customer(first, SimpleNamespace(name="user", identity="voice_assistant_user_1234"))
+    shop.identify_customer(second, SimpleNamespace(name="user", identity="voice_assistant_user_5678"))
+    assert first.player_name is None and second.player_name is None
+
+    order = await shop.create_order_object([{"product_id": "tee-001", "quantity": 1}])
+    await shop._index_customer_order(shop.customer_keys(first), order)
+
+    assert await shop.get_customer_last_order(shop.customer_keys(first)) == order
+    assert await shop.get_customer_last_order(shop.customer_keys(second)) is None
+    assert not (sandbox.backend_dir / "customers" / "name-user.json").exists()
+
+
+def test_references_resolve_against_last_page(shop) -> None:
+    page = shop.list_products({"category": "clothing"})[:4]
+    assert [p["id"] for p in page] == ["tee-001", "tee-002", "tee-003", "hoodie-001"]
+
+    def ref(text, **kwargs):
+        prod = shop.find_product_by_ref(text, page, **kwargs)
+        return prod and prod["id"]
+
+    assert ref("the second one") == "tee-002"
+    # Filler and size words around an ordinal don't describe a product
+    assert ref("I want the second item") == "tee-002"
+    assert ref("the second item please") == "tee-002"
+    assert ref("I want the second item in size M") == "tee-002"
+    assert ref("the second hoodie in size L") == "hoodie-002"
+    assert ref("the last one") == "hoodie-001"
+    assert ref("the cheaper one") == "tee-001"
+    assert ref("the black one") == "tee-002"
+    # Only one hoodie was listed, so the second hoodie comes from the catalog
+    assert ref("the second hoodie") == "hoodie-002"
+    assert ref("the second hoodies") == "hoodie-002"
+    # Descriptions that fit nothing on the page never fall back to the page
+    assert ref("the second mug") == "home-002"
+    assert ref("2 mugs") == "home-002"
+    assert ref("the cheaper mug") == "home-002"
+    assert ref("the grey hoodie") == "hoodie-001"
+    assert ref("that one") is None
+    assert ref("that one", last_product=page[2]) == "tee-003"
+    assert ref("AUDIO-001") == "audio-001"
+    assert shop.find_product_by_ref("the second one") is None
+
+
+def test_search_ranks_with_synonyms(shop) -> None:
+    def top(limit=4, **filters):
+        return [p["id"] for p in shop.list_products(filters, limit=limit)]
+
+    # Both are wireless or headphones; the one that is headphones by name ranks first
+    assert top(q="wireless headphones") == ["audio-002", "audio-001"]
+    # Customer words and category names from search_terms.json
+    assert top(q="cup") == ["home-002"]
+    assert top(q="hoodies", color="gray") == ["hoodie-001"]
+    assert set(top(category="tees", max_price=700)) == {"tee-001", "tee-002", "tee-003"}
+    # There are no phones, and 'headphones' is not one
+    assert top(q="phones") == []
+    assert len(top(limit=2, q="clothing")) == 2
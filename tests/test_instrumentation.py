@@ -0,0 +1,47 @@
+import time
+
+import pytest
+from livekit.agents import Agent, AgentSession, RunContext, function_tool
+
+from voice_runtime import instrumentation
+from voice_runtime.fakes import FakeLLM, ScriptedTurn
+
+
+class _FakeJobContext:
+    def add_shutdown_callback(self, callback) -> None:
+        pass
+
+
+class _BlockingAgent(Agent):
+    def __init__(self) -> None:
+        super().__init__(instructions="Test agent")
+
+    @function_tool
+    async def blocking_lookup(self, context: RunContext, query: str) -> str:
+        """Look something up with a blocking call.
+
+        Args:
+            query: What to look up
+        """
+        time.sleep(0.3)
+        return f"found {query}"
+
+
+@pytest.mark.asyncio
+async def test_blocking_tool_is_timed_and_blamed() -> None:
+    agent = _BlockingAgent()
+    await instrumentation.instrument_tools(_FakeJobContext(), agent, name="test")
+
+    fake_llm = FakeLLM()
+    async with AgentSession(llm=fake_llm) as session:
+        await session.start(agent)
+        fake_llm.turn = ScriptedTurn("find tea", [("blocking_lookup", {"query": "tea"})], "Found it.")
+        result = await session.run(user_input="find tea")
+
+    outputs = [e.item for e in result.events if e.type == "function_call_output"]
+    assert outputs[0].output == "found tea"
+
+    stats = instrumentation.tool_stats["test/blocking_lookup"]
+    assert stats.calls == 1
+    assert stats.max_ms >= 300
+    assert stats.stalls == 1
@@ -0,0 +1,66 @@
+import time
+
+from livekit.agents import metrics
+
+from voice_runtime import latency
+
+
+def _eou(speech_id: str, delay: float) -> metrics.EOUMetrics:
+    return metrics.EOUMetrics(
+        timestamp=time.time(),
+        end_of_utterance_delay=delay,
+        transcription_delay=0.0,
+        on_user_turn_completed_delay=0.0,
+        speech_id=speech_id,
+    )
+
+
+def _llm(speech_id: str, ttft: float) -> metrics.LLMMetrics:
+    return metrics.LLMMetrics(
+        label="llm", request_id="r", timestamp=time.time(), duration=1.0, ttft=ttft,
+        cancelled=False, completion_tokens=1, prompt_tokens=1, prompt_cached_tokens=0,
+        total_tokens=2, tokens_per_second=1.0, speech_id=speech_id,
+    )
+
+
+def _tts(speech_id: str, ttfb: float) -> metrics.TTSMetrics:
+    return metrics.TTSMetrics(
+        label="tts", request_id="r", timestamp=time.time(), ttfb=ttfb, duration=1.0,
+        audio_duration=1.0, cancelled=False, characters_count=10, streamed=True, speech_id=speech_id,
+    )
+
+
+def test_histogram_quantiles() -> None:
+    histogram = latency.Histogram()
+    for _ in range(90):
+        histogram.observe(0.09)
+    for _ in range(10):
+        histogram.observe(2.5)
+
+    assert 0.075 <= histogram.quantile(0.5) <= 0.1
+    assert 2.0 <= histogram.quantile(0.95) <= 3.0
+    assert histogram.count == 100
+
+
+def test_turn_latency_sums_one_speech() -> None:
+    session = latency.SessionLatency("test-agent")
+    session.collect(_eou("speech_1", 0.2))
+    session.collect(_llm("speech_1", 0.4))
+    session.collect(_llm("speech_1", 0.9))  # second LLM call after a tool, not part of the turn
+    session.collect(_tts("speech_1", 0.3))
+
+    turn = session.histograms[latency.TURN_LATENCY]
+    assert turn.count == 1
+    assert abs(turn.total - 0.9) < 1e-9
+    assert session.histograms[latency.LLM_TTFT].count == 2
+
+
+def test_flush_and_render(tmp_path) -> None:
+    session = latency.SessionLatency("render-agent")
+    session.collect(_tts("speech_1", 0.12))
+    latency.flush(tmp_path)
+
+    text = latency.render_prometheus(latency.load_flushed(tmp_path))
+    assert 'voice_agent_tts_ttfb_seconds_count{agent="render-agent"} 1' in text
+    assert 'voice_agent_tts_ttfb_seconds_bucket{agent="render-agent",le="+Inf"} 1' in text
+    assert 'voice_agent_tts_ttfb_seconds_quantile{agent="render-agent",quantile="0.99"}' in text
@@ -0,0 +1,40 @@
+import pytest
+
+from voice_runtime.bench import SCENARIOS_BY_NAME
+from voice_runtime.load import StepResult, find_capacity, format_curve, run_step
+
+
+def _step(sessions: int, p95: float, lag: float = 5.0, errors: int = 0) -> StepResult:
+    return StepResult(
+        sessions=sessions, turns=10, errors=errors, duration_s=1.0, turn_p50_ms=p95 / 2,
+        turn_p95_ms=p95, turn_p99_ms=p95, lag_p95_ms=lag, lag_max_ms=lag, cpu_cores=0.1, rss_mb=100.0,
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_sessions_step() -> None:
+    scenario = SCENARIOS_BY_NAME["fraud-verification"]
+    result = await run_step(scenario, 3, rounds=1, think=0.0)
+
+    assert result.sessions == 3
+    assert result.turns == 3 * len(scenario.turns)
+    assert result.errors == 0
+    assert result.turn_p50_ms <= result.turn_p95_ms <= result.turn_p99_ms
+    assert result.rss_mb > 0
+
+
+def test_capacity_is_last_step_within_budget() -> None:
+    steps = [_step(1, 20), _step(4, 40), _step(16, 400), _step(32, 90)]
+    assert find_capacity(steps, max_p95_ms=250, max_lag_ms=100).sessions == 4
+    assert find_capacity([_step(1, 20, lag=150)], max_p95_ms=250, max_lag_ms=100) is None
+    assert find_capacity([_step(1, 20, errors=1)], max_p95_ms=250, max_lag_ms=100) is None
+
+
+def test_suggestion_is_limited_by_cpu_or_job_rss() -> None:
+    steps = [_step(1, 20), _step(4, 40)]
+    # 0.025 cores per session: 8 cores at 75% fit 240 sessions, 4 GB fits 40 job processes of 100 MB
+    curve = format_curve(steps, steps[1], cores=8, available_mb=4000)
+    assert "  CPU: 240 sessions" in curve
+    assert "  memory: 40 job processes" in curve
+    assert curve.endswith("VOICE_MAX_SESSIONS=40")
+    assert format_curve(steps, steps[1], cores=1, available_mb=64000).endswith("VOICE_MAX_SESSIONS=30")
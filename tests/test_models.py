@@ -0,0 +1,17 @@
+from livekit.agents import JobExecutorType, JobProcess
+
+from voice_runtime.models import prewarm_pipeline
+
+
+def test_prewarm_pipeline_caches_components() -> None:
+    proc = JobProcess(executor_type=JobExecutorType.PROCESS, user_arguments=None, http_proxy=None)
+    prewarm_pipeline(proc)
+
+    assert proc.userdata["vad"] is not None
+    assert proc.userdata["noise_cancellation"] is not None
+    assert {"noise cancellation", "vad load", "vad warm-up"} <= set(proc.userdata["prewarm_timings"])
+
+    # A second call (e.g. from another hosted agent) reuses what is cached
+    vad = proc.userdata["vad"]
+    prewarm_pipeline(proc)
+    assert proc.userdata["vad"] is vad
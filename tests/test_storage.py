@@ -0,0 +1,109 @@
+import json
+import multiprocessing
+
+import pytest
+
+from voice_runtime.storage import BACKENDS, open_store
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", sorted(BACKENDS))
+async def test_store_round_trip(tmp_path, backend):
+    store = open_store(tmp_path, backend)
+
+    assert await store.get("orders", "missing") is None
+    assert await store.read("log") == []
+
+    await store.put("orders", "order_2", {"id": 2})
+    await store.put("orders", "order_1", {"id": 1})
+    await store.put("orders", "order_1", {"id": 1, "status": "placed"})
+    assert await store.keys("orders") == ["order_1", "order_2"]
+    assert await store.get("orders", "order_1") == {"id": 1, "status": "placed"}
+
+    for n in range(3):
+        await store.append("log", {"n": n, "note": "namasté"})
+    assert [entry["n"] for entry in await store.read("log")] == [0, 1, 2]
+    assert [entry["n"] for entry in await store.tail("log", 2)] == [1, 2]
+    assert await store.tail("missing", 5) == []
+
+
+def test_open_store_is_cached_and_validates_backend(tmp_path):
+    assert open_store(tmp_path, "json") is open_store(tmp_path, "json")
+    with pytest.raises(ValueError):
+        open_store(tmp_path, "redis")
+
+
+def _take_counter(args):
+    backend, root, n = args
+    store = BACKENDS[backend](root)
+    return [store.increment("orders", "_counter", "last_order_id", 1) for _ in range(n)]
+
+
+@pytest.mark.parametrize("backend", sorted(BACKENDS))
+def test_increment_is_atomic_across_processes(tmp_path, backend):
+    with multiprocessing.get_context("spawn").Pool(4) as pool:
+        results = pool.map(_take_counter, [(backend, tmp_path, 50)] * 4)
+
+    values = [value for result in results for value in result]
+    assert sorted(values) == list(range(1, 201))
+
+
+def test_jsonl_tail_reads_backwards_across_blocks(tmp_path):
+    backend = BACKENDS["jsonl"](tmp_path)
+    for n in range(500):
+        backend.append("log", {"n": n, "pad": "x" * n})
+    # A line still being written is not returned
+    with open(tmp_path / "log.jsonl", "a") as f:
+        f.write('{"n": 5')
+
+    assert [entry["n"] for entry in backend.tail("log", 3)] == [497, 498, 499]
+    assert len(backend.tail("log", 1000)) == 500
+
+
+def test_jsonl_imports_json_log_once(tmp_path):
+    (tmp_path / "orders.json").write_text(json.dumps([{"n": 0}, {"n": 1}]))
+    backend = BACKENDS["jsonl"](tmp_path)
+    backend.append("orders", {"n": 2})
+
+    assert [entry["n"] for entry in backend.read("orders")] == [0, 1, 2]
+    # The array file is left alone and not imported again
+    assert len(json.loads((tmp_path / "orders.json").read_text())) == 2
+    assert [entry["n"] for entry in BACKENDS["jsonl"](tmp_path).read("orders")] == [0, 1, 2]
+
+
+def _append_log(args):
+    backend, root, worker, n = args
+    store = BACKENDS[backend](root)
+    for i in range(n):
+        store.append("orders", {"worker": worker, "i": i})
+
+
+@pytest.mark.parametrize("backend", sorted(BACKENDS))
+def test_append_keeps_every_process_entries(tmp_path, backend):
+    with multiprocessing.get_context("spawn").Pool(4) as pool:
+        pool.map(_append_log, [(backend, tmp_path, worker, 25) for worker in range(4)])
+
+    entries = BACKENDS[backend](tmp_path).read("orders")
+    assert sorted((e["worker"], e["i"]) for e in entries) == [(w, i) for w in range(4) for i in range(25)]
+
+
+def _push_order(record):
+    record = record or {"orders": []}
+    record["orders"].append(len(record["orders"]))
+    return record
+
+
+def _update_record(args):
+    backend, root, n = args
+    store = BACKENDS[backend](root)
+    for _ in range(n):
+        store.update("customers", "asha", _push_order)
+
+
+@pytest.mark.parametrize("backend", sorted(BACKENDS))
+def test_update_is_atomic_across_processes(tmp_path, backend):
+    with multiprocessing.get_context("spawn").Pool(4) as pool:
+        pool.map(_update_record, [(backend, tmp_path, 25)] * 4)
+
+    # Every update saw the one before it, so none was lost
+    assert BACKENDS[backend](tmp_path).get("customers", "asha")["orders"] == list(range(100))
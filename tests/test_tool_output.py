@@ -0,0 +1,51 @@
+import pytest
+from livekit.agents import Agent, AgentSession, function_tool
+
+from voice_runtime.fakes import FakeLLM, ScriptedTurn
+from voice_runtime.tool_output import page_tool_outputs, split_pages
+
+CATALOG = "\n".join(f"- Product {n}: a very useful item for your kitchen, Rs {n * 10}" for n in range(100))
+
+
+class ShopAgent(Agent):
+    def __init__(self) -> None:
+        super().__init__(instructions="You are a shopkeeper.")
+
+    @function_tool
+    async def show_catalog(self) -> str:
+        """List every product"""
+        return CATALOG
+
+
+def test_split_pages_breaks_between_lines() -> None:
+    pages = split_pages(CATALOG, 500)
+    assert all(len(page) <= 500 for page in pages)
+    assert "\n".join(pages) == CATALOG
+    assert split_pages("x" * 1200, 500) == ["x" * 500, "x" * 500, "x" * 200]
+
+
+@pytest.mark.asyncio
+async def test_large_result_is_paged() -> None:
+    fake_llm = FakeLLM()
+    async with AgentSession(llm=fake_llm) as session:
+        agent = ShopAgent()
+        await session.start(agent)
+        pager = await page_tool_outputs(agent, max_tokens=200)
+
+        fake_llm.turn = ScriptedTurn("What do you sell?", [("show_catalog", {})])
+        result = await session.run(user_input="What do you sell?")
+        first = next(e.item for e in result.events if e.type == "function_call_output")
+        assert len(first.output) < 1000
+        assert "Product 0:" in first.output
+        assert "read_more_tool_output with handle 'show_catalog-1' and page 2" in first.output
+
+        fake_llm.turn = ScriptedTurn("More", [("read_more_tool_output", {"handle": "show_catalog-1", "page": 2})])
+        result = await session.run(user_input="More")
+        second = next(e.item for e in result.events if e.type == "function_call_output")
+        assert not second.is_error
+        assert "Page 2 of" in second.output
+
+    pages = pager.results["show_catalog-1"]
+    assert "\n".join(pages) == CATALOG
+    assert "end of output" in pager.page("show_catalog-1", len(pages))
+    assert "expired" in pager.page("nope-1", 1)
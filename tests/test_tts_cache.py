@@ -0,0 +1,55 @@
+import os
+
+import pytest
+
+from voice_runtime.fakes import FakeTTS
+from voice_runtime.tts_cache import AudioCache, CachedAudio, CachedTTS
+
+
+async def _synthesize(cached_tts: CachedTTS, text: str) -> bytes:
+    frames = [frame async for frame in cached_tts.audio_frames(text)]
+    return b"".join(frame.data.tobytes() for frame in frames)
+
+
+@pytest.mark.asyncio
+async def test_second_synthesis_is_served_from_disk(tmp_path) -> None:
+    fake = FakeTTS()
+    cached_tts = CachedTTS(fake, AudioCache(tmp_path))
+    metrics = []
+    cached_tts.on("metrics_collected", metrics.append)
+
+    first = await _synthesize(cached_tts, "Namaste! This is Rajesh Kumar from Bharat Secure Bank.")
+    second = await _synthesize(cached_tts, "Namaste! This is Rajesh Kumar from Bharat Secure Bank.")
+
+    assert fake.calls == 1
+    # One TTS metric per request: the wrapped miss is not reported twice
+    assert len(metrics) == 2
+    assert first == second and len(first) > 0
+    assert len(list(tmp_path.glob("*.wav"))) == 1
+
+
+@pytest.mark.asyncio
+async def test_key_includes_voice(tmp_path) -> None:
+    cache = AudioCache(tmp_path)
+    matthew, aman = FakeTTS(voice="Matthew"), FakeTTS(voice="hi-IN-aman")
+
+    await _synthesize(CachedTTS(matthew, cache), "Welcome to Improv Battle!")
+    await _synthesize(CachedTTS(aman, cache), "Welcome to Improv Battle!")
+
+    assert matthew.calls == aman.calls == 1
+
+
+def test_evicts_least_recently_used(tmp_path) -> None:
+    audio = CachedAudio(bytes(1000), 24000, 1)
+    cache = AudioCache(tmp_path, max_bytes=2500)
+    cache.put("a", audio)
+    cache.put("b", audio)
+    os.utime(tmp_path / "a.wav", (1, 1))
+    os.utime(tmp_path / "b.wav", (2, 2))
+    assert cache.get("a") is not None  # a becomes the most recently used
+
+    cache.put("c", audio)
+
+    assert cache.get("b") is None
+    assert cache.get("a").pcm == audio.pcm
+    assert cache.get("c") is not None
@@ -0,0 +1,29 @@
+import sys
+
+from voice_runtime.worker import AGENT_MODULES, AGENTS, resolve_agent_name
+
+
+def test_all_agents_loaded() -> None:
+    """Every hosted agent is importable side by side with its own entrypoint"""
+    assert set(AGENT_MODULES) == {spec.name for spec in AGENTS}
+    for module in AGENT_MODULES.values():
+        assert callable(module.entrypoint)
+
+    # Sibling modules (prompt, tools, utils, ...) must not leak between agents
+    assert "prompt" not in sys.modules
+    assert "tools" not in sys.modules
+
+
+def test_route_by_metadata() -> None:
+    assert resolve_agent_name('{"agent": "grocery-wala"}', "fraud-call-42") == "grocery-wala"
+
+
+def test_route_by_room_prefix() -> None:
+    assert resolve_agent_name("", "fraud-call-42") == "fraud-alert-agent"
+    assert resolve_agent_name("", "sdr-agent-room") == "sdr-agent"
+
+
+def test_route_fallbacks() -> None:
+    assert resolve_agent_name("", "room", "e-commerce-agent") == "e-commerce-agent"
+    assert resolve_agent_name('{"agent": "nope"}', "room") == "starter"
+    assert resolve_agent_name("not json", "room") == "starter"
@@ -0,0 +1 @@
+# Shared runtime for hosting the voice agents
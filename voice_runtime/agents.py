@@ -0,0 +1,73 @@
+"""
+Registry of the agent backends in this repository and how to import them.
+"""
+
+import importlib.util
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from types import ModuleType
+from typing import Dict, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+@dataclass(frozen=True)
+class AgentSpec:
+    name: str
+    backend_dir: Path
+    room_prefixes: Tuple[str, ...] = ()
+
+    @property
+    def src_dir(self) -> Path:
+        return self.backend_dir / "src"
+
+
+AGENTS: Tuple[AgentSpec, ...] = (
+    AgentSpec("starter", REPO_ROOT / "backend"),
+    AgentSpec("coffee-shop-barista", REPO_ROOT / "agents" / "day-02-coffee-shop-barista" / "backend"),
+    AgentSpec("health-companion", REPO_ROOT / "agents" / "day-03-health-companion" / "backend"),
+    AgentSpec("teach-the-tutor", REPO_ROOT / "agents" / "day-04-teach-the-tutor" / "backend"),
+    AgentSpec("sdr-agent", REPO_ROOT / "agents" / "day-05-sdr-agent" / "backend"),
+    AgentSpec(
+        "fraud-alert-agent",
+        REPO_ROOT / "agents" / "day-06-fraud-alert-agent" / "backend",
+        room_prefixes=("fraud-call-",),
+    ),
+    AgentSpec("grocery-wala", REPO_ROOT / "agents" / "day-07-grocery-wala" / "backend"),
+    AgentSpec("ramayan-voice-gm", REPO_ROOT / "agents" / "day-08-ramayan-voice-GM" / "backend"),
+    AgentSpec("e-commerce-agent", REPO_ROOT / "agents" / "day-09-e-commerce-agent" / "backend"),
+    AgentSpec("voice-improv-battle", REPO_ROOT / "agents" / "day-10-voice-improv-battle" / "backend"),
+)
+
+AGENTS_BY_NAME: Dict[str, AgentSpec] = {spec.name: spec for spec in AGENTS}
+
+
+def load_agent_module(spec: AgentSpec) -> ModuleType:
+    """Import an agent's src/agent.py under a unique module name.
+
+    Every backend has top-level sibling modules with clashing names (agent,
+    prompt, tools, utils, ...). Each agent is imported with its own src dir
+    at the front of sys.path, and its siblings are evicted from sys.modules
+    afterwards so the next agent resolves its own copies. The loaded agent
+    keeps references to the modules it imported, so nothing is lost.
+    """
+    src_dir = str(spec.src_dir)
+    module_name = f"{spec.name.replace('-', '_')}_agent"
+    before = set(sys.modules)
+
+    sys.path.insert(0, src_dir)
+    try:
+        module_spec = importlib.util.spec_from_file_location(module_name, spec.src_dir / "agent.py")
+        module = importlib.util.module_from_spec(module_spec)
+        sys.modules[module_name] = module
+        module_spec.loader.exec_module(module)
+    finally:
+        sys.path.remove(src_dir)
+        for name in set(sys.modules) - before:
+            loaded = sys.modules[name]
+            locations = [getattr(loaded, "__file__", None) or "", *getattr(loaded, "__path__", [])]
+            if name != module_name and any(loc.startswith(src_dir) for loc in locations):
+                del sys.modules[name]
+
+    return module
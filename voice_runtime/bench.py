@@ -0,0 +1,259 @@
+"""
+Offline latency benchmark for the hosted agents.
+
+Drives each agent's real AgentSession (the same text-mode path the tests use)
+with FakeLLM and scripted user turns, so a run needs no network and no API
+keys. Scripted transcripts stand in for STT, and text mode never synthesises
+audio, so the numbers cover exactly what we own: tool code, state handling and
+session overhead. Tool execution time is reported separately from the rest
+of each turn.
+
+Every scenario runs against a throwaway copy of its backend directory, so
+orders, carts and the fraud database in the repo are never touched.
+
+    uv run --project backend python -m voice_runtime.bench
+    uv run --project backend python -m voice_runtime.bench grocery-recipe --repeat 20 --json bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+from livekit.agents import Agent, AgentSession
+
+from voice_runtime.agents import AGENTS_BY_NAME, REPO_ROOT, AgentSpec, load_agent_module
+from voice_runtime.fakes import FakeLLM, ScriptedTurn
+
+logger = logging.getLogger("voice-runtime")
+
+
+@dataclass
+class Scenario:
+    name: str
+    agent: str
+    build_agent: Callable[[ModuleType], Agent]
+    turns: List[ScriptedTurn]
+    build_userdata: Optional[Callable[[ModuleType], Any]] = None
+
+
+@dataclass
+class TurnTiming:
+    scenario: str
+    turn: int
+    user_input: str
+    total_ms: float
+    tool_ms: float
+    tools: List[str] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def agent_ms(self) -> float:
+        """Time spent outside tool execution (session, LLM stand-in, bookkeeping)"""
+        return self.total_ms - self.tool_ms
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario(
+        name="barista-order",
+        agent="coffee-shop-barista",
+        build_userdata=lambda m: m.Userdata(),
+        build_agent=lambda m: m.CoffeeBaristaAgent(userdata=m.Userdata()),
+        turns=[
+            ScriptedTurn(
+                "Hi, can I get a large oat milk latte?",
+                [("set_drink_type", {"drink": "latte"}), ("set_size", {"size": "large"}), ("set_milk_type", {"milk": "oat"})],
+                "A large oat latte, lovely. Anything extra?",
+            ),
+            ScriptedTurn("Add an extra shot please", [("add_extra", {"extra": "extra_shot"})], "Extra shot added."),
+            ScriptedTurn(
+                "It's for Priya, pickup at Patia",
+                [("set_customer_name", {"name": "Priya"}), ("set_location", {"location": "bhubaneswar_patia"})],
+                "Thanks Priya, Patia it is. Shall I place it?",
+            ),
+            ScriptedTurn("Yes, place the order", [("finalize_order", {})], "Your order is confirmed!"),
+        ],
+    ),
+    Scenario(
+        name="grocery-recipe",
+        agent="grocery-wala",
+        build_agent=lambda m: m.GroceryWalaAssistant(),
+        turns=[
+            ScriptedTurn(
+                "I want to make paneer curry tonight",
+                [("add_recipe_ingredients", {"recipe_name": "paneer curry"})],
+                "I've added everything for paneer curry.",
+            ),
+            ScriptedTurn(
+                "Also two packets of bread",
+                [("add_item_to_cart", {"item_name": "bread", "quantity": 2})],
+                "Added two breads.",
+            ),
+            ScriptedTurn("What's in my cart?", [("show_cart", {})], "Here's your cart."),
+            ScriptedTurn(
+                "Place the order, cash on delivery. Rahul, 9876543210, 12 MG Road",
+                [("place_order", {"customer_name": "Rahul", "phone": "9876543210", "address": "12 MG Road", "payment_method": "COD"})],
+                "Order placed!",
+            ),
+        ],
+    ),
+    Scenario(
+        name="fraud-verification",
+        agent="fraud-alert-agent",
+        build_agent=lambda m: m.BharatFraudAlertAssistant(),
+        turns=[
+            ScriptedTurn(
+                "Hello, this is Rahul Sharma",
+                [("get_fraud_case", {"username": "Rahul Sharma"})],
+                "Thanks Rahul. What is your mother's maiden name?",
+            ),
+            ScriptedTurn(
+                "Verma",
+                [("verify_security_answer", {"customer_answer": "Verma"})],
+                "Thank you, you're verified. Did you make a purchase of 89,999 rupees?",
+            ),
+            ScriptedTurn(
+                "No, that wasn't me",
+                [("mark_transaction_fraudulent", {})],
+                "I've blocked your card and opened an investigation.",
+            ),
+        ],
+    ),
+    Scenario(
+        name="ecommerce-checkout",
+        agent="e-commerce-agent",
+        build_userdata=lambda m: m.Userdata(),
+        build_agent=lambda m: m.GameMasterAgent(),
+        turns=[
+            ScriptedTurn("Show me some earbuds", [("show_catalog", {"q": "earbuds"})], "Here are our earbuds."),
+            ScriptedTurn("Add the first one", [("add_to_cart", {"product_ref": "audio-001"})], "Added to your cart."),
+            ScriptedTurn("Place the order", [("place_order", {"confirm": True})], "Order placed."),
+            ScriptedTurn("What did I just order?", [("last_order", {})], "You ordered wireless earbuds."),
+        ],
+    ),
+    Scenario(
+        name="improv-round",
+        agent="voice-improv-battle",
+        build_userdata=lambda m: m.ImprovBattleState(),
+        build_agent=lambda m: m.ImprovHostAssistant(),
+        turns=[
+            ScriptedTurn("I'm Sam, how does this work?", [("explain_game_rules", {"player_name": "Sam"})], "Here's how it works."),
+            ScriptedTurn("Let's go", [("start_game", {})], "Let's do this!"),
+            ScriptedTurn("Ready", [("present_scenario", {})], "Scene one!"),
+        ],
+    ),
+]
+
+SCENARIOS_BY_NAME = {scenario.name: scenario for scenario in SCENARIOS}
+
+_SANDBOX_IGNORE = shutil.ignore_patterns("tests", "__pycache__", ".venv", "*.pyc", ".env*")
+
+
+@contextmanager
+def isolated_backend(spec: AgentSpec) -> Iterator[AgentSpec]:
+    """Copy an agent backend into a temp dir laid out like the repo"""
+    with tempfile.TemporaryDirectory(prefix="voice-bench-") as tmp:
+        backend_dir = Path(tmp) / spec.backend_dir.relative_to(REPO_ROOT)
+        shutil.copytree(spec.backend_dir, backend_dir, ignore=_SANDBOX_IGNORE)
+        yield AgentSpec(spec.name, backend_dir, spec.room_prefixes)
+
+
+def _tool_summary(events: list) -> Tuple[float, List[str], List[str]]:
+    """Wall time from the first tool call to the last tool output, plus names and errors"""
+    calls = [e.item for e in events if e.type == "function_call"]
+    outputs = [e.item for e in events if e.type == "function_call_output"]
+    if not calls or not outputs:
+        return 0.0, [c.name for c in calls], []
+
+    tool_seconds = max(o.created_at for o in outputs) - min(c.created_at for c in calls)
+    errors = [f"{o.name}: {o.output}" for o in outputs if o.is_error]
+    return tool_seconds * 1000, [c.name for c in calls], errors
+
+
+async def run_scenario(scenario: Scenario, *, ttft: float = 0.0) -> List[TurnTiming]:
+    """Play one scenario against a fresh copy of its agent and time every turn"""
+    with isolated_backend(AGENTS_BY_NAME[scenario.agent]) as sandbox:
+        module = load_agent_module(sandbox)
+        fake_llm = FakeLLM(ttft=ttft)
+        session_kwargs = {}
+        if scenario.build_userdata is not None:
+            session_kwargs["userdata"] = scenario.build_userdata(module)
+
+        timings = []
+        async with AgentSession(llm=fake_llm, **session_kwargs) as session:
+            await session.start(scenario.build_agent(module))
+            for index, turn in enumerate(scenario.turns, start=1):
+                fake_llm.turn = turn
+                start = time.perf_counter()
+                result = await session.run(user_input=turn.user_input)
+                total_ms = (time.perf_counter() - start) * 1000
+
+                tool_ms, tools, errors = _tool_summary(result.events)
+                missing = [name for name, _ in turn.tool_calls if name not in tools]
+                errors += [f"{name}: not called" for name in missing]
+                timings.append(TurnTiming(scenario.name, index, turn.user_input, total_ms, tool_ms, tools, errors))
+        return timings
+
+
+async def run_benchmark(names: List[str], *, repeat: int = 1, ttft: float = 0.0) -> List[TurnTiming]:
+    timings = []
+    for name in names:
+        for _ in range(repeat):
+            timings += await run_scenario(SCENARIOS_BY_NAME[name], ttft=ttft)
+    return timings
+
+
+def format_report(timings: List[TurnTiming]) -> str:
+    """Median per turn across repeats, in milliseconds"""
+    lines = [f"{'scenario':<20} {'turn':>4} {'total':>8} {'tools':>8} {'agent':>8}  tools called"]
+    keys = sorted({(t.scenario, t.turn) for t in timings}, key=lambda k: (list(SCENARIOS_BY_NAME).index(k[0]), k[1]))
+    for scenario, turn in keys:
+        runs = [t for t in timings if (t.scenario, t.turn) == (scenario, turn)]
+        lines.append(
+            f"{scenario:<20} {turn:>4} "
+            f"{statistics.median(t.total_ms for t in runs):>8.2f} "
+            f"{statistics.median(t.tool_ms for t in runs):>8.2f} "
+            f"{statistics.median(t.agent_ms for t in runs):>8.2f}  "
+            f"{', '.join(runs[0].tools)}"
+        )
+    for timing in timings:
+        for error in timing.errors:
+            lines.append(f"ERROR {timing.scenario} turn {timing.turn}: {error}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline per-turn latency benchmark for the voice agents")
+    parser.add_argument("scenarios", nargs="*", metavar="SCENARIO",
+                        help=f"scenarios to run (default: all of {', '.join(SCENARIOS_BY_NAME)})")
+    parser.add_argument("--repeat", type=int, default=1, help="run each scenario this many times")
+    parser.add_argument("--ttft", type=float, default=0.0, help="simulated LLM time to first token, in seconds")
+    parser.add_argument("--json", type=Path, help="also write raw per-turn timings to this file")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.scenarios if name not in SCENARIOS_BY_NAME]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    logging.basicConfig(level=logging.WARNING)
+    timings = asyncio.run(run_benchmark(args.scenarios or list(SCENARIOS_BY_NAME), repeat=args.repeat, ttft=args.ttft))
+    print(format_report(timings))
+
+    if args.json:
+        args.json.write_text(json.dumps([{**asdict(t), "agent_ms": t.agent_ms} for t in timings], indent=2))
+
+    # Non-zero exit lets CI fail on tool regressions, not just slowdowns
+    return 1 if any(t.errors for t in timings) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
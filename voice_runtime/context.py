@@ -0,0 +1,207 @@
+"""
+Bounded chat context for long sessions.
+
+Every turn resends the agent's whole chat context to the LLM, so TTFT grows
+with the length of a session. attach_compactor() keeps the conversation
+history (everything except the system instructions) under a token budget.
+After an assistant reply pushes the history over the budget, a background
+task rebuilds the context as:
+
+- the system instructions, untouched
+- one rolling "[history summary]" message covering the older turns,
+  including the previous summary
+- the latest result of each kept tool, so state the LLM still needs (the
+  fraud case being discussed, the cart, the current topic) survives
+- the last few turns, verbatim
+
+The summary is written by the session's own LLM off the critical path.
+Items added while it is being written are carried over. Tokens are estimated
+at four characters per token, which is close enough for a budget.
+
+    compactor = attach_compactor(session, keep_tools=("get_fraud_case",))
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import List, Optional, Sequence
+
+from livekit.agents import Agent, AgentSession, ConversationItemAddedEvent, llm
+
+logger = logging.getLogger("voice-runtime")
+
+MAX_TOKENS = int(os.getenv("CHAT_CONTEXT_MAX_TOKENS", "4000"))
+
+CHARS_PER_TOKEN = 4
+SUMMARY_PREFIX = "[history summary]"
+# Used when the LLM can't summarize: keep the newest part of the transcript
+FALLBACK_SUMMARY_CHARS = 2000
+# Older tool output in the summary source is clipped to this many characters
+TOOL_OUTPUT_CHARS = 300
+
+SUMMARY_INSTRUCTIONS = (
+    "Compress this older part of a voice conversation into a short, faithful summary. "
+    "Keep the user's goals, names, choices, facts and anything still pending. "
+    "If an earlier summary is included, fold it in. Skip greetings and chit-chat."
+)
+
+
+def estimate_tokens(item: llm.ChatItem) -> int:
+    if item.type == "message":
+        text = item.text_content or ""
+    elif item.type == "function_call":
+        text = item.name + item.arguments
+    elif item.type == "function_call_output":
+        text = item.output
+    else:
+        return 0
+    return len(text) // CHARS_PER_TOKEN + 4
+
+
+def _is_instructions(item: llm.ChatItem) -> bool:
+    return item.type == "message" and item.role in ("system", "developer")
+
+
+def _is_summary(item: llm.ChatItem) -> bool:
+    return item.type == "message" and bool(item.extra.get("is_summary"))
+
+
+def history_tokens(chat_ctx: llm.ChatContext) -> int:
+    """Estimated tokens in everything but the instructions"""
+    return sum(estimate_tokens(item) for item in chat_ctx.items if not _is_instructions(item))
+
+
+class ContextCompactor:
+    """Keeps one session's chat history under a token budget"""
+
+    def __init__(
+        self,
+        session: AgentSession,
+        *,
+        max_tokens: int = MAX_TOKENS,
+        keep_last_turns: int = 4,
+        keep_tools: Optional[Sequence[str]] = None,
+        summary_llm: Optional[llm.LLM] = None,
+    ) -> None:
+        """keep_tools names the tools whose latest result survives compaction (all tools if None)"""
+        self.session = session
+        self.max_tokens = max_tokens
+        self.keep_last_turns = keep_last_turns
+        self.keep_tools = None if keep_tools is None else set(keep_tools)
+        self.summary_llm = summary_llm
+        self.compactions = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def _on_item_added(self, ev: ConversationItemAddedEvent) -> None:
+        if ev.item.type != "message" or ev.item.role != "assistant":
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.maybe_compact(self.session.current_agent))
+
+    async def maybe_compact(self, agent: Agent) -> bool:
+        """Compact the agent's chat context if its history is over budget"""
+        if history_tokens(agent.chat_ctx) <= self.max_tokens:
+            return False
+        try:
+            return await self.compact(agent)
+        except Exception:
+            logger.exception("Chat context compaction failed; keeping the full history")
+            return False
+
+    def _split(self, items: List[llm.ChatItem]):
+        """(instructions, head to summarize, kept tool items, tail kept verbatim)"""
+        instructions = [item for item in items if _is_instructions(item)]
+        history = [item for item in items if not _is_instructions(item)]
+
+        user_turns = [i for i, item in enumerate(history) if item.type == "message" and item.role == "user"]
+        if len(user_turns) <= self.keep_last_turns:
+            return instructions, [], [], history
+        tail_start = user_turns[-self.keep_last_turns] if self.keep_last_turns else len(history)
+        head, tail = history[:tail_start], history[tail_start:]
+
+        # Latest output of each kept tool, unless the tail already has a newer one
+        tail_tools = {item.name for item in tail if item.type == "function_call_output"}
+        latest = {}
+        for item in head:
+            if item.type == "function_call_output" and item.name not in tail_tools:
+                if self.keep_tools is None or item.name in self.keep_tools:
+                    latest[item.name] = item.call_id
+        kept_calls = set(latest.values())
+        kept = [
+            item for item in head
+            if item.type in ("function_call", "function_call_output") and item.call_id in kept_calls
+        ]
+        kept_ids = {item.id for item in kept}
+        head = [item for item in head if item.id not in kept_ids]
+        return instructions, head, kept, tail
+
+    def _source_text(self, head: List[llm.ChatItem]) -> str:
+        lines = []
+        for item in head:
+            if _is_summary(item):
+                lines.append(f"Earlier summary: {(item.text_content or '')[len(SUMMARY_PREFIX):].strip()}")
+            elif item.type == "message" and item.role in ("user", "assistant"):
+                text = (item.text_content or "").strip()
+                if text:
+                    lines.append(f"{item.role}: {text}")
+            elif item.type == "function_call_output":
+                lines.append(f"tool {item.name} returned: {item.output[:TOOL_OUTPUT_CHARS]}")
+        return "\n".join(lines)
+
+    async def _summarize(self, source_text: str) -> str:
+        summary_llm = self.summary_llm or self.session.llm
+        if isinstance(summary_llm, llm.LLM):
+            chat_ctx = llm.ChatContext()
+            chat_ctx.add_message(role="system", content=SUMMARY_INSTRUCTIONS)
+            chat_ctx.add_message(role="user", content=source_text)
+            try:
+                chunks = []
+                async with summary_llm.chat(chat_ctx=chat_ctx) as stream:
+                    async for chunk in stream:
+                        if chunk.delta and chunk.delta.content:
+                            chunks.append(chunk.delta.content)
+                summary = "".join(chunks).strip()
+                if summary:
+                    return summary
+            except Exception as e:
+                logger.warning(f"History summary failed, keeping a transcript excerpt instead: {e}")
+        return source_text[-FALLBACK_SUMMARY_CHARS:]
+
+    async def compact(self, agent: Agent) -> bool:
+        """Replace the older turns of an agent's chat context with a rolling summary"""
+        start = time.perf_counter()
+        snapshot = agent.chat_ctx.copy()
+        before = history_tokens(snapshot)
+        instructions, head, kept, tail = self._split(snapshot.items)
+        source_text = self._source_text(head)
+        if not source_text:
+            return False
+
+        summary = await self._summarize(source_text)
+        summary_item = llm.ChatMessage(
+            role="assistant",
+            content=[f"{SUMMARY_PREFIX}\n{summary}"],
+            created_at=head[0].created_at,
+            extra={"is_summary": True},
+        )
+
+        # Turns that happened while the summary was being written are kept as-is
+        snapshot_ids = {item.id for item in snapshot.items}
+        newer = [item for item in agent.chat_ctx.items if item.id not in snapshot_ids]
+        compacted = llm.ChatContext([*instructions, summary_item, *kept, *tail, *newer])
+        await agent.update_chat_ctx(compacted)
+
+        self.compactions += 1
+        logger.info(
+            f"Compacted chat context: {before} -> {history_tokens(compacted)} history tokens, "
+            f"{len(head)} items summarized in {(time.perf_counter() - start) * 1000:.0f}ms"
+        )
+        return True
+
+
+def attach_compactor(session: AgentSession, **kwargs) -> ContextCompactor:
+    """Keep a session's chat history under a token budget; see ContextCompactor for options"""
+    compactor = ContextCompactor(session, **kwargs)
+    session.on("conversation_item_added", compactor._on_item_added)
+    return compactor
@@ -0,0 +1,141 @@
+"""
+Deterministic stand-ins for the network plugins, used by the benchmark and
+load harnesses.
+
+FakeLLM replays a script instead of calling Gemini: for every user turn it
+emits the scripted tool calls, waits for their outputs to come back in the
+chat context, then emits the scripted reply. Nothing leaves the process, so
+the only work measured is the agent's own tool code and session handling.
+
+FakeTTS synthesizes silence, 10ms per character, and counts its requests.
+"""
+
+import asyncio
+import json
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from livekit.agents import llm, tts, utils
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS, NOT_GIVEN, APIConnectOptions
+
+
+@dataclass
+class ScriptedTurn:
+    """One user turn and how the fake LLM should answer it"""
+
+    user_input: str
+    tool_calls: List[Tuple[str, Dict[str, Any]]] = field(default_factory=list)
+    reply: str = "Okay."
+
+
+class FakeLLM(llm.LLM):
+    """LLM that answers from a ScriptedTurn instead of a model
+
+    Set ``turn`` before each ``session.run()``. ``ttft`` adds a fixed delay
+    before the first chunk of every response to model provider latency.
+    """
+
+    def __init__(self, *, ttft: float = 0.0) -> None:
+        super().__init__()
+        self.ttft = ttft
+        self.turn: Optional[ScriptedTurn] = None
+        self.calls = 0
+
+    @property
+    def model(self) -> str:
+        return "fake-llm"
+
+    @property
+    def provider(self) -> str:
+        return "voice_runtime"
+
+    def chat(
+        self,
+        *,
+        chat_ctx: llm.ChatContext,
+        tools: Optional[list] = None,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+        parallel_tool_calls=NOT_GIVEN,
+        tool_choice=NOT_GIVEN,
+        extra_kwargs=NOT_GIVEN,
+    ) -> "FakeLLMStream":
+        self.calls += 1
+        return FakeLLMStream(self, chat_ctx=chat_ctx, tools=tools or [], conn_options=conn_options)
+
+
+class FakeLLMStream(llm.LLMStream):
+    async def _run(self) -> None:
+        fake: FakeLLM = self._llm  # type: ignore[assignment]
+        turn = fake.turn or ScriptedTurn(user_input="")
+        request_id = f"fake_{uuid.uuid4().hex[:8]}"
+
+        if fake.ttft:
+            await asyncio.sleep(fake.ttft)
+
+        # The tools have run once their outputs are the newest items in the context
+        items = self._chat_ctx.items
+        tools_done = bool(items) and items[-1].type == "function_call_output"
+
+        if turn.tool_calls and not tools_done:
+            delta = llm.ChoiceDelta(
+                role="assistant",
+                tool_calls=[
+                    llm.FunctionToolCall(
+                        name=name,
+                        arguments=json.dumps(arguments),
+                        call_id=f"call_{uuid.uuid4().hex[:8]}",
+                    )
+                    for name, arguments in turn.tool_calls
+                ],
+            )
+        else:
+            delta = llm.ChoiceDelta(role="assistant", content=turn.reply)
+
+        self._event_ch.send_nowait(llm.ChatChunk(id=request_id, delta=delta))
+        self._event_ch.send_nowait(
+            llm.ChatChunk(
+                id=request_id,
+                usage=llm.CompletionUsage(
+                    completion_tokens=len(turn.reply.split()),
+                    prompt_tokens=len(items),
+                    total_tokens=len(turn.reply.split()) + len(items),
+                ),
+            )
+        )
+
+
+class FakeTTS(tts.TTS):
+    """Non-streaming TTS that returns silence, 10ms per character of text"""
+
+    def __init__(self, *, sample_rate: int = 24000, voice: str = "fake-voice") -> None:
+        super().__init__(capabilities=tts.TTSCapabilities(streaming=False), sample_rate=sample_rate, num_channels=1)
+        self.voice = voice
+        self.calls = 0
+
+    @property
+    def model(self) -> str:
+        return "fake-tts"
+
+    @property
+    def provider(self) -> str:
+        return "voice_runtime"
+
+    def synthesize(
+        self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS
+    ) -> "FakeChunkedStream":
+        self.calls += 1
+        return FakeChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+
+class FakeChunkedStream(tts.ChunkedStream):
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        output_emitter.initialize(
+            request_id=utils.shortuuid(),
+            sample_rate=self._tts.sample_rate,
+            num_channels=1,
+            mime_type="audio/pcm",
+        )
+        samples = len(self._input_text) * self._tts.sample_rate // 100
+        output_emitter.push(bytes(2 * samples))
+        output_emitter.flush()
@@ -0,0 +1,179 @@
+"""
+Per-tool wall-time instrumentation and an event-loop stall detector.
+
+Every session in a job process shares one asyncio loop, so a tool that does
+blocking work (sqlite3, a synchronous requests.post, file I/O) stalls audio
+for all of them. instrument_tools() wraps each of an agent's function tools
+to record its wall time, and starts a per-loop LoopStallMonitor.
+
+The monitor keeps a heartbeat task on the loop and a watchdog thread beside
+it. When the heartbeat is late by more than LOOP_STALL_THRESHOLD_MS (default
+100ms), the watchdog grabs the loop thread's stack while it is still blocked.
+It names the instrumented tool on that stack and the line that was running.
+"""
+
+import asyncio
+import functools
+import inspect
+import logging
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from types import CodeType, FrameType
+from typing import Dict, Optional, Tuple
+
+from livekit.agents import Agent, JobContext, llm
+from livekit.agents.llm.tool_context import get_function_info
+
+logger = logging.getLogger("voice-runtime")
+
+STALL_THRESHOLD_MS = float(os.getenv("LOOP_STALL_THRESHOLD_MS", "100"))
+
+# Tool code objects -> "agent/tool", so a blocked stack can be attributed
+_tool_codes: Dict[CodeType, str] = {}
+
+
+@dataclass
+class ToolStats:
+    calls: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    stalls: int = 0
+
+
+# Process-wide stats keyed by "agent/tool"
+tool_stats: Dict[str, ToolStats] = {}
+
+
+def timed_tool(tool: llm.FunctionTool, agent: str) -> llm.FunctionTool:
+    """Wrap a function tool so every call records its wall time"""
+    label = f"{agent}/{get_function_info(tool).name}"
+    func = getattr(tool, "__func__", tool)
+    _tool_codes[func.__code__] = label
+
+    @functools.wraps(tool)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = tool(*args, **kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            stats = tool_stats.setdefault(label, ToolStats())
+            stats.calls += 1
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            logger.info(f"Tool {label} took {elapsed_ms:.1f}ms")
+
+    return wrapper
+
+
+async def instrument_tools(ctx: JobContext, agent: Agent, name: str) -> None:
+    """Time every tool of an agent and make sure the loop's stall monitor is running
+
+    Call before session.start() so the very first tool call is covered. The
+    per-tool summary for the process is logged when the job shuts down.
+    """
+    tools = [
+        timed_tool(tool, name) if llm.is_function_tool(tool) else tool
+        for tool in agent.tools
+    ]
+    await agent.update_tools(tools)
+    LoopStallMonitor.for_running_loop()
+
+    async def log_tool_summary():
+        summary = tool_summary()
+        if summary:
+            logger.info(f"Tool timings:\n{summary}")
+
+    ctx.add_shutdown_callback(log_tool_summary)
+
+
+class LoopStallMonitor:
+    """Flags callbacks that block the event loop for longer than a threshold"""
+
+    _monitors: Dict[int, "LoopStallMonitor"] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, threshold_ms: float = STALL_THRESHOLD_MS) -> None:
+        self.loop = loop
+        self.threshold = threshold_ms / 1000
+        self.interval = self.threshold / 2
+        self.stalls = 0
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._culprit: Optional[Tuple[str, str]] = None
+        self._stopped = threading.Event()
+        self._task = loop.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watchdog, name="loop-stall-watchdog", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def for_running_loop(cls) -> "LoopStallMonitor":
+        """Return the monitor for the current loop, starting one if needed"""
+        loop = asyncio.get_running_loop()
+        with cls._lock:
+            monitor = cls._monitors.get(id(loop))
+            if monitor is None or monitor.loop is not loop:
+                monitor = cls._monitors[id(loop)] = cls(loop)
+                logger.info(f"Event loop stall monitor started (threshold {monitor.threshold * 1000:.0f}ms)")
+            return monitor
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._task.cancel()
+
+    async def _heartbeat(self) -> None:
+        while not self._stopped.is_set():
+            self._beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = time.monotonic() - self._beat - self.interval
+            if lag >= self.threshold:
+                self._report(lag)
+
+    def _watchdog(self) -> None:
+        while not self._stopped.wait(self.interval / 2):
+            if self.loop.is_closed():
+                return
+            blocked = time.monotonic() - self._beat - self.interval
+            if blocked >= self.threshold and self._culprit is None:
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is not None:
+                    self._culprit = _describe_stack(frame)
+
+    def _report(self, lag: float) -> None:
+        self.stalls += 1
+        tool, location = self._culprit or ("", "")
+        self._culprit = None
+        if tool:
+            tool_stats.setdefault(tool, ToolStats()).stalls += 1
+            logger.warning(f"Event loop blocked for {lag * 1000:.0f}ms by tool {tool} at {location}")
+        elif location:
+            logger.warning(f"Event loop blocked for {lag * 1000:.0f}ms at {location}")
+        else:
+            logger.warning(f"Event loop blocked for {lag * 1000:.0f}ms")
+
+
+def _describe_stack(frame: FrameType) -> Tuple[str, str]:
+    """Find the instrumented tool on a stack and the innermost line being run"""
+    code = frame.f_code
+    location = f"{os.path.basename(code.co_filename)}:{frame.f_lineno} in {code.co_name}"
+    while frame is not None:
+        if frame.f_code in _tool_codes:
+            return _tool_codes[frame.f_code], location
+        frame = frame.f_back
+    return "", location
+
+
+def tool_summary() -> str:
+    """One line per tool: calls, mean and max wall time, loop stalls"""
+    return "\n".join(
+        f"{label}: calls={stats.calls} mean={stats.total_ms / stats.calls:.1f}ms "
+        f"max={stats.max_ms:.1f}ms stalls={stats.stalls}"
+        for label, stats in sorted(tool_stats.items())
+        if stats.calls
+    )
@@ -0,0 +1,287 @@
+"""
+Latency histograms built from the sessions' metrics_collected events.
+
+Every session feeds four histograms: end-of-utterance delay, LLM time to first
+token, TTS time to first byte and total turn latency (the sum of the three for
+one speech_id). Each session keeps its own histograms, which are summarised
+in the log when the session ends. They are also merged into process-wide
+histograms keyed by agent name.
+
+Job processes don't share memory, so each process flushes its histograms to
+``LATENCY_METRICS_DIR/latency-<pid>.json`` at the end of every session. The
+Prometheus-style endpoint merges those files on every scrape:
+
+    uv run --project backend python -m voice_runtime.latency --port 9464
+
+The multi-agent worker starts the same endpoint itself when
+``LATENCY_METRICS_PORT`` is set.
+"""
+
+import argparse
+import bisect
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from livekit.agents import AgentSession, JobContext, MetricsCollectedEvent, metrics
+
+logger = logging.getLogger("voice-runtime")
+
+METRICS_DIR = Path(os.getenv("LATENCY_METRICS_DIR", Path(__file__).resolve().parent.parent / "metrics"))
+
+# Upper bounds in seconds, roughly log-spaced from 10ms to 10s
+BUCKETS: Tuple[float, ...] = (
+    0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.2, 0.3, 0.4, 0.5, 0.75,
+    1.0, 1.5, 2.0, 3.0, 5.0, 7.5, 10.0,
+)
+
+EOU_DELAY = "eou_delay"
+LLM_TTFT = "llm_ttft"
+TTS_TTFB = "tts_ttfb"
+TURN_LATENCY = "turn_latency"
+METRIC_NAMES = (EOU_DELAY, LLM_TTFT, TTS_TTFB, TURN_LATENCY)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Turns whose LLM or TTS metrics never arrive (interrupted, text-only) are dropped
+MAX_PENDING_TURNS = 32
+
+
+class Histogram:
+    """Fixed-bucket streaming histogram with interpolated quantiles"""
+
+    def __init__(self, counts: Optional[List[int]] = None, total: float = 0.0) -> None:
+        # One extra bucket for values above the last bound (+Inf)
+        self.counts = counts or [0] * (len(BUCKETS) + 1)
+        self.total = total
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.total += value
+
+    def merge(self, other: "Histogram") -> None:
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total += other.total
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by linear interpolation inside its bucket"""
+        count = self.count
+        if count == 0:
+            return 0.0
+
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = BUCKETS[index - 1] if index > 0 else 0.0
+                upper = BUCKETS[index] if index < len(BUCKETS) else BUCKETS[-1]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return BUCKETS[-1]
+
+    def to_dict(self) -> Dict:
+        return {"counts": self.counts, "sum": self.total}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Histogram":
+        return cls(list(data["counts"]), data["sum"])
+
+
+# Process-wide histograms: {agent: {metric: Histogram}}
+_process_histograms: Dict[str, Dict[str, Histogram]] = {}
+_process_lock = threading.Lock()
+
+
+class SessionLatency:
+    """Histograms for one session, mirrored into the process-wide set"""
+
+    def __init__(self, agent: str) -> None:
+        self.agent = agent
+        self.histograms = {name: Histogram() for name in METRIC_NAMES}
+        self._pending: "OrderedDict[str, Dict[str, float]]" = OrderedDict()
+
+    def _observe(self, name: str, value: float) -> None:
+        self.histograms[name].observe(value)
+        with _process_lock:
+            agent_histograms = _process_histograms.setdefault(
+                self.agent, {metric: Histogram() for metric in METRIC_NAMES}
+            )
+            agent_histograms[name].observe(value)
+
+    def collect(self, ev: metrics.AgentMetrics) -> None:
+        if isinstance(ev, metrics.EOUMetrics):
+            name, value = EOU_DELAY, ev.end_of_utterance_delay
+        elif isinstance(ev, metrics.LLMMetrics):
+            name, value = LLM_TTFT, ev.ttft
+        elif isinstance(ev, metrics.TTSMetrics):
+            name, value = TTS_TTFB, ev.ttfb
+        else:
+            return
+
+        # Cancelled requests report ttft/ttfb of -1
+        if value < 0 or getattr(ev, "cancelled", False):
+            return
+        self._observe(name, value)
+
+        if not ev.speech_id:
+            return
+        # Only the first LLM/TTS request of a turn counts towards its latency
+        parts = self._pending.setdefault(ev.speech_id, {})
+        parts.setdefault(name, value)
+        if len(parts) == 3:
+            self._observe(TURN_LATENCY, sum(parts.values()))
+            del self._pending[ev.speech_id]
+        while len(self._pending) > MAX_PENDING_TURNS:
+            self._pending.popitem(last=False)
+
+    def summary(self) -> str:
+        parts = []
+        for name, histogram in self.histograms.items():
+            if histogram.count:
+                p50, p95, p99 = (histogram.quantile(q) * 1000 for q in QUANTILES)
+                parts.append(f"{name} p50={p50:.0f}ms p95={p95:.0f}ms p99={p99:.0f}ms (n={histogram.count})")
+        return ", ".join(parts) or "no turns measured"
+
+
+def process_histograms() -> Dict[str, Dict[str, Histogram]]:
+    """Snapshot of this process's histograms"""
+    with _process_lock:
+        return {
+            agent: {name: Histogram(list(h.counts), h.total) for name, h in histograms.items()}
+            for agent, histograms in _process_histograms.items()
+        }
+
+
+def flush(directory: Path = METRICS_DIR) -> Path:
+    """Write this process's histograms to its file, replacing it atomically"""
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"latency-{os.getpid()}.json"
+    data = {
+        agent: {name: histogram.to_dict() for name, histogram in histograms.items()}
+        for agent, histograms in process_histograms().items()
+    }
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".latency-", suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_flushed(directory: Path = METRICS_DIR) -> Dict[str, Dict[str, Histogram]]:
+    """Merge every process's flushed histograms, keyed by agent"""
+    merged: Dict[str, Dict[str, Histogram]] = {}
+    for path in sorted(directory.glob("latency-*.json")):
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping unreadable latency file {path}: {e}")
+            continue
+        for agent, histograms in data.items():
+            target = merged.setdefault(agent, {name: Histogram() for name in METRIC_NAMES})
+            for name, histogram in histograms.items():
+                if name in target:
+                    target[name].merge(Histogram.from_dict(histogram))
+    return merged
+
+
+def render_prometheus(histograms: Dict[str, Dict[str, Histogram]]) -> str:
+    """Prometheus text exposition: a histogram plus p50/p95/p99 gauges per metric"""
+    lines: List[str] = []
+    for name in METRIC_NAMES:
+        metric = f"voice_agent_{name}_seconds"
+        lines.append(f"# TYPE {metric} histogram")
+        for agent, agent_histograms in sorted(histograms.items()):
+            histogram = agent_histograms[name]
+            cumulative = 0
+            for bound, bucket_count in zip((*BUCKETS, float("inf")), histogram.counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{metric}_bucket{{agent="{agent}",le="{le}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{agent="{agent}"}} {histogram.total}')
+            lines.append(f'{metric}_count{{agent="{agent}"}} {histogram.count}')
+
+        lines.append(f"# TYPE {metric}_quantile gauge")
+        for agent, agent_histograms in sorted(histograms.items()):
+            for q in QUANTILES:
+                value = agent_histograms[name].quantile(q)
+                lines.append(f'{metric}_quantile{{agent="{agent}",quantile="{q}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+def track_latency(ctx: JobContext, session: AgentSession, agent: str) -> SessionLatency:
+    """Feed a session's metrics into latency histograms; summarise and flush on shutdown"""
+    latency = SessionLatency(agent)
+
+    @session.on("metrics_collected")
+    def _on_metrics_collected(ev: MetricsCollectedEvent):
+        latency.collect(ev.metrics)
+
+    async def flush_latency():
+        logger.info(f"Latency [{agent}]: {latency.summary()}")
+        try:
+            flush()
+        except OSError as e:
+            logger.warning(f"Could not flush latency histograms: {e}")
+
+    ctx.add_shutdown_callback(flush_latency)
+    return latency
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    directory: Path = METRICS_DIR
+
+    def do_GET(self):
+        if self.path.rstrip("/") not in ("", "/metrics"):
+            self.send_error(404)
+            return
+        body = render_prometheus(load_flushed(self.directory)).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(port: int, host: str = "127.0.0.1", directory: Path = METRICS_DIR) -> ThreadingHTTPServer:
+    """Serve the merged histograms at http://host:port/metrics from a daemon thread"""
+    handler = type("MetricsHandler", (_MetricsHandler,), {"directory": directory})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name="latency-metrics", daemon=True).start()
+    logger.info(f"Serving latency metrics on http://{host}:{port}/metrics from {directory}")
+    return server
+
+
+def _print_summary(histograms: Dict[str, Dict[str, Histogram]]) -> None:
+    for agent, agent_histograms in sorted(histograms.items()):
+        for name in METRIC_NAMES:
+            histogram = agent_histograms[name]
+            if histogram.count:
+                p50, p95, p99 = (histogram.quantile(q) * 1000 for q in QUANTILES)
+                print(f"{agent:<22} {name:<14} p50={p50:7.0f}ms p95={p95:7.0f}ms p99={p99:7.0f}ms n={histogram.count}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve or print the agents' flushed latency histograms")
+    parser.add_argument("--port", type=int, help="serve Prometheus-style metrics on this port")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--dir", type=Path, default=METRICS_DIR, help="directory the agents flush to")
+    args = parser.parse_args()
+
+    if args.port:
+        serve_metrics(args.port, args.host, args.dir)
+        threading.Event().wait()
+    else:
+        _print_summary(load_flushed(args.dir))
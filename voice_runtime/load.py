@@ -0,0 +1,297 @@
+"""
+Concurrent-session load test: how many sessions one process can hold.
+
+Runs N copies of a benchmark scenario at once on one event loop, the way
+sessions share a job process's loop, and ramps N step by step. Each session
+is a real AgentSession driven by FakeLLM, with think time between turns.
+At every step it records:
+
+- per-turn latency (p50/p95/p99 of session.run(), our own overhead plus --ttft)
+- event loop lag, from a 10ms heartbeat
+- CPU used by the process, in cores
+- peak RSS
+
+The capacity is the last step whose p95 turn latency and worst loop lag stay
+within budget. The suggested VOICE_MAX_SESSIONS for the multi-agent worker
+assumes LiveKit's default executor, one job process per session: it is the
+fewer of the sessions whose measured CPU fits in the machine's cores at
+LiveKit's load threshold, and of the job processes whose RSS (at the first
+step) fits in available memory.
+
+    uv run --project backend python -m voice_runtime.load grocery-recipe
+    uv run --project backend python -m voice_runtime.load fraud-verification --steps 1,5,10,20,40 --json curve.json
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from types import ModuleType
+from typing import List, Optional, Tuple
+
+import psutil
+from livekit.agents import AgentSession
+
+from voice_runtime.agents import AGENTS_BY_NAME, load_agent_module
+from voice_runtime.bench import SCENARIOS_BY_NAME, Scenario, _tool_summary, isolated_backend
+from voice_runtime.fakes import FakeLLM
+from voice_runtime.instrumentation import STALL_THRESHOLD_MS
+
+logger = logging.getLogger("voice-runtime")
+
+DEFAULT_STEPS = (1, 2, 4, 8, 16, 32, 64)
+
+LAG_INTERVAL = 0.01
+
+# Share of the machine's cores sessions may use, as LiveKit's default worker load_threshold
+CPU_HEADROOM = 0.75
+
+
+@dataclass
+class StepResult:
+    sessions: int
+    turns: int
+    errors: int
+    duration_s: float
+    turn_p50_ms: float
+    turn_p95_ms: float
+    turn_p99_ms: float
+    lag_p95_ms: float
+    lag_max_ms: float
+    cpu_cores: float
+    rss_mb: float
+
+    @property
+    def turns_per_s(self) -> float:
+        return self.turns / self.duration_s if self.duration_s else 0.0
+
+    def within(self, max_p95_ms: float, max_lag_ms: float) -> bool:
+        return not self.errors and self.turn_p95_ms <= max_p95_ms and self.lag_max_ms <= max_lag_ms
+
+
+def _percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile, 0.0 for no values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class ProcessSampler:
+    """Loop lag, CPU and peak RSS of this process while a step runs"""
+
+    def __init__(self) -> None:
+        self.process = psutil.Process()
+        self.lags_ms: List[float] = []
+        self.peak_rss = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(LAG_INTERVAL)
+            self.lags_ms.append(max(0.0, (time.perf_counter() - start - LAG_INTERVAL) * 1000))
+            self.peak_rss = max(self.peak_rss, self.process.memory_info().rss)
+
+    def start(self) -> None:
+        self._cpu_start = sum(self.process.cpu_times()[:2])
+        self._wall_start = time.perf_counter()
+        self.peak_rss = self.process.memory_info().rss
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> Tuple[float, float]:
+        """Stop sampling; returns (wall seconds, CPU cores used on average)"""
+        wall = time.perf_counter() - self._wall_start
+        cpu = sum(self.process.cpu_times()[:2]) - self._cpu_start
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        return wall, cpu / wall if wall else 0.0
+
+
+async def run_session(
+    module: ModuleType, scenario: Scenario, *, rounds: int, think: float, ttft: float, delay: float
+) -> Tuple[List[float], int]:
+    """One synthetic user playing a scenario; returns turn latencies (ms) and error count"""
+    await asyncio.sleep(delay)
+    fake_llm = FakeLLM(ttft=ttft)
+    session_kwargs = {}
+    if scenario.build_userdata is not None:
+        session_kwargs["userdata"] = scenario.build_userdata(module)
+
+    latencies: List[float] = []
+    errors = 0
+    async with AgentSession(llm=fake_llm, **session_kwargs) as session:
+        await session.start(scenario.build_agent(module))
+        for _ in range(rounds):
+            for turn in scenario.turns:
+                fake_llm.turn = turn
+                start = time.perf_counter()
+                result = await session.run(user_input=turn.user_input)
+                latencies.append((time.perf_counter() - start) * 1000)
+                _, tools, tool_errors = _tool_summary(result.events)
+                errors += len(tool_errors) + sum(1 for name, _ in turn.tool_calls if name not in tools)
+                await asyncio.sleep(think)
+    return latencies, errors
+
+
+async def run_step(
+    scenario: Scenario, sessions: int, *, rounds: int = 2, think: float = 1.0, ttft: float = 0.0
+) -> StepResult:
+    """Run `sessions` concurrent copies of a scenario against one fresh backend copy"""
+    with isolated_backend(AGENTS_BY_NAME[scenario.agent]) as sandbox:
+        module = load_agent_module(sandbox)
+        gc.collect()
+        sampler = ProcessSampler()
+        sampler.start()
+        # Spread session starts over one think time so turns don't arrive in lockstep
+        results = await asyncio.gather(*(
+            run_session(module, scenario, rounds=rounds, think=think, ttft=ttft, delay=think * i / sessions)
+            for i in range(sessions)
+        ))
+        duration, cpu_cores = await sampler.stop()
+
+    latencies = [ms for session_latencies, _ in results for ms in session_latencies]
+    return StepResult(
+        sessions=sessions,
+        turns=len(latencies),
+        errors=sum(errors for _, errors in results),
+        duration_s=duration,
+        turn_p50_ms=_percentile(latencies, 0.5),
+        turn_p95_ms=_percentile(latencies, 0.95),
+        turn_p99_ms=_percentile(latencies, 0.99),
+        lag_p95_ms=_percentile(sampler.lags_ms, 0.95),
+        lag_max_ms=max(sampler.lags_ms, default=0.0),
+        cpu_cores=cpu_cores,
+        rss_mb=sampler.peak_rss / (1024 * 1024),
+    )
+
+
+async def ramp(
+    scenario: Scenario,
+    steps: List[int],
+    *,
+    rounds: int = 2,
+    think: float = 1.0,
+    ttft: float = 0.0,
+    max_p95_ms: float = 250.0,
+    max_lag_ms: float = STALL_THRESHOLD_MS,
+) -> List[StepResult]:
+    """Run each step in turn, stopping after the first one over budget"""
+    results = []
+    for sessions in steps:
+        result = await run_step(scenario, sessions, rounds=rounds, think=think, ttft=ttft)
+        results.append(result)
+        logger.info(f"{scenario.name}: {sessions} sessions, p95 {result.turn_p95_ms:.0f}ms, lag max {result.lag_max_ms:.0f}ms")
+        if not result.within(max_p95_ms, max_lag_ms):
+            break
+    return results
+
+
+def find_capacity(results: List[StepResult], max_p95_ms: float, max_lag_ms: float) -> Optional[StepResult]:
+    """Last step before the first one that breaks the latency or loop lag budget"""
+    capacity = None
+    for result in results:
+        if not result.within(max_p95_ms, max_lag_ms):
+            break
+        capacity = result
+    return capacity
+
+
+def format_curve(
+    results: List[StepResult],
+    capacity: Optional[StepResult],
+    *,
+    cores: Optional[int] = None,
+    available_mb: Optional[float] = None,
+) -> str:
+    lines = [
+        f"{'sessions':>8} {'turns/s':>8} {'p50':>7} {'p95':>7} {'p99':>7} "
+        f"{'lag p95':>8} {'lag max':>8} {'cpu':>6} {'rss MB':>8} {'errors':>6}"
+    ]
+    for r in results:
+        lines.append(
+            f"{r.sessions:>8} {r.turns_per_s:>8.1f} {r.turn_p50_ms:>7.1f} {r.turn_p95_ms:>7.1f} {r.turn_p99_ms:>7.1f} "
+            f"{r.lag_p95_ms:>8.1f} {r.lag_max_ms:>8.1f} {r.cpu_cores:>6.2f} {r.rss_mb:>8.1f} {r.errors:>6}"
+        )
+
+    if capacity is None:
+        lines.append("\nEven one session is over budget; fix that before sizing workers.")
+        return "\n".join(lines)
+
+    per_session = capacity.cpu_cores / capacity.sessions
+    lines.append(
+        f"\nCapacity: {capacity.sessions} sessions per process "
+        f"({capacity.cpu_cores:.2f} cores, {per_session * 100:.1f}% of a core per session)"
+    )
+
+    # Each job runs in its own process, which carries the full RSS of a
+    # process with the agents loaded, so memory can run out before the CPU does
+    cores = cores or os.cpu_count() or 1
+    if available_mb is None:
+        available_mb = psutil.virtual_memory().available / (1024 * 1024)
+    job_rss_mb = results[0].rss_mb
+    by_cpu = int(cores * CPU_HEADROOM / per_session) if per_session > 0 else None
+    by_memory = int(available_mb / job_rss_mb) if job_rss_mb > 0 else None
+    limits = [limit for limit in (by_cpu, by_memory) if limit is not None]
+    lines.append(f"Suggested for this {cores}-core machine, assuming one job process per session:")
+    if by_cpu is not None:
+        lines.append(
+            f"  CPU: {by_cpu} sessions at {per_session * 100:.1f}% of a core each, "
+            f"within {CPU_HEADROOM:.0%} of the cores"
+        )
+    if by_memory is not None:
+        lines.append(
+            f"  memory: {by_memory} job processes at {job_rss_mb:.0f} MB RSS each "
+            f"(measured with {results[0].sessions} session(s)), in {available_mb:.0f} MB available"
+        )
+    if limits:
+        lines.append(f"  VOICE_MAX_SESSIONS={max(1, min(limits))}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Ramp concurrent sessions and report a capacity curve")
+    parser.add_argument("scenario", nargs="?", default="grocery-recipe",
+                        help=f"benchmark scenario to run (one of {', '.join(SCENARIOS_BY_NAME)})")
+    parser.add_argument("--steps", default=",".join(map(str, DEFAULT_STEPS)), help="comma-separated session counts")
+    parser.add_argument("--rounds", type=int, default=2, help="times each session replays the scenario")
+    parser.add_argument("--think", type=float, default=1.0, help="seconds a user waits between turns")
+    parser.add_argument("--ttft", type=float, default=0.0, help="simulated LLM time to first token, in seconds")
+    parser.add_argument("--max-p95-ms", type=float, default=250.0, help="turn latency budget")
+    parser.add_argument("--max-lag-ms", type=float, default=STALL_THRESHOLD_MS, help="event loop lag budget")
+    parser.add_argument("--json", type=Path, help="also write the curve to this file")
+    args = parser.parse_args(argv)
+    if args.scenario not in SCENARIOS_BY_NAME:
+        parser.error(f"unknown scenario: {args.scenario}")
+    try:
+        steps = [int(step) for step in args.steps.split(",")]
+    except ValueError:
+        parser.error(f"invalid --steps: {args.steps}")
+
+    logging.basicConfig(level=logging.WARNING)
+    results = asyncio.run(ramp(
+        SCENARIOS_BY_NAME[args.scenario], steps,
+        rounds=args.rounds, think=args.think, ttft=args.ttft,
+        max_p95_ms=args.max_p95_ms, max_lag_ms=args.max_lag_ms,
+    ))
+    capacity = find_capacity(results, args.max_p95_ms, args.max_lag_ms)
+    print(format_curve(results, capacity))
+
+    if args.json:
+        args.json.write_text(json.dumps({
+            "scenario": args.scenario,
+            "capacity": capacity.sessions if capacity else 0,
+            "steps": [{**asdict(r), "turns_per_s": r.turns_per_s} for r in results],
+        }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
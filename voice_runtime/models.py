@@ -0,0 +1,135 @@
+"""
+Process-wide model loading shared by every agent.
+
+The VAD weights are loaded at most once per process, so a worker hosting
+several agents (see worker.py) holds a single copy no matter how many agent
+prewarm functions ask for it. The turn detector runs in the worker's shared
+inference process, so its ONNX weights are already loaded once per worker.
+
+prewarm_pipeline() goes one step further and runs a warm-up inference on
+silence for every local model, so the first turn of the first job doesn't
+pay for lazy ONNX initialisation.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+from livekit.agents import JobExecutorType, JobProcess, llm
+from livekit.plugins import noise_cancellation, silero
+from livekit.plugins.noise_cancellation.plugin import model_path
+from livekit.plugins.silero.onnx_model import OnnxModel
+from livekit.plugins.turn_detector.multilingual import MultilingualModel
+
+logger = logging.getLogger("voice-runtime")
+
+VAD_SAMPLE_RATE = 16000
+
+_vad: Optional[silero.VAD] = None
+_vad_lock = threading.Lock()
+
+
+def load_vad() -> silero.VAD:
+    """Load the Silero VAD once for this process and return the shared instance"""
+    global _vad
+    with _vad_lock:
+        if _vad is None:
+            _vad = silero.VAD.load()
+            logger.info("Silero VAD loaded")
+        return _vad
+
+
+@contextmanager
+def _timed(step: str, timings: Dict[str, float]) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[step] = time.perf_counter() - start
+        logger.info(f"Prewarm step '{step}' took {timings[step] * 1000:.1f}ms")
+
+
+def _warm_vad(vad: silero.VAD) -> None:
+    """Run one inference window of silence through the VAD's ONNX session"""
+    model = OnnxModel(onnx_session=vad._onnx_session, sample_rate=VAD_SAMPLE_RATE)
+    model(np.zeros(model.window_size_samples, dtype=np.float32))
+
+
+def _warm_noise_cancellation() -> None:
+    """Read the BVC model file once so the first audio stream loads it from page cache"""
+    with open(model_path("bvc"), "rb") as f:
+        while f.read(1 << 20):
+            pass
+
+
+def prewarm_pipeline(proc: JobProcess) -> None:
+    """Load and warm up every local pipeline component, caching them in proc.userdata
+
+    Sets ``vad``, ``noise_cancellation`` and ``prewarm_timings``. Safe to call
+    more than once per process (the multi-agent worker calls it for every
+    agent); only the first call does any work.
+    """
+    if "prewarm_timings" in proc.userdata:
+        return
+
+    timings: Dict[str, float] = {}
+
+    with _timed("noise cancellation", timings):
+        proc.userdata["noise_cancellation"] = noise_cancellation.BVC()
+        try:
+            _warm_noise_cancellation()
+        except OSError as e:
+            logger.warning(f"Could not preload noise cancellation model: {e}")
+
+    with _timed("vad load", timings):
+        vad = load_vad()
+    proc.userdata["vad"] = vad
+
+    with _timed("vad warm-up", timings):
+        try:
+            _warm_vad(vad)
+        except Exception as e:
+            logger.warning(f"VAD warm-up inference failed: {e}")
+
+    proc.userdata["prewarm_timings"] = timings
+    logger.info(f"Pipeline prewarmed in {sum(timings.values()) * 1000:.1f}ms")
+
+
+async def _warm_turn_detector(model: MultilingualModel, timings: Dict[str, float]) -> None:
+    chat_ctx = llm.ChatContext()
+    chat_ctx.add_message(role="user", content="hello")
+    try:
+        with _timed("turn detector warm-up", timings):
+            await model.predict_end_of_turn(chat_ctx)
+    except Exception as e:
+        logger.warning(f"Turn detector warm-up inference failed: {e}")
+
+
+def turn_detector(proc: JobProcess) -> MultilingualModel:
+    """Return the turn detector for a job, warming it up on first use
+
+    The model talks to the worker's inference process through the job
+    process's IPC client. With the default process executor that client lives
+    as long as the process, so the model is cached in proc.userdata and reused
+    by later jobs. The first call per process fires a warm-up inference in the
+    background so it overlaps with session start and room connection.
+
+    Must be called from inside a job entrypoint.
+    """
+    model = proc.userdata.get("turn_detection")
+    if model is not None:
+        return model
+
+    model = MultilingualModel()
+    timings = proc.userdata.setdefault("prewarm_timings", {})
+    if "turn detector warm-up" not in timings:
+        proc.userdata["turn_detector_warmup"] = asyncio.ensure_future(
+            _warm_turn_detector(model, timings)
+        )
+    if proc.executor_type == JobExecutorType.PROCESS:
+        proc.userdata["turn_detection"] = model
+    return model
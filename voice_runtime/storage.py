@@ -0,0 +1,433 @@
+"""
+Async persistence shared by the agents.
+
+Agents keep two kinds of data:
+- keyed records (an order, a lead, a meeting), via put/get/keys
+- append-only logs (wellness check-ins, day-09's order history), via
+  append/read, and tail for the last few entries
+
+update() atomically replaces a keyed record with a function of its current
+value, across processes as well as sessions, and increment() adds to a
+numeric field with it. Use them for counters such as order numbers and for
+records several sessions append to. The file backends hold an exclusive
+lock file while they update the record; sqlite uses an immediate
+transaction.
+
+Store is the async facade. Every backend call runs on one dedicated thread
+per store, so file and sqlite I/O never blocks the event loop, and writes
+are applied in the order they were issued. Three backends are
+interchangeable:
+
+- ``json`` (default): keyed records are ``<root>/<collection>/<key>.json``
+  and logs are ``<root>/<collection>.json`` arrays. This is the layout the
+  agents already had on disk. Appending rewrites the whole array, under a
+  lock file so processes don't drop each other's entries.
+- ``jsonl``: ``<root>/<collection>.jsonl`` for logs and
+  ``<root>/<collection>.records.jsonl`` for keyed records (the last write
+  for a key wins). Every write is a single locked append, and tail reads
+  the file backwards from the end.
+- ``sqlite``: everything in ``<root>/store.sqlite3``.
+
+Pick one with ``VOICE_STORE_BACKEND``. The first time the jsonl backend
+touches a log, an existing ``<collection>.json`` array is copied into
+``<collection>.jsonl`` (the array file is left as it was). Keyed records
+are not migrated when switching.
+"""
+
+import asyncio
+import functools
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows: counters are only safe within one process
+    fcntl = None
+
+Record = Dict[str, Any]
+# Computes a record's new value from its current one (None if there is none yet)
+Updater = Callable[[Optional[Record]], Record]
+
+_UNSAFE_KEY_CHARS = re.compile(r"[^\w.-]")
+
+
+def _safe_key(key: str) -> str:
+    return _UNSAFE_KEY_CHARS.sub("_", key)
+
+
+def write_json_atomic(path: Path, data: Any) -> None:
+    """Write JSON to a temp file in the same directory, then rename over path"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.stem}-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+@contextmanager
+def _file_lock(path: Path) -> Iterator[None]:
+    """Exclusive lock on path, shared by every process on this machine"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _update_json_file(path: Path, fn: Updater) -> Record:
+    with _file_lock(path.parent / f".{path.name}.lock"):
+        try:
+            with open(path, encoding="utf-8") as f:
+                current = json.load(f)
+        except FileNotFoundError:
+            current = None
+        record = fn(current)
+        write_json_atomic(path, record)
+        return record
+
+
+def _add_to_field(field: str, by: int) -> Updater:
+    def add(record: Optional[Record]) -> Record:
+        record = record or {}
+        record[field] = record.get(field, 0) + by
+        return record
+
+    return add
+
+
+def _increment_json_file(path: Path, field: str, by: int) -> int:
+    return _update_json_file(path, _add_to_field(field, by))[field]
+
+
+def _tail_lines(path: Path, n: int, block_size: int = 8192) -> List[bytes]:
+    """The last n complete lines of a file, read backwards a block at a time"""
+    if n <= 0:
+        return []
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return []
+    with f:
+        pos = f.seek(0, os.SEEK_END)
+        data = b""
+        # n + 1 newlines guarantee n whole lines after the first, possibly partial, one
+        while pos > 0 and data.count(b"\n") <= n:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    lines = data.split(b"\n")
+    # The piece after the last newline is a line still being written
+    lines.pop()
+    if pos > 0:
+        lines = lines[1:]
+    return [line for line in lines if line.strip()][-n:]
+
+
+class JsonFileBackend:
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def put(self, collection: str, key: str, record: Record) -> None:
+        write_json_atomic(self.root / collection / f"{_safe_key(key)}.json", record)
+
+    def get(self, collection: str, key: str) -> Optional[Record]:
+        try:
+            with open(self.root / collection / f"{_safe_key(key)}.json", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def keys(self, collection: str) -> List[str]:
+        directory = self.root / collection
+        if not directory.is_dir():
+            return []
+        return sorted(path.stem for path in directory.glob("*.json"))
+
+    def update(self, collection: str, key: str, fn: Updater) -> Record:
+        return _update_json_file(self.root / collection / f"{_safe_key(key)}.json", fn)
+
+    def increment(self, collection: str, key: str, field: str, by: int) -> int:
+        return _increment_json_file(self.root / collection / f"{_safe_key(key)}.json", field, by)
+
+    def append(self, collection: str, record: Record) -> None:
+        # Read-modify-write, so other processes wait rather than lose their entries
+        with _file_lock(self.root / f".{collection}.json.lock"):
+            log = self.read(collection)
+            log.append(record)
+            write_json_atomic(self.root / f"{collection}.json", log)
+
+    def read(self, collection: str) -> List[Record]:
+        try:
+            with open(self.root / f"{collection}.json", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    def tail(self, collection: str, n: int) -> List[Record]:
+        return self.read(collection)[-n:] if n > 0 else []
+
+
+class JsonlBackend:
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        # Logs already checked for a <collection>.json array to import
+        self._migrated: Set[str] = set()
+
+    def _lock(self, path: Path):
+        return _file_lock(path.parent / f".{path.name}.lock")
+
+    def _write_line(self, path: Path, data: Any) -> None:
+        line = (json.dumps(data, ensure_ascii=False) + "\n").encode("utf-8")
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+
+    def _append_line(self, path: Path, data: Any) -> None:
+        # One write of the whole line, under the lock so lines from processes never interleave
+        with self._lock(path):
+            self._write_line(path, data)
+
+    def _read_lines(self, path: Path) -> List[Any]:
+        try:
+            with open(path, encoding="utf-8") as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def _records(self, collection: str) -> Dict[str, Record]:
+        records: Dict[str, Record] = {}
+        for line in self._read_lines(self.root / f"{collection}.records.jsonl"):
+            records[line["key"]] = line["record"]
+        return records
+
+    def put(self, collection: str, key: str, record: Record) -> None:
+        self._append_line(self.root / f"{collection}.records.jsonl", {"key": key, "record": record})
+
+    def get(self, collection: str, key: str) -> Optional[Record]:
+        return self._records(collection).get(key)
+
+    def keys(self, collection: str) -> List[str]:
+        return sorted(self._records(collection))
+
+    def update(self, collection: str, key: str, fn: Updater) -> Record:
+        path = self.root / f"{collection}.records.jsonl"
+        with self._lock(path):
+            record = fn(self._records(collection).get(key))
+            self._write_line(path, {"key": key, "record": record})
+        return record
+
+    def increment(self, collection: str, key: str, field: str, by: int) -> int:
+        # Counters are rewritten in place, so they live beside the append-only records
+        return _increment_json_file(self.root / f"{collection}.{_safe_key(key)}.counter.json", field, by)
+
+    def _log_path(self, collection: str) -> Path:
+        path = self.root / f"{collection}.jsonl"
+        if collection not in self._migrated:
+            self._migrate_json_log(collection, path)
+            self._migrated.add(collection)
+        return path
+
+    def _migrate_json_log(self, collection: str, path: Path) -> None:
+        """Copy a json-backend log array into a new <collection>.jsonl, once"""
+        array_path = self.root / f"{collection}.json"
+        if path.exists() or not array_path.exists():
+            return
+        with _file_lock(path.parent / f".{path.name}.lock"):
+            # Another process may have migrated it while we waited
+            if path.exists():
+                return
+            with open(array_path, encoding="utf-8") as f:
+                log = json.load(f)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.stem}-", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.writelines(json.dumps(entry, ensure_ascii=False) + "\n" for entry in log)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+    def append(self, collection: str, record: Record) -> None:
+        self._append_line(self._log_path(collection), record)
+
+    def read(self, collection: str) -> List[Record]:
+        return self._read_lines(self._log_path(collection))
+
+    def tail(self, collection: str, n: int) -> List[Record]:
+        return [json.loads(line) for line in _tail_lines(self._log_path(collection), n)]
+
+
+class SqliteBackend:
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.path = root / "store.sqlite3"
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # Created lazily so it belongs to the store's I/O thread
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS records ("
+                "collection TEXT NOT NULL, key TEXT NOT NULL, data TEXT NOT NULL, "
+                "PRIMARY KEY (collection, key))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS logs ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, collection TEXT NOT NULL, data TEXT NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS logs_collection ON logs (collection, id)")
+            self._conn.commit()
+        return self._conn
+
+    def put(self, collection: str, key: str, record: Record) -> None:
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO records (collection, key, data) VALUES (?, ?, ?)",
+                (collection, key, json.dumps(record, ensure_ascii=False)),
+            )
+
+    def get(self, collection: str, key: str) -> Optional[Record]:
+        row = self.conn.execute(
+            "SELECT data FROM records WHERE collection = ? AND key = ?", (collection, key)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def keys(self, collection: str) -> List[str]:
+        rows = self.conn.execute(
+            "SELECT key FROM records WHERE collection = ? ORDER BY key", (collection,)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def update(self, collection: str, key: str, fn: Updater) -> Record:
+        conn = self.conn
+        # Takes the write lock up front, so no other process reads the old value in between
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT data FROM records WHERE collection = ? AND key = ?", (collection, key)
+            ).fetchone()
+            record = fn(json.loads(row[0]) if row else None)
+            conn.execute(
+                "INSERT OR REPLACE INTO records (collection, key, data) VALUES (?, ?, ?)",
+                (collection, key, json.dumps(record, ensure_ascii=False)),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return record
+
+    def increment(self, collection: str, key: str, field: str, by: int) -> int:
+        return self.update(collection, key, _add_to_field(field, by))[field]
+
+    def append(self, collection: str, record: Record) -> None:
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO logs (collection, data) VALUES (?, ?)",
+                (collection, json.dumps(record, ensure_ascii=False)),
+            )
+
+    def read(self, collection: str) -> List[Record]:
+        rows = self.conn.execute(
+            "SELECT data FROM logs WHERE collection = ? ORDER BY id", (collection,)
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def tail(self, collection: str, n: int) -> List[Record]:
+        rows = self.conn.execute(
+            "SELECT data FROM logs WHERE collection = ? ORDER BY id DESC LIMIT ?", (collection, max(n, 0))
+        ).fetchall()
+        return [json.loads(row[0]) for row in reversed(rows)]
+
+
+Backend = Union[JsonFileBackend, JsonlBackend, SqliteBackend]
+
+BACKENDS = {
+    "json": JsonFileBackend,
+    "jsonl": JsonlBackend,
+    "sqlite": SqliteBackend,
+}
+
+
+class Store:
+    """Async access to a backend, with all I/O on one ordered worker thread"""
+
+    def __init__(self, backend: Backend) -> None:
+        self.backend = backend
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="voice-store")
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args))
+
+    async def put(self, collection: str, key: str, record: Record) -> None:
+        await self._run(self.backend.put, collection, key, record)
+
+    async def get(self, collection: str, key: str) -> Optional[Record]:
+        return await self._run(self.backend.get, collection, key)
+
+    async def keys(self, collection: str) -> List[str]:
+        return await self._run(self.backend.keys, collection)
+
+    async def update(self, collection: str, key: str, fn: Updater) -> Record:
+        """Atomically replace a record with fn(current record or None) and return the new record.
+
+        fn runs on the store's I/O thread while the record is locked, so it
+        should only compute the new value.
+        """
+        return await self._run(self.backend.update, collection, key, fn)
+
+    async def increment(self, collection: str, key: str, field: str, by: int = 1) -> int:
+        """Atomically add to a numeric field of a record and return its new value"""
+        return await self._run(self.backend.increment, collection, key, field, by)
+
+    async def append(self, collection: str, record: Record) -> None:
+        await self._run(self.backend.append, collection, record)
+
+    async def read(self, collection: str) -> List[Record]:
+        return await self._run(self.backend.read, collection)
+
+    async def tail(self, collection: str, n: int) -> List[Record]:
+        """The last n entries of a log, oldest first"""
+        return await self._run(self.backend.tail, collection, n)
+
+
+_stores: Dict[Tuple[str, str], Store] = {}
+_stores_lock = threading.Lock()
+
+
+def open_store(root: Union[str, Path], backend: Optional[str] = None) -> Store:
+    """Return the process-wide store for a directory, creating it on first use"""
+    backend = backend or os.getenv("VOICE_STORE_BACKEND", "json")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown store backend '{backend}', expected one of {', '.join(BACKENDS)}")
+
+    root = Path(root).resolve()
+    with _stores_lock:
+        store = _stores.get((str(root), backend))
+        if store is None:
+            store = _stores[(str(root), backend)] = Store(BACKENDS[backend](root))
+        return store
@@ -0,0 +1,136 @@
+"""
+Size governor for tool results that go back into the LLM context.
+
+Some tools return whatever their data happens to hold: the whole wellness
+log, every matching product, a long rubric. Each of those strings is
+resent on every following turn. page_tool_outputs() wraps an agent's tools
+so a string result over TOOL_OUTPUT_MAX_TOKENS (default 500) is cut into
+pages. Only the first page is returned, ending with a handle. The LLM reads
+on with the read_more_tool_output tool it adds. Oversized results are
+logged with their tool name and size.
+
+Call it after instrument_tools(), so tool timings and stall attribution
+still see the original tool functions:
+
+    await instrument_tools(ctx, agent, name="grocery-wala")
+    await page_tool_outputs(agent)
+"""
+
+import functools
+import inspect
+import logging
+import os
+from collections import OrderedDict
+from typing import List
+
+from livekit.agents import Agent, function_tool, llm
+from livekit.agents.llm.tool_context import get_function_info
+
+from voice_runtime.context import CHARS_PER_TOKEN
+
+logger = logging.getLogger("voice-runtime")
+
+MAX_TOKENS = int(os.getenv("TOOL_OUTPUT_MAX_TOKENS", "500"))
+
+# Paged results kept per agent; older handles expire first
+MAX_HANDLES = 16
+
+
+def split_pages(text: str, max_chars: int) -> List[str]:
+    """Split text into pages of at most max_chars, breaking between lines where possible"""
+    pages: List[str] = []
+    current = ""
+    for line in text.splitlines(keepends=True):
+        while len(line) > max_chars:
+            if current:
+                pages.append(current)
+                current = ""
+            pages.append(line[:max_chars])
+            line = line[max_chars:]
+        if len(current) + len(line) > max_chars:
+            pages.append(current)
+            current = ""
+        current += line
+    if current:
+        pages.append(current)
+    return [page.rstrip("\n") for page in pages]
+
+
+class ToolOutputPager:
+    """Caps one agent's tool results and serves the remaining pages"""
+
+    def __init__(self, max_tokens: int = MAX_TOKENS) -> None:
+        self.max_chars = max_tokens * CHARS_PER_TOKEN
+        self.results: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._next_id = 1
+
+    def cap(self, tool_name: str, output: str) -> str:
+        if len(output) <= self.max_chars:
+            return output
+
+        pages = split_pages(output, self.max_chars)
+        handle = f"{tool_name}-{self._next_id}"
+        self._next_id += 1
+        self.results[handle] = pages
+        while len(self.results) > MAX_HANDLES:
+            self.results.popitem(last=False)
+
+        logger.warning(
+            f"Tool {tool_name} returned ~{len(output) // CHARS_PER_TOKEN} tokens, over the "
+            f"{self.max_chars // CHARS_PER_TOKEN}-token budget; split into {len(pages)} pages as '{handle}'"
+        )
+        return self._render(handle, 1)
+
+    def page(self, handle: str, page: int) -> str:
+        pages = self.results.get(handle)
+        if pages is None:
+            return f"No output with handle '{handle}'. It may have expired; call the original tool again."
+        if not 1 <= page <= len(pages):
+            return f"Output '{handle}' has pages 1 to {len(pages)}."
+        return self._render(handle, page)
+
+    def _render(self, handle: str, page: int) -> str:
+        pages = self.results[handle]
+        if page == len(pages):
+            return f"{pages[page - 1]}\n\n[Page {page} of {len(pages)}, end of output.]"
+        return (
+            f"{pages[page - 1]}\n\n[Page {page} of {len(pages)}. If you need more, call "
+            f"read_more_tool_output with handle '{handle}' and page {page + 1}.]"
+        )
+
+    def read_more_tool(self) -> llm.FunctionTool:
+        @function_tool
+        async def read_more_tool_output(handle: str, page: int) -> str:
+            """Read another page of a tool result that was too long to return at once.
+
+            Args:
+                handle: The handle given at the end of the shortened result
+                page: The page number to read
+            """
+            return self.page(handle, page)
+
+        return read_more_tool_output
+
+
+def paged_tool(tool: llm.FunctionTool, pager: ToolOutputPager) -> llm.FunctionTool:
+    """Wrap a function tool so string results over the budget are paged"""
+    name = get_function_info(tool).name
+
+    @functools.wraps(tool)
+    async def wrapper(*args, **kwargs):
+        result = tool(*args, **kwargs)
+        if inspect.isawaitable(result):
+            result = await result
+        if isinstance(result, str):
+            result = pager.cap(name, result)
+        return result
+
+    return wrapper
+
+
+async def page_tool_outputs(agent: Agent, max_tokens: int = MAX_TOKENS) -> ToolOutputPager:
+    """Cap every tool result of an agent and give it a tool to read the rest"""
+    pager = ToolOutputPager(max_tokens)
+    tools = [paged_tool(tool, pager) if llm.is_function_tool(tool) else tool for tool in agent.tools]
+    await agent.update_tools([*tools, pager.read_more_tool()])
+    return pager
@@ -0,0 +1,212 @@
+"""
+On-disk cache of synthesized audio for lines the agents speak word for word.
+
+Openers like the Ramayan introduction or the fraud agent's greeting are the
+same on every call. Synthesizing them again each time costs seconds of TTFB
+and Murf spend. CachedTTS wraps a TTS (normally murf.TTS):
+
+- synthesize() is served from the cache. The key is the wrapped TTS's voice,
+  style, model and the other options that change the audio, plus the text.
+  Misses stream from the wrapped TTS as usual and are written to the cache
+  once complete.
+- stream(), which carries the LLM's replies, goes straight to the wrapped TTS.
+
+say_cached() is session.say() for fixed lines: it plays the audio through
+synthesize(), and so through the cache. Entries are WAV files in
+TTS_CACHE_DIR (default ``<repo>/tts_cache``). The directory is kept under
+TTS_CACHE_MAX_MB (default 200) by evicting the least recently used entries.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import wave
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Optional, Set
+
+from livekit import rtc
+from livekit.agents import AgentSession, tts, utils
+from livekit.agents.metrics import TTSMetrics
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS, APIConnectOptions
+from livekit.agents.voice import SpeechHandle
+
+logger = logging.getLogger("voice-runtime")
+
+CACHE_DIR = Path(os.getenv("TTS_CACHE_DIR", Path(__file__).resolve().parent.parent / "tts_cache"))
+MAX_BYTES = int(float(os.getenv("TTS_CACHE_MAX_MB", "200")) * 1024 * 1024)
+
+# TTS options that change the synthesized audio, read from the wrapped TTS
+_KEY_OPTIONS = ("model", "voice", "style", "locale", "speed", "pitch", "sample_rate", "encoding")
+
+
+@dataclass
+class CachedAudio:
+    pcm: bytes
+    sample_rate: int
+    num_channels: int
+
+
+class AudioCache:
+    """WAV files on disk, evicted least recently used first"""
+
+    def __init__(self, directory: Path = CACHE_DIR, max_bytes: int = MAX_BYTES) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.wav"
+
+    def get(self, key: str) -> Optional[CachedAudio]:
+        path = self._path(key)
+        try:
+            with wave.open(str(path), "rb") as f:
+                audio = CachedAudio(f.readframes(f.getnframes()), f.getframerate(), f.getnchannels())
+            # The file's mtime is its recency for eviction
+            os.utime(path)
+        except (FileNotFoundError, EOFError, wave.Error):
+            return None
+        return audio
+
+    def put(self, key: str, audio: CachedAudio) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f".{key}-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f, wave.open(f, "wb") as w:
+                w.setnchannels(audio.num_channels)
+                w.setsampwidth(2)
+                w.setframerate(audio.sample_rate)
+                w.writeframes(audio.pcm)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self.evict()
+
+    def evict(self) -> None:
+        """Delete the least recently used entries until the cache fits max_bytes"""
+        entries = []
+        for path in self.directory.glob("*.wav"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+class CachedTTS(tts.TTS):
+    """Serve synthesize() from an AudioCache, falling back to the wrapped TTS"""
+
+    def __init__(self, wrapped: tts.TTS, cache: Optional[AudioCache] = None) -> None:
+        super().__init__(
+            capabilities=wrapped.capabilities,
+            sample_rate=wrapped.sample_rate,
+            num_channels=wrapped.num_channels,
+        )
+        self.wrapped = wrapped
+        self.cache = cache or AudioCache()
+        # Request ids of misses, whose metrics we already report ourselves
+        self._miss_request_ids: Set[str] = set()
+        wrapped.on("metrics_collected", self._forward_metrics)
+        wrapped.on("error", lambda error: self.emit("error", error))
+
+    @property
+    def model(self) -> str:
+        return self.wrapped.model
+
+    @property
+    def provider(self) -> str:
+        return self.wrapped.provider
+
+    def _forward_metrics(self, metrics: TTSMetrics) -> None:
+        if metrics.request_id in self._miss_request_ids:
+            self._miss_request_ids.discard(metrics.request_id)
+            return
+        self.emit("metrics_collected", metrics)
+
+    def cache_key(self, text: str) -> str:
+        opts = getattr(self.wrapped, "_opts", self.wrapped)
+        fields = {name: getattr(opts, name, None) for name in _KEY_OPTIONS}
+        fields.update(provider=self.wrapped.provider, text=text)
+        return hashlib.sha256(json.dumps(fields, sort_keys=True, default=str).encode()).hexdigest()
+
+    def synthesize(
+        self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS
+    ) -> "CachedChunkedStream":
+        return CachedChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+    def stream(self, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS) -> tts.SynthesizeStream:
+        return self.wrapped.stream(conn_options=conn_options)
+
+    def prewarm(self) -> None:
+        self.wrapped.prewarm()
+
+    async def aclose(self) -> None:
+        await self.wrapped.aclose()
+
+    async def audio_frames(self, text: str) -> AsyncIterator[rtc.AudioFrame]:
+        """The frames for a line, from the cache when possible"""
+        async with self.synthesize(text) as stream:
+            async for ev in stream:
+                yield ev.frame
+
+
+class CachedChunkedStream(tts.ChunkedStream):
+    def __init__(self, *, tts: CachedTTS, input_text: str, conn_options: APIConnectOptions) -> None:
+        super().__init__(tts=tts, input_text=input_text, conn_options=conn_options)
+        self._cached_tts = tts
+
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        cached_tts = self._cached_tts
+        key = cached_tts.cache_key(self._input_text)
+        cached = await asyncio.to_thread(cached_tts.cache.get, key)
+
+        if cached is not None:
+            output_emitter.initialize(
+                request_id=utils.shortuuid(),
+                sample_rate=cached.sample_rate,
+                num_channels=cached.num_channels,
+                mime_type="audio/pcm",
+            )
+            output_emitter.push(cached.pcm)
+            output_emitter.flush()
+            return
+
+        pcm = bytearray()
+        output_emitter.initialize(
+            request_id=utils.shortuuid(),
+            sample_rate=cached_tts.sample_rate,
+            num_channels=cached_tts.num_channels,
+            mime_type="audio/pcm",
+        )
+        async with cached_tts.wrapped.synthesize(self._input_text, conn_options=self._conn_options) as stream:
+            async for ev in stream:
+                cached_tts._miss_request_ids.add(ev.request_id)
+                data = ev.frame.data.tobytes()
+                pcm.extend(data)
+                output_emitter.push(data)
+        output_emitter.flush()
+
+        audio = CachedAudio(bytes(pcm), cached_tts.sample_rate, cached_tts.num_channels)
+        await asyncio.to_thread(cached_tts.cache.put, key, audio)
+        logger.info(f"Cached {len(pcm)} bytes of TTS audio for '{self._input_text[:40]}'")
+
+
+def say_cached(session: AgentSession, text: str, **kwargs) -> SpeechHandle:
+    """session.say() for fixed lines, played through the TTS cache when there is one"""
+    if isinstance(session.tts, CachedTTS):
+        kwargs["audio"] = session.tts.audio_frames(text)
+    return session.say(text, **kwargs)
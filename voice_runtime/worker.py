@@ -0,0 +1,115 @@
+"""
+Multi-tenant worker that hosts every voice agent in one process.
+
+Instead of running one worker fleet per agent, this worker loads all of the
+agents up front and routes each job to the right agent entrypoint. Models are
+shared: the VAD is loaded once per process by voice_runtime.models and the
+turn detector weights live in the worker's single inference process.
+
+Routing, in order of precedence:
+1. Job metadata ``{"agent": "<name>"}`` set when dispatching explicitly
+   (e.g. ``lk dispatch create --agent-name voice-agents --metadata '{"agent": "grocery-wala"}'``)
+2. Room name prefix (e.g. ``fraud-call-1234`` goes to the fraud agent)
+3. The agent_name the job was dispatched to, if it names a hosted agent
+4. ``VOICE_AGENT_DEFAULT`` (defaults to the starter assistant)
+
+Set ``VOICE_MAX_SESSIONS`` to cap concurrent jobs (size it with
+``python -m voice_runtime.load``); otherwise LiveKit's CPU-based load applies.
+
+Run it from the repository root:
+
+    uv run --project backend python -m voice_runtime.worker dev
+"""
+
+import json
+import logging
+import os
+from types import ModuleType
+from typing import Dict
+
+from dotenv import load_dotenv
+from livekit.agents import JobContext, JobProcess, WorkerOptions, cli
+
+from voice_runtime.agents import AGENTS, AGENTS_BY_NAME, load_agent_module
+from voice_runtime.latency import serve_metrics
+from voice_runtime.models import prewarm_pipeline
+
+logger = logging.getLogger("voice-runtime")
+
+load_dotenv(".env.local")
+
+DEFAULT_AGENT = os.getenv("VOICE_AGENT_DEFAULT", "starter")
+MAX_SESSIONS = int(os.getenv("VOICE_MAX_SESSIONS", "0"))
+
+
+def load_agents() -> Dict[str, ModuleType]:
+    """Load every hosted agent, keyed by agent name"""
+    modules = {}
+    for spec in AGENTS:
+        modules[spec.name] = load_agent_module(spec)
+        logger.info(f"Loaded agent '{spec.name}' from {spec.src_dir}")
+    return modules
+
+
+def resolve_agent_name(metadata: str, room_name: str, job_agent_name: str = "") -> str:
+    """Pick the hosted agent that should handle a job"""
+    if metadata:
+        try:
+            requested = json.loads(metadata).get("agent")
+        except (ValueError, AttributeError):
+            requested = None
+        if requested in AGENTS_BY_NAME:
+            return requested
+        if requested:
+            logger.warning(f"Unknown agent '{requested}' in job metadata, falling back")
+
+    for spec in AGENTS:
+        if spec.room_prefixes and room_name.startswith(spec.room_prefixes):
+            return spec.name
+        if room_name.startswith(f"{spec.name}-"):
+            return spec.name
+
+    if job_agent_name in AGENTS_BY_NAME:
+        return job_agent_name
+
+    return DEFAULT_AGENT
+
+
+# Loaded at import time so plugin registration (including the turn detector's
+# inference runner) happens on the main thread in the worker and job processes.
+AGENT_MODULES: Dict[str, ModuleType] = load_agents()
+
+
+def prewarm(proc: JobProcess):
+    """Load and warm the shared models once, then let each agent stash its own data"""
+    prewarm_pipeline(proc)
+    for module in AGENT_MODULES.values():
+        agent_prewarm = getattr(module, "prewarm", None)
+        if agent_prewarm is not None:
+            agent_prewarm(proc)
+    logger.info(f"Worker process prewarmed for {len(AGENT_MODULES)} agents")
+
+
+async def entrypoint(ctx: JobContext):
+    agent_name = resolve_agent_name(ctx.job.metadata, ctx.room.name, ctx.job.agent_name)
+    logger.info(f"Routing room {ctx.room.name} to agent '{agent_name}'")
+    await AGENT_MODULES[agent_name].entrypoint(ctx)
+
+
+def session_load(worker) -> float:
+    """Share of VOICE_MAX_SESSIONS in use; the worker reports full at 1.0"""
+    return len(worker.active_jobs) / MAX_SESSIONS
+
+
+if __name__ == "__main__":
+    # Merged latency histograms from every job process, see voice_runtime.latency
+    if os.getenv("LATENCY_METRICS_PORT"):
+        serve_metrics(int(os.getenv("LATENCY_METRICS_PORT")))
+
+    load_options = {"load_fnc": session_load, "load_threshold": 1.0} if MAX_SESSIONS > 0 else {}
+    cli.run_app(WorkerOptions(
+        entrypoint_fnc=entrypoint,
+        prewarm_fnc=prewarm,
+        agent_name=os.getenv("LIVEKIT_AGENT_NAME", ""),
+        **load_options,
+    ))